@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Fact Model Scaling Benchmark
+Times the indexed fact model and the provisioning generators on the checked-in
+all_storage_facts.json and on synthetic inputs scaled up to 100k LDEVs.
+The legacy next()-based LDEV name lookup is timed alongside for comparison
+(skipped above --legacy-max LDEVs because it is quadratic).
+
+Usage:
+    python3 benchmarks/bench_fact_model.py
+    python3 benchmarks/bench_fact_model.py --scales 1000 10000 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from synthetic_facts import make_facts
+from storage_facts_model import StorageFactsModel
+from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+
+
+def scale_facts(base: Dict[str, Any], num_ldevs: int, hg_fanout: int = 2) -> Dict[str, Any]:
+    """Replicate the base volumes/hostgroups until num_ldevs LDEVs exist"""
+    return make_facts(base, num_ldevs, hg_fanout=hg_fanout)
+
+
+def legacy_name_lookup(ldevs, ldev_hg_mappings):
+    """The pre-index O(N x M) name resolution used by the provisioning generators"""
+    for ldev_id in ldev_hg_mappings:
+        next((l['name'] for l in ldevs if l['ldev_id'] == ldev_id), f"LDEV-{ldev_id}")
+
+
+def run_case(label: str, data: Dict[str, Any], legacy_max: int):
+    start = time.perf_counter()
+    model = StorageFactsModel.from_facts(data)
+    build_s = time.perf_counter() - start
+
+    generator = StorageProvisioningGenerator(label, data=data)
+    start = time.perf_counter()
+    generator.generate_provision_playbook()
+    generator.generate_combined_workflow()
+    generate_s = time.perf_counter() - start
+
+    num_ldevs = len(model.ldevs)
+    if num_ldevs <= legacy_max:
+        start = time.perf_counter()
+        legacy_name_lookup(model.ldevs, model.ldev_hg_mappings)
+        legacy = f"{time.perf_counter() - start:10.3f}"
+    else:
+        legacy = f"{'skipped':>10}"
+
+    per_ldev_us = (build_s + generate_s) / max(num_ldevs, 1) * 1e6
+    print(f"{label:<24} {num_ldevs:>8} {len(model.mappings):>9} "
+          f"{build_s:9.3f} {generate_s:10.3f} {per_ldev_us:9.1f} {legacy}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facts', default=str(ROOT / 'all_storage_facts.json'))
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='Largest LDEV count for which the legacy lookup is timed')
+    args = parser.parse_args()
+
+    with open(args.facts, 'r') as f:
+        base = json.load(f)
+
+    print(f"{'input':<24} {'ldevs':>8} {'mappings':>9} {'build s':>9} {'generate s':>10} "
+          f"{'us/ldev':>9} {'legacy s':>10}")
+    run_case(Path(args.facts).name, base, args.legacy_max)
+    for num_ldevs in args.scales:
+        run_case(f"synthetic-{num_ldevs}", scale_facts(base, num_ldevs), args.legacy_max)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+LDEV Store Memory Benchmark
+Measures the traced Python memory needed to hold N synthetic LDEVs as:
+- full volume dicts, as json.load returns them (~45 keys each)
+- dicts projected to LDEV_FIELDS, as the streaming loader kept them
+- the columnar LdevStore
+and the time to render the LDEV and combined playbooks from each model.
+
+Usage:
+    python3 benchmarks/bench_ldev_store.py --scales 10000 100000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from synthetic_facts import make_facts
+from storage_ldev_store import LDEV_FIELDS, LdevStore
+
+
+def traced_mb(build: Callable[[], Any]) -> float:
+    """Traced memory still held by the object build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current / 1024 / 1024
+
+
+def run_case(base: Dict[str, Any], num_ldevs: int):
+    # Round-trip through JSON text so no value is shared with the template
+    text = json.dumps(make_facts(base, num_ldevs)['ldevs']['ansible_facts']['volumes'])
+
+    full_mb = traced_mb(lambda: json.loads(text))
+    projected_mb = traced_mb(lambda: [{k: v[k] for k in LDEV_FIELDS if k in v} for v in json.loads(text)])
+
+    def build_store():
+        store = LdevStore()
+        store.extend(json.loads(text))
+        return store
+    store_mb = traced_mb(build_store)
+
+    print(f"{num_ldevs:>8} {full_mb:>12.1f} {projected_mb:>14.1f} {store_mb:>10.1f} "
+          f"{projected_mb / store_mb:>9.1f}x {full_mb / store_mb:>9.1f}x")
+
+
+def time_generation(base: Dict[str, Any], num_ldevs: int):
+    from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+    generator = StorageProvisioningGenerator('synthetic', data=make_facts(base, num_ldevs), verbose=False)
+    generator.model
+    start = time.perf_counter()
+    for _ in generator.iter_ldev_playbook():
+        pass
+    for _ in generator.iter_combined_workflow():
+        pass
+    print(f"{num_ldevs:>8} LDEV + combined playbooks rendered from the store in "
+          f"{time.perf_counter() - start:.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facts', default=str(ROOT / 'all_storage_facts.json'))
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    with open(args.facts, 'r') as f:
+        base = json.load(f)
+
+    print(f"{'ldevs':>8} {'full MB':>12} {'projected MB':>14} {'store MB':>10} "
+          f"{'vs proj':>10} {'vs full':>10}")
+    for num_ldevs in args.scales:
+        run_case(base, num_ldevs)
+    print()
+    for num_ldevs in args.scales:
+        time_generation(base, num_ldevs)
+
+
+if __name__ == '__main__':
+    main()
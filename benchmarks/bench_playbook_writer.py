@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Playbook Writer Benchmark
+Compares building each playbook as one string and writing it (the previous
+approach) with streaming its chunks through PlaybookWriter, on synthetic
+inputs. Reports wall time and peak traced Python memory for both.
+
+Usage:
+    python3 benchmarks/bench_playbook_writer.py --scales 10000 100000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_fact_model import scale_facts
+from storage_playbook_writer import PlaybookWriter
+from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+
+PLAYBOOKS = ('ldev_playbook', 'hostgroup_playbook', 'provision_playbook', 'combined_workflow')
+
+
+def write_joined(generator, out_dir: Path):
+    for name in PLAYBOOKS:
+        content = getattr(generator, f'generate_{name}')()
+        with open(out_dir / f'{name}.yml', 'w') as f:
+            f.write(content)
+
+
+def write_streamed(generator, out_dir: Path):
+    for name in PLAYBOOKS:
+        with PlaybookWriter(out_dir / f'{name}.yml') as writer:
+            writer.write_all(getattr(generator, f'iter_{name}')())
+
+
+def measure(fn, generator, out_dir: Path):
+    """Time one untraced run, then trace a second run for peak memory"""
+    start = time.perf_counter()
+    fn(generator, out_dir)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(generator, out_dir)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facts', default=str(ROOT / 'all_storage_facts.json'))
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    with open(args.facts, 'r') as f:
+        base = json.load(f)
+
+    print(f"{'ldevs':>8} {'joined s':>9} {'joined MB':>10} {'stream s':>9} {'stream MB':>10}")
+    for num_ldevs in args.scales:
+        generator = StorageProvisioningGenerator(f'synthetic-{num_ldevs}', data=scale_facts(base, num_ldevs))
+        generator.model  # build the index outside the timed section
+        with tempfile.TemporaryDirectory() as tmp:
+            joined_s, joined_mb = measure(write_joined, generator, Path(tmp))
+            stream_s, stream_mb = measure(write_streamed, generator, Path(tmp))
+        print(f"{num_ldevs:>8} {joined_s:9.3f} {joined_mb:10.1f} {stream_s:9.3f} {stream_mb:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
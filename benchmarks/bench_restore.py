@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+End-to-End Restore Throughput Harness
+Generates the playbooks for a facts file (all_storage_facts.json, or
+synthetic facts with --ldevs), starts the mock VSP REST endpoint
+(storage_mock_vsp.py) with the given latency and concurrency limit, and
+runs the playbooks against it with ansible-playbook. Reports per playbook
+the API calls made, wall time and calls per second, the mock's service time
+and peak concurrency, and whether the mock ends up with exactly the facts'
+LDEV ids, hostgroups, WWNs and LDEV -> hostgroup LU paths (compared as sets,
+not just counted; any difference fails the run).
+
+By default the playbooks run against the mock hv_ldev / hv_hg modules
+(storage_mock_module.py); --collection installed uses the vendor collection
+found on the normal collections path instead.
+
+Usage:
+    python3 benchmarks/bench_restore.py
+    python3 benchmarks/bench_restore.py --ldevs 2000 --latency 0.02 --max-concurrent 4
+    python3 benchmarks/bench_restore.py --playbooks 05_provision_ldevs_to_hostgroups_all.yml --seed
+    python3 benchmarks/bench_restore.py --parallel 8 --forks 8 --playbooks 07_parallel_provisioning_workflow.yml
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from synthetic_facts import load_template, make_facts, write_facts
+from storage_facts_model import wwn_key
+from storage_mock_vsp import BUSY_MODES, MockVspServer, MockVspState, write_mock_collection
+from storage_provisioning_generator_enhanced import DEFAULT_LUN_BATCH_SIZE, StorageProvisioningGenerator
+
+DEFAULT_PLAYBOOKS = ['00_complete_provisioning_workflow_enhanced.yml']
+VAULT_FILE = Path('ansible_vault_vars') / 'ansible_vault_storage_var.yml'
+
+
+def expected_objects(generator: StorageProvisioningGenerator) -> Dict[str, Set[Tuple]]:
+    """Objects a full restore of the facts creates"""
+    hostgroups = list(generator._iter_hostgroup_configs())
+    return {
+        'ldevs': {(ldev['ldev_id'],) for ldev in generator._iter_ldev_configs()},
+        'hostgroups': {(hg['port'], hg['name']) for hg in hostgroups},
+        'wwns': {(hg['port'], hg['name'], wwn_key(wwn)) for hg in hostgroups for wwn in hg['wwns']},
+        'luns': {(task['ldev_id'], task['hg_port'], task['hg_name'])
+                 for task in generator._iter_provisioning_tasks()},
+    }
+
+
+def restored_objects(state: MockVspState) -> Dict[str, Set[Tuple]]:
+    """The same objects as found on the mock; call under the state lock"""
+    return {
+        'ldevs': {(ldev_id,) for ldev_id in state.ldevs},
+        'hostgroups': {(hg['portId'], hg['hostGroupName']) for hg in state.hostgroups.values()},
+        'wwns': {(port, state.hostgroups[(port, number)]['hostGroupName'], wwn)
+                 for (port, number), wwns in state.wwns.items() for wwn in wwns},
+        'luns': state.mappings(),
+    }
+
+
+def seed_mock(server: MockVspServer, generator: StorageProvisioningGenerator):
+    """Pre-create the facts' LDEVs and hostgroups, for running 05 on its own"""
+    with server.state.lock:
+        server.state.seed([ldev['ldev_id'] for ldev in generator._iter_ldev_configs()],
+                          [(hg['port'], hg['name'], hg['host_mode']) for hg in generator._iter_hostgroup_configs()])
+
+
+def run_playbook(ansible_playbook: str, playbook: Path, env: Dict[str, str], log: Path) -> Dict[str, Any]:
+    start = time.perf_counter()
+    with open(log, 'w') as f:
+        returncode = subprocess.call([ansible_playbook, playbook.name], cwd=playbook.parent, env=env,
+                                     stdout=f, stderr=subprocess.STDOUT)
+    return {'returncode': returncode, 'wall_s': time.perf_counter() - start}
+
+
+def run(args, work: Path) -> Dict[str, Any]:
+    facts_file = args.facts
+    if args.ldevs:
+        facts_file = str(work / f"facts-{args.ldevs}.json")
+        write_facts(make_facts(load_template(args.facts), args.ldevs, hg_fanout=args.fanout), facts_file)
+
+    playbook_dir = work / 'playbooks'
+    generator = StorageProvisioningGenerator(facts_file, verbose=False, deterministic=True,
+                                             lun_batch_size=args.lun_batch_size, parallel=args.parallel,
+                                             task_timing=args.task_timing)
+    start = time.perf_counter()
+    generator.generate_all(str(playbook_dir), incremental=False)
+    generate_s = time.perf_counter() - start
+    expected = expected_objects(generator)
+
+    env = dict(os.environ, ANSIBLE_LOCALHOST_WARNING='False', ANSIBLE_INVENTORY_UNPARSED_WARNING='False',
+               ANSIBLE_FORKS=str(args.forks), ANSIBLE_PYTHON_INTERPRETER=sys.executable)
+    if args.collection == 'mock':
+        env['ANSIBLE_COLLECTIONS_PATH'] = str(write_mock_collection(work / 'collections'))
+
+    results = []
+    with MockVspServer(latency=args.latency, write_latency=args.write_latency, jitter=args.jitter,
+                       max_concurrent=args.max_concurrent, busy=args.busy) as server:
+        vault = work / VAULT_FILE
+        vault.parent.mkdir(parents=True, exist_ok=True)
+        vault.write_text(f"storage_address: {server.address}\n"
+                         f"vault_storage_username: mock\nvault_storage_secret: mock\n")
+        if args.seed:
+            seed_mock(server, generator)
+        print(f"✓ Mock VSP on {server.address}: latency {args.latency}s "
+              f"(writes {server.write_latency}s), max concurrent {args.max_concurrent or 'unlimited'}")
+        print(f"{'playbook':<52} {'rc':>3} {'wall s':>9} {'API calls':>10} {'calls/s':>9}")
+        for name in args.playbooks:
+            calls_before = server.stats.total()
+            env['STORAGE_TIMING_REPORT'] = str(work / f"timing_{Path(name).stem}.json")
+            result = run_playbook(args.ansible_playbook, playbook_dir / name, env,
+                                  work / f"ansible_{Path(name).stem}.log")
+            calls = server.stats.total() - calls_before
+            result.update(playbook=name, api_calls=calls,
+                          calls_per_s=calls / result['wall_s'] if result['wall_s'] > 0 else 0.0)
+            results.append(result)
+            print(f"{name:<52} {result['returncode']:>3} {result['wall_s']:>9.2f} {calls:>10} "
+                  f"{result['calls_per_s']:>9.1f}")
+        stats = server.stats.snapshot()
+        with server.state.lock:
+            restored = restored_objects(server.state)
+
+    wall = sum(r['wall_s'] for r in results)
+    print(f"{'total':<52} {'':>3} {wall:>9.2f} {stats['calls']:>10} {stats['calls'] / wall if wall else 0:>9.1f}")
+    print(f"\nMock service time p50 {stats['p50_s']:.4f}s, p95 {stats['p95_s']:.4f}s, "
+          f"peak concurrency {stats['peak_concurrency']}, rejected {stats['rejected']}, errors {stats['errors']}")
+    for endpoint, count in stats['by_endpoint'].items():
+        print(f"  • {endpoint:<28} {count:>8}")
+    print(f"\n{'object':<12} {'in facts':>9} {'on mock':>9} {'missing':>8} {'extra':>8}")
+    verification = {}
+    for kind, objects in expected.items():
+        missing, extra = sorted(objects - restored[kind]), sorted(restored[kind] - objects)
+        verification[kind] = {'expected': len(objects), 'restored': len(restored[kind]),
+                              'missing': [list(o) for o in missing[:20]], 'extra': [list(o) for o in extra[:20]],
+                              'ok': not missing and not extra}
+        print(f"{kind:<12} {len(objects):>9} {len(restored[kind]):>9} {len(missing):>8} {len(extra):>8}")
+        for label, objs in (('missing', missing), ('extra', extra)):
+            if objs:
+                print(f"  ✗ {label}: {', '.join(map(str, objs[:5]))}{' ...' if len(objs) > 5 else ''}")
+    print(f"\nGeneration {generate_s:.2f}s" + (f"; facts, playbooks and logs in {work}" if args.work_dir else ''))
+    return {
+        'facts': facts_file,
+        'settings': {k: v for k, v in vars(args).items() if k not in ('json', 'work_dir')},
+        'generate_s': generate_s,
+        'playbooks': results,
+        'mock': stats,
+        'verification': verification,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facts', default=str(ROOT / 'all_storage_facts.json'),
+                        help='Facts file, or the template for --ldevs')
+    parser.add_argument('--ldevs', type=int, default=0, help='Scale the facts to this many synthetic LDEVs')
+    parser.add_argument('--fanout', type=int, default=2, help='Hostgroups each synthetic LDEV is mapped to')
+    parser.add_argument('--playbooks', nargs='+', default=DEFAULT_PLAYBOOKS,
+                        help='Generated playbooks to run, in order (default: the complete workflow)')
+    parser.add_argument('--seed', action='store_true',
+                        help="Pre-create the facts' LDEVs and hostgroups on the mock (to run 05 alone)")
+    parser.add_argument('--lun-batch-size', type=int, default=DEFAULT_LUN_BATCH_SIZE)
+    parser.add_argument('--parallel', type=int, default=0, help='Also write the sharded workflow (see --parallel)')
+    parser.add_argument('--forks', type=int, default=5, help='ansible-playbook forks (default: 5)')
+    parser.add_argument('--task-timing', action='store_true',
+                        help='Write per-item timing reports (timing_<playbook>.json in the work dir)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mock seconds per API call (default: 0)')
+    parser.add_argument('--write-latency', type=float, default=None,
+                        help='Mock seconds per POST / PUT / DELETE (default: --latency)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Mock latency variation as a fraction')
+    parser.add_argument('--max-concurrent', type=int, default=0, help='Mock concurrent call limit (default: none)')
+    parser.add_argument('--busy', choices=BUSY_MODES, default='wait',
+                        help='Calls over the limit wait, or get 503 and are retried (default: wait)')
+    parser.add_argument('--collection', choices=('mock', 'installed'), default='mock',
+                        help='Run against the mock hv_ldev / hv_hg modules or the installed collection')
+    parser.add_argument('--ansible-playbook', default='ansible-playbook', help='ansible-playbook executable')
+    parser.add_argument('--work-dir', help='Keep facts, playbooks and logs here (default: a temp dir)')
+    parser.add_argument('--json', help='Write the report as JSON')
+    args = parser.parse_args()
+
+    if args.work_dir:
+        work = Path(args.work_dir).resolve()
+        work.mkdir(parents=True, exist_ok=True)
+        report = run(args, work)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            report = run(args, Path(tmp))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report saved to {args.json}")
+    failed = [r['playbook'] for r in report['playbooks'] if r['returncode']]
+    if failed:
+        print(f"✗ Failed: {', '.join(failed)} (see ansible_*.log; use --work-dir to keep them)")
+    mismatched = [kind for kind, check in report['verification'].items() if not check['ok']]
+    if mismatched:
+        print(f"✗ Restored state differs from the facts: {', '.join(mismatched)}")
+    elif not failed:
+        print("✓ Restored LDEVs, hostgroups, WWNs and LU paths match the facts")
+    if failed or mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Playbook Generator Benchmark Suite
+Generates synthetic facts files at several scales (see synthetic_facts.py)
+and, for each, runs the facts loaders and every generate_* method in a fresh
+process, reporting wall time, peak RSS and output size. Results can be saved
+as a baseline and later runs compared against it; a slowdown or RSS growth
+beyond --tolerance is reported as a regression and fails the run.
+
+Usage:
+    python3 benchmarks/bench_suite.py                         # 1k, 10k, 100k LDEVs
+    python3 benchmarks/bench_suite.py --scales 1000 10000 --save baseline.json
+    python3 benchmarks/bench_suite.py --scales 1000 10000 --compare baseline.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from synthetic_facts import load_template, make_facts, write_facts
+
+# Cases timed per scale: loaders, each generate_* method, and the full streamed run
+CASES = (
+    'load_json', 'load_stream',
+    'generate_ldev_playbook', 'generate_hostgroup_playbook',
+    'generate_provision_playbook', 'generate_combined_workflow',
+    'generate_all',
+)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_case(case: str, facts_file: str, out_dir: str, repeat: int) -> Dict[str, Any]:
+    """Runs in a fresh process so peak RSS belongs to this case alone"""
+    from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+
+    times = []
+    output_bytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generator = StorageProvisioningGenerator(facts_file, streaming=(case == 'load_stream'),
+                                                 verbose=False, deterministic=True)
+        generator.model
+        if case.startswith('load'):
+            times.append(time.perf_counter() - start)
+            continue
+        start = time.perf_counter()
+        if case == 'generate_all':
+            outputs = generator.generate_all(out_dir, incremental=False)
+            output_bytes = sum(p.stat().st_size for p in outputs)
+        else:
+            output_bytes = len(getattr(generator, case)().encode())
+        times.append(time.perf_counter() - start)
+    return {'seconds': min(times), 'peak_rss_mb': _peak_rss_mb(), 'output_bytes': output_bytes}
+
+
+def run_suite(scales: List[int], template: str, fanout: int, ldevs_per_hostgroup: int,
+              repeat: int) -> List[Dict[str, Any]]:
+    base = load_template(template)
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    print(f"{'ldevs':>8} {'case':<28} {'seconds':>9} {'peak RSS MB':>12} {'output KB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_ldevs in scales:
+            facts_file = str(Path(tmp) / f"facts-{num_ldevs}.json")
+            data = make_facts(base, num_ldevs, hg_fanout=fanout, ldevs_per_hostgroup=ldevs_per_hostgroup)
+            facts_bytes = write_facts(data, facts_file)
+            del data
+            print(f"{num_ldevs:>8} {'(facts file)':<28} {'':>9} {'':>12} {facts_bytes / 1024:>11.0f}")
+            for case in CASES:
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(run_case, (case, facts_file, str(Path(tmp) / 'out'), repeat))
+                result.update({'ldevs': num_ldevs, 'case': case})
+                results.append(result)
+                print(f"{num_ldevs:>8} {case:<28} {result['seconds']:>9.3f} {result['peak_rss_mb']:>12.1f} "
+                      f"{result['output_bytes'] / 1024:>11.0f}")
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (a fraction) in time or peak RSS versus the baseline"""
+    previous = {(r['ldevs'], r['case']): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get((r['ldevs'], r['case']))
+        if old is None:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if old[metric] > 0 and r[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{r['case']} @ {r['ldevs']} LDEVs: {metric} "
+                                   f"{old[metric]:.3f} -> {r[metric]:.3f} (+{r[metric] / old[metric] - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--template', default=str(ROOT / 'all_storage_facts.json'))
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--fanout', type=int, default=2, help='Hostgroups each LDEV is mapped to')
+    parser.add_argument('--ldevs-per-hostgroup', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per case; the fastest is reported')
+    parser.add_argument('--save', help='Write results as JSON (e.g. a baseline)')
+    parser.add_argument('--compare', help='Baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown / RSS growth versus the baseline (default: 0.25 = 25%%)')
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.template, args.fanout, args.ldevs_per_hostgroup, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.save}")
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  • {line}")
+            sys.exit(1)
+        print(f"\n✓ No regressions beyond {args.tolerance:.0%} versus {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
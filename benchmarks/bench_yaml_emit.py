@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+YAML Emission Benchmark
+Serializes the standard playbooks of synthetic inputs with each YAML backend
+(the built-in streaming emitter and PyYAML's safe dumper, LibYAML-based when
+available) and reports time and output size per playbook. LDEV entries
+hand-formatted with an f-string, as the generator did before the playbooks
+were built as data, are timed as a reference. With --verify, every output is
+parsed back and both backends must yield the same data, and strings that a
+literal block cannot carry must round-trip unchanged.
+
+Usage:
+    python3 benchmarks/bench_yaml_emit.py --scales 10000 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_fact_model import scale_facts
+from storage_playbook import debug_task, play
+from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+from storage_yaml import YAML_BACKENDS, make_emitter
+
+PLAYBOOKS = ('ldev_playbook', 'hostgroup_playbook', 'provision_playbook', 'combined_workflow')
+
+# Multi-line strings the emitters must not write as literal blocks as they are
+ROUND_TRIP_STRINGS = ['\n', '\n\n', '\n\n\n', 'a\x0bb\nc', 'a\x0cb\n', 'a\r\nb', 'a\x85b\nc',
+                      ' lead\nx', '\n  indented\nb', '\n\tb', 'x\n\n', '\n\nx', 'x\n  y\n', 'a\n  \nb']
+
+
+def fstring_ldev_entries(generator) -> str:
+    """The LDEV list as the former f-string template wrote it (no escaping)"""
+    return ''.join(f"""      - ldev_id: {ldev['ldev_id']}
+        name: "{ldev['name']}"
+        size: "{ldev['size']}"
+        pool_id: {ldev['pool_id']}
+        emulation_type: "{ldev['emulation_type']}"
+        capacity_saving: "{ldev['capacity_saving']}"
+        data_reduction_share: {str(ldev['data_reduction_share']).lower()}
+""" for ldev in generator._iter_ldev_configs())
+
+
+def round_trip_failures(yaml, loader) -> list:
+    """Messages for ROUND_TRIP_STRINGS that do not load back unchanged: as a
+    task's msg followed by another task (the blank line between tasks comes
+    right after the value), as a mapping value and as a sequence item"""
+    failures = []
+    for backend in YAML_BACKENDS:
+        emitter = make_emitter(backend)
+        for value in ROUND_TRIP_STRINGS:
+            document = [play('Round trip', tasks=[debug_task('Value', value), debug_task('Next', 'y')]),
+                        {'name': 'Values', 'vars': {'text': value, 'items': [value, 'y']}}]
+            try:
+                loaded = yaml.load(''.join(emitter.iter_document(document)), Loader=loader)
+            except yaml.YAMLError:
+                failures.append(f"{backend}: {value!r} gives a document that does not load")
+                continue
+            placed = (loaded[0]['tasks'][0]['ansible.builtin.debug']['msg'], loaded[1]['vars']['text'],
+                      loaded[1]['vars']['items'][0])
+            if any(found != value for found in placed):
+                failures.append(f"{backend}: {value!r} does not round-trip")
+    return failures
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facts', default=str(ROOT / 'all_storage_facts.json'))
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--verify', action='store_true',
+                        help="Parse every output back and check both backends produce the same data")
+    args = parser.parse_args()
+
+    with open(args.facts, 'r') as f:
+        base = json.load(f)
+    if args.verify:
+        import yaml
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        for failure in round_trip_failures(yaml, loader):
+            print(f"✗ {failure}")
+
+    print(f"{'ldevs':>8} {'playbook':<20} " + ' '.join(f"{b + ' s':>10} {b + ' MB':>10}" for b in YAML_BACKENDS))
+    for num_ldevs in args.scales:
+        generator = StorageProvisioningGenerator(f'synthetic-{num_ldevs}', data=scale_facts(base, num_ldevs),
+                                                 verbose=False)
+        generator.model  # build the index outside the timed section
+        fstring_s, _ = timed(lambda: fstring_ldev_entries(generator))
+        for name in PLAYBOOKS:
+            row, parsed = [], []
+            for backend in YAML_BACKENDS:
+                generator.emitter = make_emitter(backend)
+                elapsed, text = timed(lambda: ''.join(getattr(generator, f'iter_{name}')()))
+                row.append(f"{elapsed:10.3f} {len(text) / (1024 * 1024):10.1f}")
+                if args.verify:
+                    parsed.append(yaml.load(text, Loader=loader))
+            if parsed and any(p != parsed[0] for p in parsed):
+                row.append("  ✗ backends differ")
+            print(f"{num_ldevs:>8} {name:<20} " + ' '.join(row))
+        print(f"{num_ldevs:>8} {'(f-string LDEVs)':<20} {fstring_s:10.3f}")
+
+
+if __name__ == '__main__':
+    main()
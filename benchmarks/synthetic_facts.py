@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Synthetic Storage Facts Generator
+Builds all_storage_facts.json-shaped documents at arbitrary scale, using the
+records of a real facts file as templates so every key the generators (and
+the streaming loader) see is present:
+- ldevs.ansible_facts.volumes with per-LDEV hostgroups lists
+- host_groups.ansible_facts.hostGroups spread over the template's ports
+- snapshots / snapshot_groups pointing at the synthetic P-VOLs
+- external_volumes mapped onto synthetic LDEVs
+All other sections are carried over from the template unchanged. Output is
+deterministic for a given template and set of parameters.
+
+Usage:
+    python3 benchmarks/synthetic_facts.py --ldevs 10000 -o /tmp/facts-10k.json
+    python3 benchmarks/synthetic_facts.py --ldevs 100000 --ldevs-per-hostgroup 50 --fanout 4 -o big.json
+"""
+
+import argparse
+import copy
+import json
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _facts(data: Dict[str, Any], section: str, key: str) -> List[Dict[str, Any]]:
+    return (data.get(section) or {}).get('ansible_facts', {}).get(key) or []
+
+
+def _with_facts(data: Dict[str, Any], section: str, key: str, records: List[Dict[str, Any]]):
+    """Replace one record list, keeping the section's other ansible_facts keys"""
+    section_data = dict(data.get(section) or {})
+    section_data['ansible_facts'] = dict(section_data.get('ansible_facts') or {}, **{key: records})
+    data[section] = section_data
+
+
+def make_facts(template: Dict[str, Any], num_ldevs: int, hg_fanout: int = 2,
+               ldevs_per_hostgroup: int = 20, snapshots_per_ldev: float = 0.75,
+               external_ratio: float = 0.1) -> Dict[str, Any]:
+    """
+    Scale a facts document to num_ldevs LDEVs.
+
+    Each LDEV is mapped to hg_fanout hostgroups; there are at least
+    num_ldevs / ldevs_per_hostgroup hostgroups (never fewer than the template
+    has). snapshots_per_ldev and external_ratio set the snapshot and
+    external-volume counts relative to the LDEV count.
+    """
+    volumes = _facts(template, 'ldevs', 'volumes')
+    hostgroups = _facts(template, 'host_groups', 'hostGroups')
+    num_hgs = max(len(hostgroups), num_ldevs // max(ldevs_per_hostgroup, 1))
+
+    new_hgs = []
+    for i in range(num_hgs):
+        hg = dict(hostgroups[i % len(hostgroups)])
+        hg['host_group_id'] = i
+        hg['host_group_name'] = f"{hg['host_group_name']}-{i}"
+        new_hgs.append(hg)
+
+    new_volumes = []
+    for i in range(num_ldevs):
+        ldev = dict(volumes[i % len(volumes)])
+        ldev['ldev_id'] = i
+        ldev['name'] = f"{ldev['name']}-{i}"
+        ldev['hostgroups'] = [
+            {'id': hg['host_group_id'], 'name': hg['host_group_name'], 'port_id': hg['port_id']}
+            for hg in (new_hgs[(i + k) % num_hgs] for k in range(hg_fanout))
+        ]
+        new_volumes.append(ldev)
+
+    data = copy.copy(template)
+    _with_facts(data, 'ldevs', 'volumes', new_volumes)
+    _with_facts(data, 'host_groups', 'hostGroups', new_hgs)
+
+    snapshots = _facts(template, 'snapshots', 'snapshots')
+    if snapshots:
+        num_snapshots = int(num_ldevs * snapshots_per_ldev)
+        # Roughly the template's snapshots-per-group ratio
+        num_groups = max(1, num_snapshots * max(len(_facts(template, 'snapshot_groups', 'snapshot_groups')), 1)
+                         // len(snapshots))
+        new_snapshots = []
+        for i in range(num_snapshots):
+            snap = dict(snapshots[i % len(snapshots)])
+            pvol = new_volumes[i % num_ldevs]
+            snap['primary_volume_id'] = pvol['ldev_id']
+            snap['primary_volume_id_hex'] = _ldev_hex(pvol['ldev_id'])
+            snap['mirror_unit_id'] = i // num_ldevs
+            snap['snapshot_id'] = f"{pvol['ldev_id']},{snap['mirror_unit_id']}"
+            snap['snapshot_group_name'] = f"synthetic-snapgroup-{i % num_groups}"
+            snap['pvol_host_groups'] = [
+                {'host_group_name': hg['name'], 'host_group_number': hg['id'], 'lun': i % 2048,
+                 'port_id': hg['port_id']}
+                for hg in pvol['hostgroups']
+            ]
+            new_snapshots.append(snap)
+        _with_facts(data, 'snapshots', 'snapshots', new_snapshots)
+        _with_facts(data, 'snapshot_groups', 'snapshot_groups', [
+            {'snapshot_group_id': f"synthetic-snapgroup-{g}", 'snapshot_group_name': f"synthetic-snapgroup-{g}"}
+            for g in range(min(num_groups, num_snapshots))
+        ])
+
+    externals = _facts(template, 'external_volumes', 'external_volume')
+    if externals:
+        new_externals = []
+        for i in range(int(num_ldevs * external_ratio)):
+            ext = dict(externals[i % len(externals)])
+            ext['external_ldev_id'] = i
+            ext['external_lun'] = i % 2048
+            ext['ldev_ids'] = [new_volumes[-1 - i]['ldev_id']]
+            new_externals.append(ext)
+        _with_facts(data, 'external_volumes', 'external_volume', new_externals)
+    return data
+
+
+def _ldev_hex(ldev_id: int) -> str:
+    return f"{ldev_id >> 16 & 0xFF:02X}:{ldev_id >> 8 & 0xFF:02X}:{ldev_id & 0xFF:02X}"
+
+
+def load_template(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_facts(data: Dict[str, Any], path: str) -> int:
+    """Write a facts document the way the collection playbooks do; returns its size in bytes"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+    return Path(path).stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--template', default=str(ROOT / 'all_storage_facts.json'))
+    parser.add_argument('--ldevs', type=int, required=True)
+    parser.add_argument('--fanout', type=int, default=2, help='Hostgroups each LDEV is mapped to')
+    parser.add_argument('--ldevs-per-hostgroup', type=int, default=20)
+    parser.add_argument('--snapshots-per-ldev', type=float, default=0.75)
+    parser.add_argument('--external-ratio', type=float, default=0.1)
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+
+    data = make_facts(load_template(args.template), args.ldevs, hg_fanout=args.fanout,
+                      ldevs_per_hostgroup=args.ldevs_per_hostgroup,
+                      snapshots_per_ldev=args.snapshots_per_ldev, external_ratio=args.external_ratio)
+    size = write_facts(data, args.output)
+    print(f"✓ Wrote {args.output}: {args.ldevs} LDEVs, "
+          f"{len(_facts(data, 'host_groups', 'hostGroups'))} hostgroups, "
+          f"{len(_facts(data, 'snapshots', 'snapshots'))} snapshots ({size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
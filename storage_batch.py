@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Multi-Array Batch Generation
+Generates playbook sets for many storage facts files in parallel across CPU
+cores. Each array's playbooks are written to <output_root>/<serial_number>/,
+using the serial number from the facts (storage_system.serial_number, falling
+back to the LDEV storage_serial_number), and per-array timings are reported.
+With inventory, an Ansible inventory and a workflow targeting every array at
+once are written to <output_root> as well (see storage_inventory.py).
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from storage_inventory import inventory_host, storage_address, write_host_vars, write_inventory
+from storage_profile import PhaseTimer
+from storage_provisioning_generator_enhanced import (
+    DEFAULT_LUN_BATCH_SIZE, StorageProvisioningGenerator, vars_file_for,
+)
+
+
+def expand_fact_files(inputs: List[str]) -> List[Path]:
+    """Resolve files, directories (*.json inside) and glob patterns to fact files"""
+    files = []
+    seen = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            matches = sorted(path.glob('*.json'))
+        elif path.exists():
+            matches = [path]
+        else:
+            matches = sorted(Path(m) for m in glob.glob(item))
+        for match in matches:
+            key = match.resolve()
+            if key not in seen:
+                seen.add(key)
+                files.append(match)
+    return files
+
+
+def generate_array(json_file: str, output_root: str, vault_file: str, streaming: bool,
+                   incremental: bool, deterministic: bool, lun_batch_size: int,
+                   parallel: int, schedule: bool, snapshots: bool,
+                   external: bool, inventory: bool, yaml_backend: str,
+                   chunk_size: int, chunk_by: str, checkpoint_file: Optional[str],
+                   task_timing: bool, replication: bool, resource_groups: bool,
+                   ldev_policies: bool) -> Dict[str, Any]:
+    """Process pool worker: generate one array's playbook set"""
+    result = {'source': str(json_file), 'serial': None, 'output_dir': None, 'ok': False, 'error': None}
+    try:
+        start = time.perf_counter()
+        generator = StorageProvisioningGenerator(str(json_file), streaming=streaming, verbose=False,
+                                                 deterministic=deterministic, lun_batch_size=lun_batch_size,
+                                                 parallel=parallel, schedule=schedule,
+                                                 snapshots=snapshots, external=external,
+                                                 yaml_backend=yaml_backend, chunk_size=chunk_size,
+                                                 chunk_by=chunk_by, task_timing=task_timing,
+                                                 replication=replication, resource_groups=resource_groups,
+                                                 ldev_policies=ldev_policies)
+        model = generator.model
+        result['load_s'] = time.perf_counter() - start
+
+        serial = model.serial_number or Path(json_file).stem
+        output_dir = Path(output_root) / serial
+        generator.vault_file = vars_file_for(vault_file, str(output_dir), serial)
+        if checkpoint_file:
+            generator.checkpoint_file = vars_file_for(checkpoint_file, str(output_dir), serial)
+
+        start = time.perf_counter()
+        outputs = generator.generate_all(str(output_dir), incremental=incremental)
+        if inventory:
+            # The group playbook lives in output_root, so its vars file path is relative to that
+            outputs.append(write_host_vars(generator, output_root, serial,
+                                           vars_file_for(vault_file, output_root, serial)))
+            result['address'] = storage_address(generator)
+        result['generate_s'] = time.perf_counter() - start
+
+        result.update({
+            'serial': serial,
+            'model': model.storage_system.get('model', ''),
+            'output_dir': str(output_dir),
+            'ldevs': len(model.ldevs),
+            'hostgroups': len(model.hostgroups),
+            'mappings': model.count_mappings(),
+            'bytes': sum(p.stat().st_size for p in outputs),
+            'phases': generator.timer.seconds,
+            'ok': True,
+        })
+    except SystemExit:
+        # load_facts() has already printed the reason
+        result['error'] = "could not load storage facts"
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    return result
+
+
+def run_batch(inputs: List[str], output_root: str = 'generated_playbooks', jobs: Optional[int] = None,
+              vault_file: str = 'ansible_vault_vars/ansible_vault_storage_var.yml',
+              streaming: bool = False, incremental: bool = True,
+              deterministic: bool = False,
+              lun_batch_size: int = DEFAULT_LUN_BATCH_SIZE,
+              parallel: int = 0, schedule: bool = False,
+              snapshots: bool = False, external: bool = False,
+              inventory: bool = False, yaml_backend: str = 'builtin',
+              chunk_size: int = 0, chunk_by: str = 'count',
+              checkpoint_file: Optional[str] = None, task_timing: bool = False,
+              profile: bool = False, replication: bool = False,
+              resource_groups: bool = False, ldev_policies: bool = False,
+              addresses: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Generate playbooks for every fact file in parallel and print a timing report;
+    addresses maps serials to REST addresses for arrays whose facts record none"""
+    files = expand_fact_files(inputs)
+    if not files:
+        print("✗ No storage facts files found")
+        return []
+
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    print("\n" + "="*80)
+    print(f"Batch Playbook Generation: {len(files)} arrays, {jobs} workers")
+    print("="*80)
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(generate_array, str(f), output_root, vault_file, streaming,
+                               incremental, deterministic, lun_batch_size, parallel, schedule,
+                               snapshots, external, inventory, yaml_backend, chunk_size, chunk_by,
+                               checkpoint_file, task_timing, replication, resource_groups,
+                               ldev_policies)
+                   for f in files]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['ok']:
+                print(f"✓ {result['serial']}: {result['source']} -> {result['output_dir']}")
+            else:
+                print(f"✗ {result['source']}: {result['error']}")
+    arrays = {r['serial']: r for r in results if r['ok'] and inventory}
+    for serial, result in arrays.items():
+        result['address'] = (addresses or {}).get(serial) or result['address']
+    missing = [r for r in arrays.values() if not r['address']]
+    for result in missing:
+        # Falling back to the vars file's storage_address would point every array at one address
+        result.update(ok=False, error="no storage address in the facts; pass --array-address "
+                                      f"{result['serial']}=ADDRESS")
+        print(f"✗ {result['serial']}: {result['error']}")
+    if arrays and not missing:
+        write_inventory(output_root, [{'serial': s, 'address': r['address']} for s, r in arrays.items()],
+                        deterministic=deterministic, yaml_backend=yaml_backend, task_timing=task_timing)
+        print(f"✓ Inventory: {Path(output_root) / 'inventory.yml'} ({len(arrays)} hosts in storage_arrays)")
+    wall_s = time.perf_counter() - start
+
+    print_batch_report(results, wall_s)
+    if profile:
+        timer = PhaseTimer()
+        for result in results:
+            timer.merge(result.get('phases', {}))
+        timer.print_report(f"Generator Profile (sum over {sum(1 for r in results if r['ok'])} arrays)")
+    return results
+
+
+def print_batch_report(results: List[Dict[str, Any]], wall_s: float):
+    """Print per-array timings and totals"""
+    ok = sorted((r for r in results if r['ok']), key=lambda r: r['serial'])
+    print("\n" + "="*80)
+    print("Batch Summary")
+    print("="*80)
+    print(f"{'Serial':<12} {'Model':<14} {'LDEVs':>7} {'HGs':>6} {'Maps':>7} {'Load s':>8} {'Gen s':>8} {'KB':>8}")
+    for r in ok:
+        print(f"{r['serial']:<12} {r['model']:<14} {r['ldevs']:>7} {r['hostgroups']:>6} {r['mappings']:>7} "
+              f"{r['load_s']:>8.2f} {r['generate_s']:>8.2f} {r['bytes'] / 1024:>8.1f}")
+
+    serials = [r['serial'] for r in ok]
+    duplicates = sorted({s for s in serials if serials.count(s) > 1})
+    if duplicates:
+        print(f"\n⚠ Several facts files share serial(s) {', '.join(duplicates)}; "
+              f"their output directories were overwritten")
+
+    failed = len(results) - len(ok)
+    cpu_s = sum(r['load_s'] + r['generate_s'] for r in ok)
+    print(f"\nArrays: {len(ok)} succeeded, {failed} failed")
+    print(f"Wall time: {wall_s:.2f}s (sum of per-array time: {cpu_s:.2f}s)")
+    print("="*80 + "\n")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Incremental Regeneration Cache
+Keeps a manifest next to the generated playbooks recording a content hash of
+the relevant fact sections (ldevs, host_groups) and of every playbook's
+inputs. A playbook whose inputs hash is unchanged, and whose file on disk
+still matches the recorded output hash, is skipped instead of rewritten.
+Chunked playbooks also record the hash of each chunk file they import.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+MANIFEST_NAME = '.playbook_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def digest_records(records: Iterable[Any]) -> str:
+    """Order-sensitive sha256 over the canonical JSON of each record"""
+    h = hashlib.sha256()
+    for record in records:
+        h.update(json.dumps(record, sort_keys=True, separators=(',', ':'), default=str).encode())
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+def digest_values(*values: str) -> str:
+    """Combine several digests / option strings into one sha256"""
+    h = hashlib.sha256()
+    for value in values:
+        h.update(value.encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """sha256 of a file's bytes, or None if it does not exist"""
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+class PlaybookManifest:
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        self.sections: Dict[str, str] = {}
+        self.playbooks: Dict[str, Dict[str, str]] = {}
+
+    def load(self) -> 'PlaybookManifest':
+        """Read an existing manifest; a missing or unreadable one means a full rebuild"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get('version') == MANIFEST_VERSION:
+            self.sections = data.get('sections', {})
+            self.playbooks = data.get('playbooks', {})
+        return self
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'sections': self.sections,
+                'playbooks': self.playbooks,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    def changed_sections(self, sections: Dict[str, str]) -> Dict[str, bool]:
+        """Which fact sections differ from the previous run"""
+        return {name: self.sections.get(name) != digest for name, digest in sections.items()}
+
+    def is_current(self, filename: str, inputs_hash: str, path: Path) -> bool:
+        """True if the playbook was built from the same inputs and is unmodified
+        on disk, along with every chunk file it imports"""
+        entry = self.playbooks.get(filename)
+        if not entry or entry.get('inputs') != inputs_hash:
+            return False
+        parts = entry.get('parts', {})
+        return (file_digest(path) == entry.get('output')
+                and all(file_digest(path.parent / part) == digest for part, digest in parts.items()))
+
+    def parts(self, filename: str) -> Dict[str, str]:
+        """Chunk file name -> output hash recorded for a chunked playbook"""
+        return self.playbooks.get(filename, {}).get('parts', {})
+
+    def record(self, filename: str, inputs_hash: str, path: Path, parts: Optional[Iterable[str]] = None):
+        self.playbooks[filename] = {'inputs': inputs_hash, 'output': file_digest(path)}
+        if parts:
+            self.playbooks[filename]['parts'] = {part: file_digest(path.parent / part) for part in parts}
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Journal
+With a checkpoint file set, 03/04/05 and the complete workflow run their
+storage tasks in a block whose always section appends every completed item
+to the journal, so it is written even when the play fails midway. The
+journal is a local append-only file with one JSON object per line:
+    {"ldev": 1024}                            LDEV created
+    {"hostgroup": ["CL1-A", "web01"]}         hostgroup created (or already present)
+    {"wwns": ["CL1-A", "web01"]}              its WWNs added
+    {"mapping": ["CL1-A", "web01", 1024]}     LDEV presented to the hostgroup
+Chunks, shards of a rerun and resumed runs all append to the same file.
+CheckpointJournal reads it back for the resume mode (storage_resume.py).
+"""
+
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Set, Tuple
+
+from storage_playbook import task
+
+HostgroupKey = Tuple[str, str]
+Mapping = Tuple[int, str, str]
+
+# Per record kind, the Jinja writing one journal line per succeeded loop
+# result of RESULT (Ansible's trim_blocks drops the newline after each tag)
+_RECORD_TEMPLATES = {
+    'ldev': """\
+{% for r in (RESULT | default({})).get('results', []) if r is succeeded %}
+{{ {'ldev': r.item.ldev_id} | to_json }}
+{% endfor %}
+""",
+    'hostgroup': """\
+{% for r in (RESULT | default({})).get('results', []) if r is succeeded %}
+{{ {'hostgroup': [r.item.port, r.item.name]} | to_json }}
+{% endfor %}
+""",
+    'wwns': """\
+{% for r in (RESULT | default({})).get('results', []) if r is succeeded %}
+{{ {'wwns': [r.item.port, r.item.name]} | to_json }}
+{% endfor %}
+""",
+    'mapping': """\
+{% for r in (RESULT | default({})).get('results', []) if r is succeeded %}
+{% for ldev_id in r.item.ldev_ids %}
+{{ {'mapping': [r.item.port, r.item.hostgroup_name, ldev_id]} | to_json }}
+{% endfor %}
+{% endfor %}
+""",
+}
+
+
+def journal_task(records: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Append the completed items of each (record kind, registered loop result) to the journal"""
+    stdin = ''.join(_RECORD_TEMPLATES[kind].replace('RESULT', register) for kind, register in records)
+    return task('Record completed items in the checkpoint journal', 'ansible.builtin.shell', {
+        'cmd': 'mkdir -p "$(dirname {{ checkpoint_file | quote }})" && cat >> {{ checkpoint_file | quote }}',
+        'stdin': stdin,
+        'stdin_add_newline': False,
+    }, tags=['always'])
+
+
+def journaled(name: str, tasks: List[Dict[str, Any]], records: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """tasks as one block that always journals records, whether or not a task failed"""
+    return [{'name': name, 'block': tasks, 'always': [journal_task(records)]}]
+
+
+class CheckpointJournal:
+    """Completed items read from a checkpoint journal"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.ldevs: Set[int] = set()
+        self.hostgroups: Set[HostgroupKey] = set()
+        self.wwns: Set[HostgroupKey] = set()
+        self.mappings: Set[Mapping] = set()
+        # Lines that could not be parsed, e.g. cut off by an interrupted run
+        self.skipped = 0
+
+    def load(self) -> 'CheckpointJournal':
+        """Read the journal; a missing file means nothing has completed yet"""
+        try:
+            f = open(self.path, 'r')
+        except FileNotFoundError:
+            return self
+        with f:
+            for line in f:
+                if line.strip():
+                    self._add(line)
+        return self
+
+    def _add(self, line: str):
+        try:
+            record = json.loads(line)
+            if 'ldev' in record:
+                self.ldevs.add(int(record['ldev']))
+            elif 'hostgroup' in record:
+                port, name = record['hostgroup']
+                self.hostgroups.add((port, name))
+            elif 'wwns' in record:
+                port, name = record['wwns']
+                self.wwns.add((port, name))
+            elif 'mapping' in record:
+                port, name, ldev_id = record['mapping']
+                self.mappings.add((int(ldev_id), port, name))
+            else:
+                self.skipped += 1
+        except (ValueError, TypeError, AttributeError):
+            self.skipped += 1
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'ldevs_completed': len(self.ldevs),
+            'hostgroups_completed': len(self.hostgroups),
+            'wwns_completed': len(self.wwns),
+            'mappings_completed': len(self.mappings),
+        }
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Chunked Playbook Splitting
+With chunk_size set, the LDEV, hostgroup and provisioning playbooks are
+written as chunk files of at most chunk_size items, and the original file
+names become index playbooks that import_playbook their chunks in order:
+- 'count': consecutive chunks in source order
+- 'group': chunks never mix groups; LDEVs are grouped by pool, hostgroups
+  and LUN batches by port, so a chunk can be rerun for one pool / port
+Each chunk registers and templates only its own items, which keeps
+ansible-playbook's parse time and register memory bounded per chunk.
+
+Chunks are cut in one pass over the items with one buffer per open group,
+so at most (groups x chunk_size) items are held at a time.
+"""
+
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+CHUNK_MODES = ('count', 'group')
+
+
+def iter_chunks(items: Iterable[Dict[str, Any]], size: int,
+                key: Optional[Callable[[Dict[str, Any]], str]] = None) -> Iterator[Tuple[Optional[str], List[Dict[str, Any]]]]:
+    """Yield (group, items) chunks of at most size items; group is None without key"""
+    buffers: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for item in items:
+        group = key(item) if key else None
+        buffer = buffers.setdefault(group, [])
+        buffer.append(item)
+        if len(buffer) >= size:
+            yield group, buffer
+            buffers[group] = []
+    for group, buffer in buffers.items():
+        if buffer:
+            yield group, buffer
+
+
+def chunk_filename(filename: str, group: Optional[str], number: int) -> str:
+    """03_create_ldevs_all.yml -> 03_create_ldevs_all_pool-0_002.yml (or _002 without group)"""
+    stem = filename[:-len('.yml')] if filename.endswith('.yml') else filename
+    return f"{stem}_{group}_{number:03d}.yml" if group else f"{stem}_{number:03d}.yml"
+
+
+def import_plays(imports: Iterable[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Index playbook entries for (name, playbook file) pairs"""
+    return [{'name': name, 'ansible.builtin.import_playbook': playbook} for name, playbook in imports]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Delta / Drift Playbook Generation
+Compares a desired-state facts file with a current-state facts file and
+generates playbooks containing only the LDEVs, hostgroups, WWNs and LUN
+mappings that are missing from the current array, plus (optionally) a
+playbook removing what the desired state no longer has.
+"""
+
+from typing import List, Dict, Any, Callable, Iterator, Set, Tuple
+
+from storage_cache import digest_records, digest_values
+from storage_facts_model import StorageFactsModel, wwn_key
+from storage_playbook import connection_vars, play, task, vsp_task
+from storage_provisioning_generator_enhanced import StorageProvisioningGenerator, batch_mappings
+
+HostgroupKey = Tuple[str, str]
+Mapping = Tuple[int, str, str]
+
+
+def _hg_key(hg: Dict[str, Any]) -> HostgroupKey:
+    return hg.get('port_id'), hg.get('host_group_name')
+
+
+class FactsDiff:
+    def __init__(self, desired: StorageFactsModel, current: StorageFactsModel, include_removals: bool = False):
+        self.include_removals = include_removals
+
+        # LDEVs: only hostgroup-associated LDEVs are ever provisioned, so only those are compared
+        self.ldevs_to_add = [l for l in desired.mapped_ldevs() if l.get('ldev_id') not in current.ldev_rows]
+
+        self.hostgroups_to_add: List[Dict[str, Any]] = []
+        self.wwns_to_add: Dict[HostgroupKey, List[Any]] = {}
+        for hg in desired.hostgroups:
+            key = _hg_key(hg)
+            existing = current.hostgroups_by_key.get(key)
+            if existing is None:
+                self.hostgroups_to_add.append(hg)
+                continue
+            have = {wwn_key(w) for w in existing.get('wwns') or []}
+            missing = [w for w in hg.get('wwns') or [] if wwn_key(w) not in have]
+            if missing:
+                self.wwns_to_add[key] = missing
+
+        current_mappings: Set[Mapping] = set(current.iter_mappings())
+        self.mappings_to_add = [m for m in desired.iter_mappings() if m not in current_mappings]
+
+        self.mappings_to_remove: List[Mapping] = []
+        self.wwns_to_remove: Dict[HostgroupKey, List[Any]] = {}
+        self.hostgroups_to_remove: List[Dict[str, Any]] = []
+        self.ldevs_to_remove: List[Dict[str, Any]] = []
+        if include_removals:
+            desired_mappings = set(desired.iter_mappings())
+            self.mappings_to_remove = [m for m in current.iter_mappings() if m not in desired_mappings]
+            for hg in current.hostgroups:
+                key = _hg_key(hg)
+                wanted = desired.hostgroups_by_key.get(key)
+                if wanted is None:
+                    # Hostgroup 0 on each port is built in and cannot be deleted
+                    if hg.get('host_group_id') != 0:
+                        self.hostgroups_to_remove.append(hg)
+                    continue
+                keep = {wwn_key(w) for w in wanted.get('wwns') or []}
+                extra = [w for w in hg.get('wwns') or [] if wwn_key(w) not in keep]
+                if extra:
+                    self.wwns_to_remove[key] = extra
+            # Never touch unmapped LDEVs (journals, pool volumes, snapshot S-VOLs, ...)
+            self.ldevs_to_remove = [l for l in current.mapped_ldevs()
+                                    if l.get('ldev_id') not in desired.ldev_rows]
+
+    def summary(self) -> Dict[str, int]:
+        counts = {
+            'ldevs_to_add': len(self.ldevs_to_add),
+            'hostgroups_to_add': len(self.hostgroups_to_add),
+            'wwns_to_add': sum(len(w) for w in self.wwns_to_add.values()),
+            'mappings_to_add': len(self.mappings_to_add),
+        }
+        if self.include_removals:
+            counts.update({
+                'mappings_to_remove': len(self.mappings_to_remove),
+                'wwns_to_remove': sum(len(w) for w in self.wwns_to_remove.values()),
+                'hostgroups_to_remove': len(self.hostgroups_to_remove),
+                'ldevs_to_remove': len(self.ldevs_to_remove),
+            })
+        return counts
+
+    def is_empty(self) -> bool:
+        return not any(self.summary().values())
+
+
+class DeltaProvisioningGenerator(StorageProvisioningGenerator):
+    """Generates the standard playbook set restricted to the desired/current delta"""
+
+    def __init__(self, desired_file: str, current_file: str, include_removals: bool = False, **kwargs):
+        super().__init__(desired_file, **kwargs)
+        self.current_file = current_file
+        current = StorageProvisioningGenerator(current_file, streaming=self.streaming, verbose=False)
+        self.timer.merge(current.timer.seconds)
+        self._log(f"✓ Loaded current-state facts from {current_file}")
+        # Kept for its unindexed sections (e.g. storage_ports for --preflight)
+        self.current = current
+        self.current_model = current.model
+        with self.timer.phase('extract'):
+            self.diff = FactsDiff(self.model, self.current_model, include_removals)
+
+    def _iter_ldev_configs(self) -> Iterator[Dict[str, Any]]:
+        for ldev in self.diff.ldevs_to_add:
+            yield self._ldev_config(ldev)
+
+    def _count_ldev_configs(self) -> int:
+        return len(self.diff.ldevs_to_add)
+
+    def _iter_hostgroup_configs(self) -> Iterator[Dict[str, Any]]:
+        for hg in self.diff.hostgroups_to_add:
+            yield self._hostgroup_config(hg)
+        # Existing hostgroups that only need WWNs added
+        for (port, name), wwns in self.diff.wwns_to_add.items():
+            config = self._hostgroup_config(self.model.get_hostgroup(port, name))
+            config['wwns'] = wwns
+            config['create'] = False
+            yield config
+
+    def _count_hostgroup_configs(self) -> int:
+        return len(self.diff.hostgroups_to_add) + len(self.diff.wwns_to_add)
+
+    def _iter_provisioning_tasks(self) -> Iterator[Dict[str, Any]]:
+        for ldev_id, hg_port, hg_name in self.diff.mappings_to_add:
+            yield self._provisioning_task(ldev_id, hg_port, hg_name)
+
+    def _count_provisioning_tasks(self) -> int:
+        return len(self.diff.mappings_to_add)
+
+    def playbook_set(self) -> Dict[str, Callable[[], Iterator[str]]]:
+        playbooks = super().playbook_set()
+        if self.diff.include_removals:
+            playbooks['06_remove_drift.yml'] = self.iter_removal_playbook
+        return playbooks
+
+    def _input_digests(self) -> Dict[str, str]:
+        digests = super()._input_digests()
+        if self.diff.include_removals:
+            digests['06_remove_drift.yml'] = digest_values(
+                digests['00_complete_provisioning_workflow_enhanced.yml'],
+                digest_records(self._iter_removals()))
+        return digests
+
+    def _iter_removals(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (list name, item) for every removal, in execution order"""
+        unmaps = (self._provisioning_task(ldev_id, port, name)
+                  for ldev_id, port, name in self.diff.mappings_to_remove)
+        for batch in batch_mappings(unmaps, self.lun_batch_size):
+            yield 'unmap_luns', {'hostgroup_name': batch['hg_name'], 'port': batch['hg_port'],
+                                 'ldev_ids': batch['ldev_ids']}
+        for (port, name), wwns in self.diff.wwns_to_remove.items():
+            yield 'remove_wwns', {'hostgroup_name': name, 'port': port, 'wwns': wwns}
+        for hg in self.diff.hostgroups_to_remove:
+            yield 'delete_hostgroups', {'hostgroup_name': hg.get('host_group_name'), 'port': hg.get('port_id')}
+        for ldev in self.diff.ldevs_to_remove:
+            yield 'delete_ldevs', {'ldev_id': ldev.get('ldev_id'), 'name': ldev.get('name')}
+
+    def iter_removal_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the playbook removing drift that is absent from the desired state"""
+        summary = self.diff.summary()
+        removals: Dict[str, List[Dict[str, Any]]] = {}
+        for list_name, item in self._iter_removals():
+            removals.setdefault(list_name, []).append(item)
+        pair_label = '{{ item.hostgroup_name }} on {{ item.port }}'
+        tasks = [
+            vsp_task('Unmap LDEVs from Hostgroups', 'hv_hg',
+                     {'state': 'unpresent_ldev', 'name': '{{ item.hostgroup_name }}', 'port': '{{ item.port }}',
+                      'ldevs': '{{ item.ldev_ids }}'},
+                     loop='{{ unmap_luns | default([]) }}',
+                     label='{{ item.ldev_ids | length }} LDEVs -x- {{ item.hostgroup_name }} on {{ item.port }}',
+                     tags=['unmap']),
+            vsp_task('Remove WWNs from Hostgroups', 'hv_hg',
+                     {'state': 'remove_wwn', 'name': '{{ item.hostgroup_name }}', 'port': '{{ item.port }}',
+                      'wwns': '{{ item.wwns }}'},
+                     loop='{{ remove_wwns | default([]) }}', label=pair_label, tags=['wwn']),
+            vsp_task('Delete Hostgroups', 'hv_hg', {'name': '{{ item.hostgroup_name }}', 'port': '{{ item.port }}'},
+                     state='absent', loop='{{ delete_hostgroups | default([]) }}', label=pair_label,
+                     tags=['hostgroup']),
+            vsp_task('Delete LDEVs', 'hv_ldev', {'ldev_id': '{{ item.ldev_id }}'}, state='absent',
+                     loop='{{ delete_ldevs | default([]) }}', label='LDEV {{ item.ldev_id }}: {{ item.name }}',
+                     tags=['ldev']),
+        ]
+        pre_tasks = [task('Require explicit confirmation', 'ansible.builtin.assert', {
+            'that': 'confirm_removal | bool',
+            'fail_msg': 'Drift removal is destructive; rerun with -e confirm_removal=true'})]
+        return self._document('Drift Removal Playbook', [play(
+            'Remove Drift Not Present in Desired State', vars_files=[self.vault_file],
+            vars={'confirm_removal': False, **connection_vars(**removals)}, pre_tasks=pre_tasks, tasks=tasks)],
+            f"Desired state: {self.json_file}",
+            f"Current state: {self.current_file}",
+            f"Unmap: {summary['mappings_to_remove']}, WWNs: {summary['wwns_to_remove']}, "
+            f"Hostgroups: {summary['hostgroups_to_remove']}, LDEVs: {summary['ldevs_to_remove']}",
+            "Destructive: run with -e confirm_removal=true")
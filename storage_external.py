@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+External Storage (UVM) Restore Playbook Generation
+Rebuilds virtualized external storage from the facts:
+- external path groups, with all their FC paths in one call per group
+- external parity groups, on the first-priority LUN path of their path group
+- external volumes, one hv_external_volume call each, ordered by path group
+
+The external_volumes section is a discovery listing: every path group lists
+every LUN it can see on every path, so the same external LDEV appears many
+times. Only volumes with internal ldev_ids are mapped, once each, under the
+path group whose parity group holds their LUN.
+"""
+
+from typing import List, Dict, Any, Iterator, Tuple
+
+from storage_playbook import connection_vars, play, vsp_task
+
+EXTERNAL_PLAYBOOK = '10_restore_external_storage.yml'
+
+# section -> key under ansible_facts
+EXTERNAL_SECTIONS = {
+    'external_path_groups': 'external_path_groups',
+    'external_parity_groups': 'external_parity_groups',
+    'external_volumes': 'external_volume',
+}
+
+
+class ExternalStorageIndex:
+    """External path groups, parity groups and mapped volumes, indexed by id"""
+
+    def __init__(self, records: Iterator[Tuple[str, Dict[str, Any]]]):
+        self.path_groups: Dict[Any, Dict[str, Any]] = {}
+        self.parity_groups: Dict[str, Dict[str, Any]] = {}
+        self.volume_entries = 0
+        discovered: List[Dict[str, Any]] = []
+        for section, record in records:
+            if section == 'external_path_groups':
+                self.path_groups[record.get('external_path_group_id')] = record
+            elif section == 'external_parity_groups':
+                self.parity_groups[record.get('external_parity_group_id')] = record
+            else:
+                self.volume_entries += 1
+                if record.get('ldev_ids'):
+                    discovered.append(record)
+        # (path group, port, external_lun) -> external parity group id
+        self.lun_index: Dict[Tuple[Any, Any, Any], str] = {}
+        for pg_id, pg in self.path_groups.items():
+            for epg in pg.get('external_parity_groups') or []:
+                for lun in epg.get('external_luns') or []:
+                    self.lun_index[(pg_id, lun.get('port_id'), lun.get('external_lun'))] = \
+                        epg.get('external_parity_group_id')
+        self.volumes = self._resolve_volumes(discovered)
+
+    def _resolve_volumes(self, discovered: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One volume per (external serial, external LDEV, internal LDEV), placed in the
+        path group that holds it; volumes no parity group claims keep the first listing"""
+        volumes: Dict[Tuple[Any, Any, int], Dict[str, Any]] = {}
+        for entry in discovered:
+            parity_group = self.lun_index.get(
+                (entry.get('external_path_group_id'), entry.get('port_id'), entry.get('external_lun')))
+            for ldev_id in entry['ldev_ids']:
+                key = (entry.get('external_serial_number'), entry.get('external_ldev_id'), ldev_id)
+                volume = volumes.get(key)
+                if volume is None or (parity_group and not volume['parity_group_id']):
+                    volumes[key] = {
+                        'ldev_id': ldev_id,
+                        'external_ldev_id': entry.get('external_ldev_id'),
+                        'external_serial': entry.get('external_serial_number'),
+                        'path_group_id': entry.get('external_path_group_id'),
+                        'parity_group_id': parity_group,
+                        'capacity_mb': entry.get('external_volume_capacity_in_mb'),
+                    }
+        return list(volumes.values())
+
+    def paths(self, pg_id: Any) -> List[Dict[str, Any]]:
+        """Distinct FC paths of a path group, from its parity groups' LUN paths"""
+        pg = self.path_groups[pg_id]
+        seen = {}
+        for path in pg.get('external_paths') or []:
+            seen.setdefault((path.get('port_id'), path.get('external_wwn')), None)
+        for epg in pg.get('external_parity_groups') or []:
+            for lun in sorted(epg.get('external_luns') or [], key=lambda l: l.get('priority') or 0):
+                seen.setdefault((lun.get('port_id'), lun.get('external_wwn')), None)
+        return [{'port': port, 'external_wwn': wwn} for port, wwn in seen]
+
+    def parity_group_configs(self) -> Iterator[Dict[str, Any]]:
+        for pg_id, pg in self.path_groups.items():
+            for epg in pg.get('external_parity_groups') or []:
+                luns = sorted(epg.get('external_luns') or [], key=lambda l: l.get('priority') or 0)
+                if not luns:
+                    continue
+                epg_id = epg.get('external_parity_group_id')
+                details = self.parity_groups.get(epg_id, {})
+                yield {
+                    'external_parity_group_id': epg_id,
+                    'external_path_group_id': pg_id,
+                    'port_id': luns[0].get('port_id'),
+                    'external_wwn': luns[0].get('external_wwn'),
+                    'lun_id': luns[0].get('external_lun'),
+                    'emulation_type': details.get('emulation_type', 'OPEN-V'),
+                    'clpr_id': details.get('clpr_id', 0),
+                }
+
+
+class ExternalStorageGenerator:
+    def __init__(self, generator):
+        """Index external storage through the generator's fact access"""
+        self.generator = generator
+        self.index = ExternalStorageIndex(generator.iter_fact_records(EXTERNAL_SECTIONS))
+
+    def volumes(self) -> List[Dict[str, Any]]:
+        """Volumes ordered by path group (first-seen order), so each group's
+        mappings follow one another"""
+        by_group: Dict[Any, List[Dict[str, Any]]] = {}
+        for volume in self.index.volumes:
+            by_group.setdefault(volume['path_group_id'], []).append(volume)
+        return [volume for volumes in by_group.values() for volume in volumes]
+
+    def mapped_ldevs(self) -> List[int]:
+        """External LDEVs the LDEV playbooks would also create as pool volumes"""
+        created = {ldev['ldev_id'] for ldev in self.generator._iter_ldev_configs()}
+        return sorted({v['ldev_id'] for v in self.index.volumes} & created)
+
+    def iter_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the external storage restore playbook"""
+        gen = self.generator
+        index = self.index
+        parity_groups = list(index.parity_group_configs())
+        volumes = self.volumes()
+        overlap = self.mapped_ldevs()
+        options = {'tags': ['external']}
+
+        play_vars = connection_vars(
+            external_path_groups=[{'external_path_group_id': pg_id, 'external_fc_paths': index.paths(pg_id)}
+                                  for pg_id in index.path_groups],
+            external_parity_groups=parity_groups,
+            external_volumes=volumes)
+        tasks = [
+            vsp_task('Create external path groups', 'hv_external_path_group', {
+                'external_path_group_id': '{{ item.external_path_group_id }}',
+                'external_fc_paths': '{{ item.external_fc_paths }}',
+            }, loop='{{ external_path_groups }}',
+                label='Path group {{ item.external_path_group_id }} ({{ item.external_fc_paths | length }} paths)',
+                **options),
+            vsp_task('Create external parity groups', 'hv_external_parity_group', {
+                key: f"{{{{ item.{key} }}}}" for key in ('external_parity_group_id', 'external_path_group_id',
+                                                         'port_id', 'external_wwn', 'lun_id', 'emulation_type',
+                                                         'clpr_id')
+            }, loop='{{ external_parity_groups }}',
+                label='{{ item.external_parity_group_id }} on path group {{ item.external_path_group_id }}',
+                **options),
+            vsp_task('Map external volumes', 'hv_external_volume', {
+                'external_storage_serial': '{{ item.external_serial }}',
+                'external_ldev_id': '{{ item.external_ldev_id }}',
+                'ldev_id': '{{ item.ldev_id }}',
+            }, loop='{{ external_volumes }}',
+                label='Path group {{ item.path_group_id }}: LDEV {{ item.ldev_id }} <- external {{ item.external_ldev_id }}',
+                **options),
+        ]
+
+        notes = [
+            f"External path groups: {len(index.path_groups)}",
+            f"External parity groups: {len(parity_groups)}",
+            f"External volumes: {len(volumes)} mapped, one call each, from {index.volume_entries} "
+            f"discovery entries",
+        ]
+        if overlap:
+            notes.append(f"External LDEVs also in 03_create_ldevs_all.yml (run this playbook first and "
+                         f"skip them there): {overlap[:20]}{' ...' if len(overlap) > 20 else ''}")
+        return gen._document('External Storage Restore Playbook', [play(
+            'Restore External Storage', vars_files=[gen.vault_file], vars=play_vars, tasks=tasks)], *notes)
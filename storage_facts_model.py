@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Indexed Storage Facts Model
+Builds, in a single pass over all_storage_facts.json data, the lookup tables
+shared by every playbook generator:
+- LDEVs in a compact columnar store, indexed by ldev_id
+- Hostgroups by (port_id, host_group_name)
+- LDEV -> Hostgroup mapping edge list
+- Storage pools by pool_id
+"""
+
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from storage_facts_stream import stream_records
+from storage_ldev_store import LDEV_FIELDS, HostgroupRef, LdevStore
+
+def wwn_key(wwn: Any) -> str:
+    """Comparable key for a WWN entry, which may be a string or a dict"""
+    if isinstance(wwn, dict):
+        wwn = wwn.get('id') or wwn.get('wwn') or ''
+    return str(wwn).lower()
+
+class StorageFactsModel:
+    def __init__(self):
+        self.ldevs = LdevStore()
+        self.hostgroups: List[Dict[str, Any]] = []
+        self.pools: List[Dict[str, Any]] = []
+        # ldev_id -> row in self.ldevs
+        self.ldev_rows: Dict[int, int] = {}
+        self.hostgroups_by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.pools_by_id: Dict[int, Dict[str, Any]] = {}
+        self.storage_system: Dict[str, Any] = {}
+        # ldev_id -> (id, name, port_id) hostgroup refs; source of the mapping edge list
+        self.ldev_hg_mappings: Dict[int, Tuple[HostgroupRef, ...]] = {}
+
+    @classmethod
+    def from_facts(cls, data: Dict[str, Any]) -> 'StorageFactsModel':
+        """Build the model from a fully loaded facts document"""
+        model = cls()
+        model.add_ldevs(data.get('ldevs', {}).get('ansible_facts', {}).get('volumes', []))
+        model.add_hostgroups(data.get('host_groups', {}).get('ansible_facts', {}).get('hostGroups', []))
+        model.add_pools(data.get('storage_pools', {}).get('ansible_facts', {}).get('storage_pool', []))
+        model.storage_system = data.get('storage_system', {}).get('ansible_facts', {}).get('storage_system', {})
+        return model
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, Dict[str, Any]]]) -> 'StorageFactsModel':
+        """Build the model from (section, record) pairs, e.g. from stream_records()"""
+        model = cls()
+        add = {
+            'ldevs': model.add_ldev,
+            'host_groups': model.add_hostgroup,
+            'storage_pools': model.add_pool,
+            'storage_system': model.set_storage_system,
+        }
+        for section, record in records:
+            if section in add:
+                add[section](record)
+        return model
+
+    @classmethod
+    def from_stream(cls, json_file: str) -> 'StorageFactsModel':
+        """Build the model by streaming only the needed sections of a facts file"""
+        return cls.from_records(stream_records(json_file, fields={'ldevs': LDEV_FIELDS}))
+
+    def add_ldev(self, ldev: Dict[str, Any]):
+        """Copy an LDEV record into the store and index its hostgroup associations"""
+        ldev_id = ldev.get('ldev_id')
+        row = self.ldevs.append(ldev)
+        # Keep the first record for a duplicated id, as name lookups always did
+        self.ldev_rows.setdefault(ldev_id, row)
+        hg_refs = self.ldevs.hostgroups[row]
+        if hg_refs:
+            self.ldev_hg_mappings[ldev_id] = hg_refs
+
+    def add_ldevs(self, ldevs: Iterable[Dict[str, Any]]):
+        for ldev in ldevs:
+            self.add_ldev(ldev)
+
+    def add_hostgroup(self, hg: Dict[str, Any]):
+        """Index a hostgroup record by (port_id, host_group_name)"""
+        self.hostgroups.append(hg)
+        self.hostgroups_by_key.setdefault((hg.get('port_id'), hg.get('host_group_name')), hg)
+
+    def add_hostgroups(self, hostgroups: Iterable[Dict[str, Any]]):
+        for hg in hostgroups:
+            self.add_hostgroup(hg)
+
+    def add_pool(self, pool: Dict[str, Any]):
+        """Index a storage pool record by pool_id"""
+        self.pools.append(pool)
+        self.pools_by_id.setdefault(pool.get('pool_id'), pool)
+
+    def add_pools(self, pools: Iterable[Dict[str, Any]]):
+        for pool in pools:
+            self.add_pool(pool)
+
+    def set_storage_system(self, storage_system: Dict[str, Any]):
+        self.storage_system = storage_system or {}
+
+    @property
+    def serial_number(self) -> Optional[str]:
+        """Array serial number from storage_system, else from the LDEV records"""
+        serial = self.storage_system.get('serial_number')
+        if not serial:
+            # Distinct values are kept in first-seen order, so this is the first LDEV's serial
+            serials = self.ldevs.columns['storage_serial_number'].values
+            serial = next((s for s in serials if s and isinstance(s, (str, int))), None)
+        return str(serial) if serial else None
+
+    def get_ldev(self, ldev_id: int) -> Optional[Dict[str, Any]]:
+        """Look up an LDEV record by ldev_id"""
+        row = self.ldev_rows.get(ldev_id)
+        return None if row is None else self.ldevs.record(row)
+
+    def ldev_name(self, ldev_id: int) -> str:
+        """Return the LDEV name, or a placeholder if the id is unknown"""
+        row = self.ldev_rows.get(ldev_id)
+        if row is None:
+            return f"LDEV-{ldev_id}"
+        return self.ldevs.names[row]
+
+    def ldev_field(self, ldev_id: int, field: str, default: Any = None) -> Any:
+        """One stored field of an LDEV, read straight from its column"""
+        row = self.ldev_rows.get(ldev_id)
+        return default if row is None else self.ldevs.value(row, field, default)
+
+    def get_hostgroup(self, port_id: str, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a hostgroup by its (port_id, host_group_name) key"""
+        return self.hostgroups_by_key.get((port_id, name))
+
+    def iter_mappings(self) -> Iterator[Tuple[int, str, str]]:
+        """Yield (ldev_id, port_id, host_group_name) mapping edges in facts order"""
+        for ldev_id, hg_refs in self.ldev_hg_mappings.items():
+            for _, name, port_id in hg_refs:
+                yield ldev_id, port_id, name
+
+    @property
+    def mappings(self) -> List[Tuple[int, str, str]]:
+        """LDEV -> Hostgroup mapping edge list"""
+        return list(self.iter_mappings())
+
+    def count_mappings(self) -> int:
+        """Number of LDEV -> Hostgroup mapping edges"""
+        return sum(len(hg_refs) for hg_refs in self.ldev_hg_mappings.values())
+
+    def count_mapped_ldevs(self) -> int:
+        """Number of LDEVs with at least one hostgroup association"""
+        return sum(1 for hg_refs in self.ldevs.hostgroups if hg_refs)
+
+    def mapped_ldevs(self, fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield LDEVs that have at least one hostgroup association, optionally
+        restricted to the given fields"""
+        return self.ldevs.iter_records(mapped_only=True, fields=fields)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Streaming Storage Facts Loader
+Walks all_storage_facts.json incrementally and yields only the records the
+generators need (e.g. ldevs.ansible_facts.volumes, host_groups.ansible_facts.hostGroups).
+Unwanted sections are skipped without being decoded, so peak memory stays
+bounded by the read buffer and the largest single record, not the file size.
+"""
+
+import json
+import re
+from typing import Dict, Any, Iterator, Optional, Sequence, Tuple
+
+# section name -> list key under ansible_facts
+DEFAULT_SECTIONS = {
+    'ldevs': 'volumes',
+    'host_groups': 'hostGroups',
+    'storage_pools': 'storage_pool',
+    'storage_system': 'storage_system',
+}
+
+_WS = ' \t\n\r'
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SKIP_RE = re.compile(r'(?:[^"{}\[\]]+|"(?:[^"\\]|\\.)*")*')
+_SCALAR_RE = re.compile(r'[^,}\]\s]+')
+
+
+class _StreamScanner:
+    """Buffered JSON token scanner over a text file"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping the consumed prefix; False at EOF"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def expect(self, ch: str):
+        found = self.peek()
+        if found != ch:
+            raise ValueError(f"Expected '{ch}' but found '{found}' in JSON input")
+        self.pos += 1
+
+    def consume_if(self, ch: str) -> bool:
+        if self.peek() == ch:
+            self.pos += 1
+            return True
+        return False
+
+    def read_value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A scalar ending exactly at the buffer end may be truncated ('12' of '1234')
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _match(self, pattern: re.Pattern) -> re.Match:
+        """Match pattern at the current position, reading more input as needed"""
+        while True:
+            match = pattern.match(self.buf, self.pos)
+            if match and match.end() < len(self.buf):
+                return match
+            if not self._fill():
+                if match:
+                    return match
+                raise ValueError("Unexpected end of JSON input")
+
+    def skip_value(self):
+        """Skip the next JSON value without decoding it"""
+        ch = self.peek()
+        if ch == '"':
+            self.pos = self._match(_STRING_RE).end()
+            return
+        if ch not in '{[':
+            self.pos = self._match(_SCALAR_RE).end()
+            return
+        depth = 0
+        while True:
+            # Jump over everything up to the next bracket, strings included
+            self.pos = _SKIP_RE.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf) or self.buf[self.pos] == '"':
+                # Buffer ends mid-run or inside a string
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON input")
+                continue
+            token = self.buf[self.pos]
+            self.pos += 1
+            depth += 1 if token in '{[' else -1
+            if depth == 0:
+                return
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Yield keys of the object at the current position; the caller
+        must consume (read or skip) each value before asking for the next key"""
+        self.expect('{')
+        if self.consume_if('}'):
+            return
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            if self.consume_if(','):
+                continue
+            self.expect('}')
+            return
+
+    def iter_array_items(self) -> Iterator[Any]:
+        """Decode and yield the items of the array at the current position"""
+        self.expect('[')
+        if self.consume_if(']'):
+            return
+        while True:
+            yield self.read_value()
+            if self.consume_if(','):
+                continue
+            self.expect(']')
+            return
+
+
+def _project(record: Any, fields: Optional[Sequence[str]]) -> Any:
+    if fields is None or not isinstance(record, dict):
+        return record
+    return {key: record[key] for key in fields if key in record}
+
+
+def stream_records(json_file: str,
+                   sections: Optional[Dict[str, str]] = None,
+                   fields: Optional[Dict[str, Sequence[str]]] = None,
+                   chunk_size: int = 64 * 1024) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (section, record) pairs from a storage facts file in file order.
+
+    sections maps a top-level section name to the key under its ansible_facts
+    holding the records. List values are yielded item by item; any other value
+    is yielded once. fields optionally restricts each section's records to the
+    listed keys so unused attributes are dropped as soon as they are read.
+    """
+    sections = DEFAULT_SECTIONS if sections is None else sections
+    fields = fields or {}
+    with open(json_file, 'r') as f:
+        scanner = _StreamScanner(f, chunk_size)
+        for section in scanner.iter_object_keys():
+            if section not in sections:
+                scanner.skip_value()
+                continue
+            for key in scanner.iter_object_keys():
+                if key != 'ansible_facts':
+                    scanner.skip_value()
+                    continue
+                for facts_key in scanner.iter_object_keys():
+                    if facts_key != sections[section]:
+                        scanner.skip_value()
+                    elif scanner.peek() == '[':
+                        for record in scanner.iter_array_items():
+                            yield section, _project(record, fields.get(section))
+                    else:
+                        yield section, _project(scanner.read_value(), fields.get(section))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Multi-Array Inventory Output
+For --batch --inventory, writes next to the per-array directories:
+- inventory.yml: one host per array serial in the storage_arrays group,
+  with its REST address as array_storage_address (from the facts, or given
+  per serial); generation fails for an array without one
+- host_vars/<host>.yml: that array's vars file and its LDEV, hostgroup and
+  mapping data
+- 00_complete_provisioning_workflow_arrays.yml: the combined workflow
+  targeting storage_arrays, reading each array's data from its host vars
+- ansible.cfg: this inventory, with forks set to the number of arrays
+so one ansible-playbook run restores every array in parallel.
+"""
+
+from pathlib import Path
+from typing import List, Dict, Any, Iterator
+
+from storage_playbook import CONNECTION_INFO, play
+from storage_playbook_writer import PlaybookWriter
+from storage_profile import write_timing_plugin
+from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+
+INVENTORY_FILE = 'inventory.yml'
+ARRAY_GROUP = 'storage_arrays'
+ARRAYS_PLAYBOOK = '00_complete_provisioning_workflow_arrays.yml'
+
+# Host var holding each array's address; unlike storage_address, no vars file defines it,
+# so the play's vars_files cannot shadow it
+ADDRESS_VAR = 'array_storage_address'
+
+
+def inventory_host(serial: str) -> str:
+    return f"vsp_{serial}"
+
+
+def storage_address(generator) -> str:
+    """REST address recorded in the facts, or '' when none is"""
+    system = generator.model.storage_system
+    return system.get('management_address') or system.get('controller_address') or ''
+
+
+def _iter_host_vars(generator, serial: str, vars_file: str) -> Iterator[str]:
+    host_vars = {'storage_serial': serial, 'storage_vars_file': vars_file,
+                 **generator._combined_vars(generator._provisioning_batches())}
+    return generator.emitter.iter_document(host_vars, [
+        f"Auto-Generated host vars for {inventory_host(serial)}",
+        f"Generated: {generator._generated_stamp()}"])
+
+
+def write_host_vars(generator, output_root: str, serial: str, vars_file: str) -> Path:
+    """Write one array's workflow data to host_vars/<host>.yml under output_root"""
+    host_vars = Path(output_root) / 'host_vars'
+    host_vars.mkdir(parents=True, exist_ok=True)
+    path = host_vars / f"{inventory_host(serial)}.yml"
+    with PlaybookWriter(path) as writer:
+        writer.write_all(_iter_host_vars(generator, serial, vars_file))
+    return path
+
+
+def _iter_arrays_playbook(generator, num_arrays: int) -> Iterator[str]:
+    tasks, post_tasks = generator._combined_tasks()
+    connection_info = dict(CONNECTION_INFO, address=f"{{{{ {ADDRESS_VAR} }}}}")
+    return generator._document('Multi-Array Provisioning Workflow', [play(
+        'Complete Storage Provisioning Workflow (all arrays)', hosts=ARRAY_GROUP,
+        vars_files=['{{ storage_vars_file }}'], vars={'connection_info': connection_info},
+        tasks=tasks, post_tasks=post_tasks)],
+        f"Arrays: {num_arrays} (inventory group {ARRAY_GROUP}); data in host_vars/",
+        f"Run: ansible-playbook {ARRAYS_PLAYBOOK}   (ansible.cfg sets the inventory and forks)")
+
+
+def _inventory(arrays: List[Dict[str, Any]]) -> Dict[str, Any]:
+    hosts = {}
+    for array in arrays:
+        hosts[inventory_host(array['serial'])] = {
+            'ansible_connection': 'local',
+            'ansible_python_interpreter': '{{ ansible_playbook_python }}',
+            ADDRESS_VAR: array['address'],
+        }
+    return {'all': {'children': {ARRAY_GROUP: {'hosts': hosts}}}}
+
+
+def write_inventory(output_root: str, arrays: List[Dict[str, Any]], deterministic: bool = False,
+                    yaml_backend: str = 'builtin', task_timing: bool = False) -> List[Path]:
+    """Write inventory.yml, ansible.cfg and the group-targeted workflow for the
+    given arrays (dicts with serial and address); every array needs an address"""
+    missing = sorted(array['serial'] for array in arrays if not array['address'])
+    if missing:
+        raise ValueError(f"No storage address for array(s) {', '.join(missing)}")
+    # Only the templates are needed; the empty facts document is never read
+    generator = StorageProvisioningGenerator(output_root, data={}, verbose=False, deterministic=deterministic,
+                                             yaml_backend=yaml_backend)
+    root = Path(output_root)
+    root.mkdir(parents=True, exist_ok=True)
+    arrays = sorted(arrays, key=lambda a: a['serial'])
+
+    inventory = root / INVENTORY_FILE
+    with PlaybookWriter(inventory) as writer:
+        writer.write_all(generator.emitter.iter_document(
+            _inventory(arrays), [f"Auto-Generated storage array inventory ({len(arrays)} arrays)"]))
+
+    config = root / 'ansible.cfg'
+    with PlaybookWriter(config) as writer:
+        writer.write(f"# Auto-Generated: one fork per array so all arrays are restored at once\n"
+                     f"[defaults]\ninventory = {INVENTORY_FILE}\nforks = {max(len(arrays), 1)}\n")
+
+    playbook = root / ARRAYS_PLAYBOOK
+    with PlaybookWriter(playbook) as writer:
+        writer.write_all(_iter_arrays_playbook(generator, len(arrays)))
+    outputs = [inventory, config, playbook]
+    if task_timing:
+        outputs.append(write_timing_plugin(root))
+    return outputs
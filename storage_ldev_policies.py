@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+LDEV QoS / Tiering Policy Restore Playbook Generation
+Reapplies the per-LDEV settings the creation playbooks leave at their
+defaults: qos_settings, tiering_policy, is_relocation_enabled and
+data_reduction_process_mode. hv_ldev updates one LDEV per call, so each LDEV
+with a non-default setting is one entry holding just those settings; LDEVs
+whose settings are all defaults are skipped.
+"""
+
+from typing import List, Dict, Any, Iterator, Optional
+
+from storage_playbook import connection_vars, play, vsp_task
+
+POLICY_PLAYBOOK = '13_restore_ldev_policies.yml'
+
+# Volume fields (also the hv_ldev spec keys)
+POLICY_FIELDS = ('qos_settings', 'tiering_policy', 'is_relocation_enabled', 'data_reduction_process_mode')
+
+# QoS values that mean 'no limit / not set'
+QOS_UNSET = (None, 0, -1)
+
+
+def _non_default(field: str, value: Any) -> Any:
+    """value if it differs from what a newly created LDEV gets, else None"""
+    if field == 'qos_settings':
+        if not isinstance(value, dict) or all(v in QOS_UNSET for v in value.values()):
+            return None
+        return {key: v for key, v in value.items() if v not in QOS_UNSET}
+    if field == 'tiering_policy':
+        if not isinstance(value, dict) or all(v is None for v in value.values()):
+            return None
+        return {key: v for key, v in value.items() if v is not None}
+    if field == 'is_relocation_enabled':
+        # Relocation is on by default for tiered pools
+        return False if value is False else None
+    if field == 'data_reduction_process_mode':
+        # Inline is the default; '' means capacity saving is off
+        return value if value == 'post_process' else None
+    return None
+
+
+class LdevPolicyGenerator:
+    def __init__(self, generator):
+        """Collect the non-default policy settings of the generator's LDEVs"""
+        self.generator = generator
+        self.skipped = 0
+        # {'ldev_id', settings...} per LDEV with a non-default setting
+        self.policies: List[Dict[str, Any]] = []
+        for ldev in generator._iter_ldev_configs():
+            ldev_id = ldev['ldev_id']
+            settings = self.settings(ldev_id)
+            if settings is None:
+                self.skipped += 1
+            else:
+                self.policies.append({'ldev_id': ldev_id, **settings})
+
+    def settings(self, ldev_id: int) -> Optional[Dict[str, Any]]:
+        """An LDEV's non-default settings, or None when they are all defaults"""
+        model = self.generator.model
+        settings = {}
+        for field in POLICY_FIELDS:
+            value = _non_default(field, model.ldev_field(ldev_id, field))
+            if value is not None:
+                settings[field] = value
+        return settings or None
+
+    def iter_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the QoS / tiering policy playbook"""
+        gen = self.generator
+        apply = vsp_task('Apply QoS / tiering policies', 'hv_ldev', {
+            'ldev_id': '{{ item.ldev_id }}',
+            **{field: f"{{{{ item.{field} | default(omit) }}}}" for field in POLICY_FIELDS},
+        }, loop='{{ ldev_policies }}', label='LDEV {{ item.ldev_id }}', tags=['policy'])
+        plays = [play('Restore LDEV QoS and Tiering Policies', vars_files=[gen.vault_file],
+                      vars=connection_vars(ldev_policies=self.policies), tasks=[apply])]
+
+        notes = [
+            f"Policies: applied to {len(self.policies)} LDEVs, one hv_ldev call each; "
+            f"{self.skipped} LDEVs at defaults skipped",
+            "Run after the LDEVs exist (03 or 00)",
+        ]
+        fields = sorted({field for policy in self.policies for field in POLICY_FIELDS if field in policy})
+        if fields:
+            notes.append(f"Settings: {', '.join(fields)}")
+        return gen._document('LDEV Policy Restore Playbook', plays, *notes)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Compact Columnar LDEV Store
+Holds LDEV records as one column per field instead of one dict per volume:
+- ldev_id as a packed array of 64-bit ints
+- low-cardinality fields (size, pool, emulation type, capacity saving mode,
+  flags, serial, resource group, virtual LDEV id, QoS / tiering settings,
+  provision type) as small value tables plus packed 32-bit codes; virtual
+  LDEV ids are -1 outside virtual storage machines, and equal settings dicts
+  are stored once
+- names as a plain list of strings
+- hostgroup associations as shared (id, name, port_id) tuples
+Only the fields in LDEV_FIELDS are kept; the ~45-key volume dicts can be
+released as soon as they have been appended. Records are materialised as
+dicts on demand, so readers see the same keys as before.
+"""
+
+import json
+from array import array
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Volume keys read by the generators; everything else is dropped on load
+LDEV_FIELDS = (
+    'ldev_id', 'name', 'total_capacity', 'total_capacity_in_mb', 'pool_id',
+    'emulation_type', 'deduplication_compression_mode',
+    'is_data_reduction_share_enabled', 'hostgroups', 'storage_serial_number',
+    'resource_group_id', 'virtual_ldev_id', 'qos_settings', 'tiering_policy', 'is_relocation_enabled',
+    'data_reduction_process_mode', 'provision_type',
+)
+
+# (id, name, port_id) of one LDEV -> hostgroup association
+HostgroupRef = Tuple[Any, Any, Any]
+
+_MISSING = object()
+
+
+class _CodedColumn:
+    """Low-cardinality column: each distinct value is stored once, rows hold codes"""
+
+    __slots__ = ('values', 'index', 'codes')
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.index: Dict[Any, int] = {}
+        self.codes = array('I')
+
+    def append(self, value: Any):
+        # Key on the type too, so True/1 and 0/False/0.0 stay distinct; dicts and
+        # lists (settings) on their canonical JSON
+        kind = type(value)
+        if value is _MISSING:
+            key = _MISSING
+        elif kind is dict or kind is list:
+            key = (kind, json.dumps(value, sort_keys=True, default=str) if value else '')
+        else:
+            key = (kind, value)
+        code = self.index.get(key)
+        if code is None:
+            code = self.index[key] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, row: int) -> Any:
+        return self.values[self.codes[row]]
+
+    def __iter__(self) -> Iterator[Any]:
+        values = self.values
+        return (values[code] for code in self.codes)
+
+
+class _IdColumn:
+    """Integer column packed into an array; falls back to a list for any other value"""
+
+    __slots__ = ('data',)
+
+    def __init__(self):
+        self.data = array('q')
+
+    def append(self, value: Any):
+        if isinstance(self.data, array):
+            if type(value) is int and -2**63 <= value < 2**63:
+                self.data.append(value)
+                return
+            self.data = list(self.data)
+        self.data.append(value)
+
+    def __getitem__(self, row: int) -> Any:
+        return self.data[row]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.data)
+
+
+class LdevStore(Sequence):
+    """Sequence of LDEV records stored column-wise; indexing yields a dict per record"""
+
+    CODED_FIELDS = tuple(f for f in LDEV_FIELDS if f not in ('ldev_id', 'name', 'hostgroups'))
+
+    def __init__(self):
+        self.ldev_ids = _IdColumn()
+        self.names: List[Any] = []
+        self.columns: Dict[str, _CodedColumn] = {f: _CodedColumn() for f in self.CODED_FIELDS}
+        # Per row: tuple of shared HostgroupRefs, or None when the key is absent
+        self.hostgroups: List[Optional[Tuple[HostgroupRef, ...]]] = []
+        self._hg_refs: Dict[HostgroupRef, HostgroupRef] = {}
+        self._has_id = array('b')
+        self._has_name = array('b')
+
+    def append(self, ldev: Dict[str, Any]) -> int:
+        """Copy the LDEV_FIELDS of a volume record into the columns; returns its row"""
+        row = len(self.names)
+        self._has_id.append('ldev_id' in ldev)
+        self.ldev_ids.append(ldev.get('ldev_id'))
+        self._has_name.append('name' in ldev)
+        self.names.append(ldev.get('name'))
+        for field, column in self.columns.items():
+            column.append(ldev.get(field, _MISSING))
+        hg_list = ldev.get('hostgroups', _MISSING)
+        if hg_list is _MISSING:
+            self.hostgroups.append(None)
+        else:
+            self.hostgroups.append(tuple(self._hg_ref(hg) for hg in hg_list or ()))
+        return row
+
+    def extend(self, ldevs: Iterable[Dict[str, Any]]):
+        for ldev in ldevs:
+            self.append(ldev)
+
+    def _hg_ref(self, hg: Dict[str, Any]) -> HostgroupRef:
+        ref = (hg.get('id'), hg.get('name'), hg.get('port_id'))
+        return self._hg_refs.setdefault(ref, ref)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.record(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('LdevStore index out of range')
+        return self.record(row)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_records()
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Materialise one row as a volume dict holding the stored fields"""
+        ldev: Dict[str, Any] = {}
+        if self._has_id[row]:
+            ldev['ldev_id'] = self.ldev_ids[row]
+        if self._has_name[row]:
+            ldev['name'] = self.names[row]
+        for field, column in self.columns.items():
+            value = column[row]
+            if value is not _MISSING:
+                ldev[field] = value
+        refs = self.hostgroups[row]
+        if refs is not None:
+            ldev['hostgroups'] = [{'id': hg_id, 'name': name, 'port_id': port_id}
+                                  for hg_id, name, port_id in refs]
+        return ldev
+
+    def value(self, row: int, field: str, default: Any = None) -> Any:
+        """One coded field of a row without materialising the record"""
+        column = self.columns.get(field)
+        value = _MISSING if column is None else column[row]
+        return default if value is _MISSING else value
+
+    def iter_records(self, mapped_only: bool = False,
+                     fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Materialise rows in order, walking the columns in lockstep (much faster
+        than record() per row). mapped_only skips LDEVs without hostgroups; fields
+        restricts each dict to those keys"""
+        wanted = set(LDEV_FIELDS if fields is None else fields)
+        coded = [(field, iter(column)) for field, column in self.columns.items() if field in wanted]
+        names = [field for field, _ in coded]
+        with_id, with_name, with_hgs = 'ldev_id' in wanted, 'name' in wanted, 'hostgroups' in wanted
+        rows = zip(self._has_id, self.ldev_ids, self._has_name, self.names, self.hostgroups,
+                   *(values for _, values in coded))
+        for has_id, ldev_id, has_name, name, refs, *values in rows:
+            if mapped_only and not refs:
+                continue
+            ldev = {}
+            if has_id and with_id:
+                ldev['ldev_id'] = ldev_id
+            if has_name and with_name:
+                ldev['name'] = name
+            for field, value in zip(names, values):
+                if value is not _MISSING:
+                    ldev[field] = value
+            if refs is not None and with_hgs:
+                ldev['hostgroups'] = [{'id': hg_id, 'name': hg_name, 'port_id': port_id}
+                                      for hg_id, hg_name, port_id in refs]
+            yield ldev
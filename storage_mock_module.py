@@ -0,0 +1,156 @@
+#!/usr/bin/python
+"""
+Mock hv_ldev / hv_hg Module (Ansible module)
+Installed as hitachivantara.vspone_block.vsp.hv_ldev and .hv_hg by
+storage_mock_vsp.write_mock_collection, so the generated playbooks run
+without the vendor collection. It accepts the connection_info / state / spec
+arguments the playbooks pass and makes the REST calls a real module makes
+for them: a session per invocation, a hostgroup lookup by port, and one
+call per LDEV, WWN or LUN. connection_info.address is host:port (http) or a
+full http(s):// URL. 503 responses are retried after Retry-After.
+
+This file runs inside ansible-playbook and is never imported by the generator.
+"""
+
+import base64
+import json
+import time
+import urllib.error
+import urllib.request
+
+from ansible.module_utils.basic import AnsibleModule
+
+API_PREFIX = '/ConfigurationManager/v1/objects/'
+MAX_RETRIES = 20
+
+
+class RestClient:
+    def __init__(self, module, connection_info):
+        address = connection_info.get('address') or ''
+        self.base = address.rstrip('/') if '://' in address else f"http://{address}"
+        self.module = module
+        self.auth = 'Basic ' + base64.b64encode(
+            f"{connection_info.get('username', '')}:{connection_info.get('password', '')}".encode()).decode()
+        self.session_id = None
+        self.calls = 0
+
+    def call(self, method, path, body=None, ok=(200, 202)):
+        """Status and decoded body of one API call; statuses outside ok fail the module"""
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(MAX_RETRIES + 1):
+            request = urllib.request.Request(self.base + API_PREFIX + path, data=data, method=method,
+                                             headers={'Content-Type': 'application/json',
+                                                      'Authorization': self.auth})
+            self.calls += 1
+            try:
+                with urllib.request.urlopen(request) as response:
+                    status, payload = response.status, response.read()
+            except urllib.error.HTTPError as e:
+                status, payload = e.code, e.read()
+                if status == 503 and attempt < MAX_RETRIES:
+                    time.sleep(float(e.headers.get('Retry-After') or 1) * min(1.0, 0.05 * 2 ** attempt))
+                    continue
+            except urllib.error.URLError as e:
+                self.module.fail_json(msg=f"Cannot reach {self.base}: {e.reason}", api_calls=self.calls)
+            result = json.loads(payload) if payload else {}
+            if status not in ok:
+                self.module.fail_json(msg=f"{method} {path}: {status} {result.get('message', '')}",
+                                      api_calls=self.calls)
+            return status, result
+
+    def __enter__(self):
+        _, session = self.call('POST', 'sessions')
+        self.auth = f"Session {session['token']}"
+        self.session_id = session['sessionId']
+        return self
+
+    def __exit__(self, *exc):
+        if self.session_id:
+            self.call('DELETE', f"sessions/{self.session_id}")
+
+
+def run_ldev(client, state, spec):
+    ldev_id = spec.get('ldev_id')
+    if state == 'absent':
+        status, _ = client.call('DELETE', f"ldevs/{ldev_id}", ok=(202, 404))
+        return {'changed': status == 202, 'ldev_id': ldev_id}
+    if ldev_id is not None:
+        status, _ = client.call('GET', f"ldevs/{ldev_id}", ok=(200, 404))
+        if status == 200:
+            return {'changed': False, 'ldev_id': ldev_id}
+    body = {'poolId': spec.get('pool_id'), 'byteFormatCapacity': spec.get('size')}
+    if ldev_id is not None:
+        body['ldevId'] = ldev_id
+    if spec.get('capacity_saving') and spec['capacity_saving'] != 'disabled':
+        body['dataReductionMode'] = spec['capacity_saving']
+    _, job = client.call('POST', 'ldevs', body)
+    ldev_id = int(job['affectedResources'][0].rsplit('/', 1)[-1])
+    if spec.get('name'):
+        client.call('PUT', f"ldevs/{ldev_id}", {'label': spec['name']})
+    return {'changed': True, 'ldev_id': ldev_id}
+
+
+def run_hostgroup(module, client, state, spec):
+    port, name = spec['port'], spec['name']
+    _, found = client.call('GET', f"host-groups?portId={port}")
+    hostgroup = next((hg for hg in found['data'] if hg['hostGroupName'] == name), None)
+    if state == 'present':
+        if hostgroup:
+            return {'changed': False}
+        client.call('POST', 'host-groups', {'portId': port, 'hostGroupName': name,
+                                            'hostMode': spec.get('host_mode')})
+        return {'changed': True}
+    if hostgroup is None:
+        if state == 'absent':
+            return {'changed': False}
+        module.fail_json(msg=f"Host group {name} does not exist on {port}", api_calls=client.calls)
+    number = hostgroup['hostGroupNumber']
+    changed = False
+    if state == 'absent':
+        client.call('DELETE', f"host-groups/{port},{number}")
+        changed = True
+    elif state == 'add_wwn':
+        for wwn in spec.get('wwns') or []:
+            wwn = str(wwn.get('wwn', '') if isinstance(wwn, dict) else wwn).lower()
+            if wwn not in hostgroup['wwns']:
+                client.call('POST', 'host-wwns', {'portId': port, 'hostGroupNumber': number, 'hostWwn': wwn})
+                changed = True
+    elif state == 'remove_wwn':
+        for wwn in spec.get('wwns') or []:
+            status, _ = client.call('DELETE', f"host-wwns/{port},{number},{str(wwn).lower()}", ok=(202, 404))
+            changed = changed or status == 202
+    elif state in ('present_ldev', 'unpresent_ldev'):
+        _, luns = client.call('GET', f"luns?portId={port}&hostGroupNumber={number}")
+        mapped = {lun['ldevId']: lun['lun'] for lun in luns['data']}
+        for ldev_id in spec.get('ldevs') or []:
+            ldev_id = int(ldev_id)
+            if state == 'present_ldev' and ldev_id not in mapped:
+                client.call('POST', 'luns', {'portId': port, 'hostGroupNumber': number, 'ldevId': ldev_id})
+                changed = True
+            elif state == 'unpresent_ldev' and ldev_id in mapped:
+                client.call('DELETE', f"luns/{port},{number},{mapped[ldev_id]}")
+                changed = True
+    else:
+        module.fail_json(msg=f"Unsupported hostgroup state {state}", api_calls=client.calls)
+    return {'changed': changed}
+
+
+def main():
+    module = AnsibleModule(argument_spec={
+        'connection_info': {'type': 'dict', 'required': True, 'no_log': False},
+        'state': {'type': 'str', 'default': 'present'},
+        'spec': {'type': 'dict', 'default': {}},
+    })
+    spec = module.params['spec'] or {}
+    # hv_hg takes sub-operations (add_wwn, present_ldev, ...) as spec.state
+    state = spec.get('state') or module.params['state']
+    with RestClient(module, module.params['connection_info']) as client:
+        if 'port' in spec:
+            result = run_hostgroup(module, client, state, spec)
+        else:
+            result = run_ldev(client, state, spec)
+    module.exit_json(api_calls=client.calls, **result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Mock VSP REST Endpoint
+A local stand-in for the subset of the Configuration Manager REST API that
+the hv_ldev / hv_hg tasks of the generated playbooks drive:
+    POST/DELETE  /ConfigurationManager/v1/objects/sessions
+    GET/POST     /ConfigurationManager/v1/objects/ldevs[/<id>]  (PUT label, DELETE)
+    GET/POST     /ConfigurationManager/v1/objects/host-groups   (DELETE <port>,<number>)
+    POST         /ConfigurationManager/v1/objects/host-wwns     (DELETE <port>,<number>,<wwn>)
+    GET/POST     /ConfigurationManager/v1/objects/luns          (DELETE <port>,<number>,<lun>)
+    GET          /mock/stats   call counts, latency, peak concurrency (not counted)
+    GET          /mock/state   object counts (not counted)
+Every API call sleeps for a configurable latency (write_latency for
+POST / PUT / DELETE, which are asynchronous jobs on a real array), and at
+most max_concurrent calls are served at once: the rest wait, or with
+busy='reject' get 503 Retry-After like an array out of REST sessions.
+
+The array state is kept in memory and checked like the real API does
+(duplicate hostgroup names and WWNs, missing hostgroups, LU paths to LDEVs
+that do not exist are errors), so a run that reports success really created
+every object; mappings() lists the LU paths for comparing with the facts.
+
+write_mock_collection installs storage_mock_module.py as the collection's
+hv_ldev and hv_hg modules, for running the playbooks without the vendor
+collection. benchmarks/bench_restore.py runs generated playbooks against the
+mock and reports API calls, wall time and calls per second.
+
+Usage:
+    python3 storage_mock_vsp.py --port 8443 --latency 0.05 --max-concurrent 8
+"""
+
+import argparse
+import base64
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from storage_playbook_writer import PlaybookWriter
+
+API_PREFIX = '/ConfigurationManager/v1/objects/'
+MOCK_MODULE_SOURCE = Path(__file__).parent / 'storage_mock_module.py'
+# The playbooks call hitachivantara.vspone_block.vsp.<module>
+MOCK_MODULE_DIR = Path('ansible_collections') / 'hitachivantara' / 'vspone_block' / 'plugins' / 'modules' / 'vsp'
+MOCK_MODULES = ('hv_ldev', 'hv_hg')
+BUSY_MODES = ('wait', 'reject')
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+class MockVspState:
+    """In-memory array objects; every method runs under the state lock"""
+
+    def __init__(self, serial: str = '0'):
+        self.serial = serial
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, str] = {}
+        self.session_ids = itertools.count(1)
+        self.ldevs: Dict[int, Dict[str, Any]] = {}
+        # (port, hostgroup number) -> hostgroup
+        self.hostgroups: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.hostgroup_names: Dict[Tuple[str, str], int] = {}
+        self.wwns: Dict[Tuple[str, int], List[str]] = {}
+        # (port, hostgroup number) -> lun -> ldev_id
+        self.luns: Dict[Tuple[str, int], Dict[int, int]] = {}
+
+    def seed(self, ldev_ids: List[int], hostgroups: List[Tuple[str, str, str]]):
+        """Pre-create LDEVs and (port, name, host mode) hostgroups, e.g. to run 05 on its own"""
+        for ldev_id in ldev_ids:
+            self.ldevs.setdefault(ldev_id, {'ldevId': ldev_id, 'poolId': 0, 'byteFormatCapacity': '', 'label': ''})
+        for port, name, host_mode in hostgroups:
+            if (port, name) not in self.hostgroup_names:
+                self.create_hostgroup({'portId': port, 'hostGroupName': name, 'hostMode': host_mode})
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            'ldevs': len(self.ldevs),
+            'hostgroups': len(self.hostgroups),
+            'wwns': sum(len(w) for w in self.wwns.values()),
+            'luns': sum(len(l) for l in self.luns.values()),
+        }
+
+    def mappings(self) -> Set[Tuple[int, str, str]]:
+        """LU paths as (ldev_id, port, hostgroup name), like the facts' mapping edges"""
+        return {(ldev_id, port, self.hostgroups[(port, number)]['hostGroupName'])
+                for (port, number), luns in self.luns.items() for ldev_id in luns.values()}
+
+    def _hostgroup_key(self, port: str, number: Any) -> Tuple[str, int]:
+        key = (port, int(number))
+        if key not in self.hostgroups:
+            raise ApiError(404, f"Host group {port},{number} does not exist")
+        return key
+
+    def create_ldev(self, body: Dict[str, Any]) -> str:
+        ldev_id = body.get('ldevId')
+        if ldev_id is None:
+            ldev_id = next(i for i in range(len(self.ldevs) + 1) if i not in self.ldevs)
+        elif int(ldev_id) in self.ldevs:
+            raise ApiError(409, f"LDEV {ldev_id} already exists")
+        ldev_id = int(ldev_id)
+        self.ldevs[ldev_id] = {'ldevId': ldev_id, 'poolId': body.get('poolId'),
+                               'byteFormatCapacity': body.get('byteFormatCapacity'),
+                               'dataReductionMode': body.get('dataReductionMode', 'disabled'), 'label': ''}
+        return f"ldevs/{ldev_id}"
+
+    def ldev(self, ldev_id: str) -> Dict[str, Any]:
+        if int(ldev_id) not in self.ldevs:
+            raise ApiError(404, f"LDEV {ldev_id} does not exist")
+        return self.ldevs[int(ldev_id)]
+
+    def delete_ldev(self, ldev_id: str) -> str:
+        self.ldev(ldev_id)
+        for luns in self.luns.values():
+            if int(ldev_id) in luns.values():
+                raise ApiError(409, f"LDEV {ldev_id} still has LU paths")
+        del self.ldevs[int(ldev_id)]
+        return f"ldevs/{ldev_id}"
+
+    def create_hostgroup(self, body: Dict[str, Any]) -> str:
+        port, name = body['portId'], body['hostGroupName']
+        if (port, name) in self.hostgroup_names:
+            raise ApiError(409, f"Host group {name} already exists on {port}")
+        number = body.get('hostGroupNumber')
+        if number is None:
+            number = next(n for n in range(1, len(self.hostgroups) + 2) if (port, n) not in self.hostgroups)
+        key = (port, int(number))
+        self.hostgroups[key] = {'portId': port, 'hostGroupNumber': key[1], 'hostGroupName': name,
+                                'hostMode': body.get('hostMode', 'LINUX/IRIX'), 'hostGroupId': f"{port},{key[1]}"}
+        self.hostgroup_names[(port, name)] = key[1]
+        self.wwns[key] = []
+        self.luns[key] = {}
+        return f"host-groups/{port},{key[1]}"
+
+    def delete_hostgroup(self, object_id: str) -> str:
+        port, number = object_id.split(',')
+        key = self._hostgroup_key(port, number)
+        del self.hostgroup_names[(port, self.hostgroups.pop(key)['hostGroupName'])]
+        del self.wwns[key], self.luns[key]
+        return f"host-groups/{object_id}"
+
+    def add_wwn(self, body: Dict[str, Any]) -> str:
+        key = self._hostgroup_key(body['portId'], body['hostGroupNumber'])
+        wwn = str(body['hostWwn']).lower()
+        if wwn in self.wwns[key]:
+            raise ApiError(409, f"WWN {wwn} is already registered in {key[0]},{key[1]}")
+        self.wwns[key].append(wwn)
+        return f"host-wwns/{key[0]},{key[1]},{wwn}"
+
+    def delete_wwn(self, object_id: str) -> str:
+        port, number, wwn = object_id.split(',')
+        key = self._hostgroup_key(port, number)
+        if wwn.lower() not in self.wwns[key]:
+            raise ApiError(404, f"WWN {wwn} is not registered in {port},{number}")
+        self.wwns[key].remove(wwn.lower())
+        return f"host-wwns/{object_id}"
+
+    def create_lun(self, body: Dict[str, Any]) -> str:
+        key = self._hostgroup_key(body['portId'], body['hostGroupNumber'])
+        ldev_id = int(self.ldev(body['ldevId'])['ldevId'])
+        luns = self.luns[key]
+        if ldev_id in luns.values():
+            raise ApiError(409, f"LDEV {ldev_id} is already mapped to {key[0]},{key[1]}")
+        lun = body.get('lun')
+        if lun is None:
+            lun = next(n for n in range(len(luns) + 1) if n not in luns)
+        luns[int(lun)] = ldev_id
+        return f"luns/{key[0]},{key[1]},{lun}"
+
+    def delete_lun(self, object_id: str) -> str:
+        port, number, lun = object_id.split(',')
+        key = self._hostgroup_key(port, number)
+        if self.luns[key].pop(int(lun), None) is None:
+            raise ApiError(404, f"LUN {lun} does not exist in {port},{number}")
+        return f"luns/{object_id}"
+
+    def list_hostgroups(self, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        port = query.get('portId')
+        return [dict(hg, wwns=self.wwns[key]) for key, hg in self.hostgroups.items() if not port or key[0] == port]
+
+    def list_luns(self, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        key = self._hostgroup_key(query['portId'], query['hostGroupNumber'])
+        return [{'portId': key[0], 'hostGroupNumber': key[1], 'lun': lun, 'ldevId': ldev_id,
+                 'lunId': f"{key[0]},{key[1]},{lun}"} for lun, ldev_id in self.luns[key].items()]
+
+
+class MockVspStats:
+    """API calls served: counts per endpoint, service time and concurrency"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.seconds: List[float] = []
+
+    def start(self):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+            if self.first is None:
+                self.first = time.time()
+
+    def done(self, endpoint: str, seconds: float, status: int):
+        with self.lock:
+            self.in_flight -= 1
+            self.last = time.time()
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            self.seconds.append(seconds)
+            if status >= 400:
+                self.errors += 1
+
+    def reject(self):
+        with self.lock:
+            self.rejected += 1
+
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            seconds = sorted(self.seconds)
+            span = (self.last - self.first) if self.first is not None and self.last is not None else 0.0
+            return {
+                'calls': sum(self.calls.values()),
+                'by_endpoint': dict(sorted(self.calls.items())),
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'peak_concurrency': self.peak_concurrency,
+                'span_s': round(span, 6),
+                'p50_s': round(percentile(seconds, 50), 6),
+                'p95_s': round(percentile(seconds, 95), 6),
+                'max_s': round(seconds[-1], 6) if seconds else 0.0,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'MockVspServer'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        if url.path.startswith('/mock/'):
+            if url.path == '/mock/stats':
+                self._send(200, self.server.stats.snapshot())
+            else:
+                with self.server.state.lock:
+                    self._send(200, self.server.state.counts())
+            return
+        if not url.path.startswith(API_PREFIX):
+            self._send(404, {'errorSource': url.path, 'message': 'Unknown resource'})
+            return
+        parts = [unquote(p) for p in url.path[len(API_PREFIX):].split('/')]
+        kind, object_id = parts[0], (parts[1] if len(parts) > 1 else None)
+        endpoint = f"{self.command} {kind}" + ('/{id}' if object_id else '')
+
+        server = self.server
+        if server.slots and not server.slots.acquire(blocking=server.busy == 'wait'):
+            server.stats.reject()
+            self._send(503, {'message': 'Too many concurrent requests'}, {'Retry-After': '1'})
+            return
+        server.stats.start()
+        start = time.perf_counter()
+        status = 500
+        try:
+            server.delay(self.command)
+            status, body = self._dispatch(kind, object_id, {k: v[0] for k, v in parse_qs(url.query).items()})
+        except ApiError as e:
+            status, body = e.status, {'errorSource': url.path, 'message': str(e)}
+        except (KeyError, ValueError, TypeError) as e:
+            status, body = 400, {'errorSource': url.path, 'message': f"Invalid request: {e}"}
+        finally:
+            server.stats.done(endpoint, time.perf_counter() - start, status)
+            if server.slots:
+                server.slots.release()
+        self._send(status, body)
+
+    def _dispatch(self, kind: str, object_id: Optional[str], query: Dict[str, str]) -> Tuple[int, Any]:
+        state = self.server.state
+        method = self.command
+        body = self._body() if method in ('POST', 'PUT') else {}
+        if kind == 'sessions':
+            return self._session(method, object_id)
+        if self.headers.get('Authorization', '').split(' ')[-1] not in state.sessions:
+            raise ApiError(401, 'Not authenticated')
+        with state.lock:
+            if method == 'GET':
+                if kind == 'storages':
+                    return 200, {'data': [{'storageDeviceId': f"mock{state.serial}", 'serialNumber': state.serial}]}
+                if kind == 'ldevs' and object_id:
+                    return 200, state.ldev(object_id)
+                if kind == 'ldevs':
+                    return 200, {'data': list(state.ldevs.values())}
+                if kind == 'host-groups':
+                    return 200, {'data': state.list_hostgroups(query)}
+                if kind == 'luns':
+                    return 200, {'data': state.list_luns(query)}
+            elif method == 'PUT' and kind == 'ldevs' and object_id:
+                state.ldev(object_id)['label'] = body.get('label', '')
+                return 202, self._job(f"ldevs/{object_id}")
+            elif method == 'POST' and not object_id:
+                create = {'ldevs': state.create_ldev, 'host-groups': state.create_hostgroup,
+                          'host-wwns': state.add_wwn, 'luns': state.create_lun}.get(kind)
+                if create:
+                    return 202, self._job(create(body))
+            elif method == 'DELETE' and object_id:
+                delete = {'ldevs': state.delete_ldev, 'host-groups': state.delete_hostgroup,
+                          'host-wwns': state.delete_wwn, 'luns': state.delete_lun}.get(kind)
+                if delete:
+                    return 202, self._job(delete(object_id))
+        raise ApiError(404, f"Unsupported request {method} {kind}")
+
+    def _session(self, method: str, session_id: Optional[str]) -> Tuple[int, Any]:
+        state = self.server.state
+        if method == 'POST':
+            auth = self.headers.get('Authorization', '')
+            if not auth.startswith('Basic ') or ':' not in base64.b64decode(auth[6:]).decode(errors='replace'):
+                raise ApiError(401, 'Basic authentication required')
+            token = uuid.uuid4().hex
+            with state.lock:
+                session = str(next(state.session_ids))
+                state.sessions[token] = session
+            return 200, {'token': token, 'sessionId': session}
+        if method == 'DELETE' and session_id:
+            with state.lock:
+                for token, session in list(state.sessions.items()):
+                    if session == session_id:
+                        del state.sessions[token]
+            return 200, {}
+        raise ApiError(404, f"Unsupported request {method} sessions")
+
+    @staticmethod
+    def _job(resource: str) -> Dict[str, Any]:
+        # Jobs complete before the response, so no polling is needed
+        return {'jobId': 0, 'status': 'Completed', 'state': 'Succeeded',
+                'affectedResources': [f"{API_PREFIX}{resource}"]}
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+class MockVspServer(ThreadingHTTPServer):
+    """The mock endpoint on host:port (port 0 picks a free one), served from a
+    background thread by start() or as a context manager"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 write_latency: Optional[float] = None, jitter: float = 0.0, max_concurrent: int = 0,
+                 busy: str = 'wait', serial: str = '0', seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.latency = max(0.0, latency)
+        self.write_latency = self.latency if write_latency is None else max(0.0, write_latency)
+        # Latency varies uniformly by +/- this fraction
+        self.jitter = max(0.0, jitter)
+        self.slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+        self.busy = busy
+        self.state = MockVspState(serial)
+        self.stats = MockVspStats()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def delay(self, method: str):
+        seconds = self.latency if method == 'GET' else self.write_latency
+        if seconds and self.jitter:
+            with self._random_lock:
+                seconds *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def start(self) -> 'MockVspServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-vsp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'MockVspServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def write_mock_collection(collections_dir: Path) -> Path:
+    """Install the mock hv_ldev / hv_hg modules as a collection under
+    collections_dir, for ANSIBLE_COLLECTIONS_PATH"""
+    module_dir = Path(collections_dir) / MOCK_MODULE_DIR
+    module_dir.mkdir(parents=True, exist_ok=True)
+    source = MOCK_MODULE_SOURCE.read_text()
+    for name in MOCK_MODULES:
+        with PlaybookWriter(module_dir / f"{name}.py") as writer:
+            writer.write(source)
+    return Path(collections_dir)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve a mock VSP REST API for playbook testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds per API call (default: 0)")
+    parser.add_argument('--write-latency', type=float, default=None,
+                        help="Seconds per POST / PUT / DELETE call (default: --latency)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Latency variation as a fraction (e.g. 0.2)")
+    parser.add_argument('--max-concurrent', type=int, default=0,
+                        help="Max API calls served at once; 0 means unlimited (default: 0)")
+    parser.add_argument('--busy', choices=BUSY_MODES, default='wait',
+                        help="Calls over --max-concurrent wait, or are rejected with 503 (default: wait)")
+    parser.add_argument('--serial', default='0', help="Serial number the mock reports")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    server = MockVspServer(args.host, args.port, latency=args.latency, write_latency=args.write_latency,
+                           jitter=args.jitter, max_concurrent=args.max_concurrent, busy=args.busy,
+                           serial=args.serial)
+    print(f"✓ Mock VSP REST API on http://{server.address} (stats: /mock/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n• {json.dumps(server.stats.snapshot())}")
+    finally:
+        server.server_close()
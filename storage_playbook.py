@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Playbook Structure
+Plays and tasks as plain data for storage_yaml to serialize. The task
+definitions shared by several playbooks (LDEV / hostgroup creation, WWNs,
+LUN presentation) live here so every workflow issues identical calls.
+"""
+
+from typing import List, Dict, Any, Optional
+
+COLLECTION = 'hitachivantara.vspone_block.vsp'
+
+CONNECTION_INFO = {
+    'address': '{{ storage_address }}',
+    'username': '{{ vault_storage_username }}',
+    'password': '{{ vault_storage_secret }}',
+}
+
+
+def connection_vars(**play_vars: Any) -> Dict[str, Any]:
+    """Play vars: connection_info followed by play_vars, in order"""
+    return {'connection_info': dict(CONNECTION_INFO), **play_vars}
+
+
+def play(name: str, hosts: str = 'localhost', vars_files: Optional[List[str]] = None,
+         vars: Optional[Dict[str, Any]] = None, tasks: Optional[List[Dict[str, Any]]] = None,
+         **sections: Any) -> Dict[str, Any]:
+    """A play; sections holds e.g. strategy and serial (written before
+    vars_files) and pre_tasks / post_tasks (written around tasks)"""
+    result: Dict[str, Any] = {'name': name, 'hosts': hosts, 'gather_facts': False}
+    for key in ('strategy', 'serial'):
+        if sections.get(key):
+            result[key] = sections.pop(key)
+        sections.pop(key, None)
+    if vars_files:
+        result['vars_files'] = vars_files
+    if vars:
+        result['vars'] = vars
+    if 'pre_tasks' in sections:
+        result['pre_tasks'] = sections.pop('pre_tasks')
+    result['tasks'] = tasks or []
+    result.update(sections)
+    return result
+
+
+def task(name: str, module: str, args: Dict[str, Any], loop: Optional[str] = None,
+         label: Optional[str] = None, register: Optional[str] = None, throttle: int = 0,
+         when: Any = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
+    """A task calling module (fully qualified) with args"""
+    result: Dict[str, Any] = {'name': name, module: args}
+    if register:
+        result['register'] = register
+    if throttle:
+        result['throttle'] = throttle
+    if loop:
+        result['loop'] = loop
+    if label:
+        result['loop_control'] = {'label': label}
+    if when:
+        result['when'] = when
+    if tags:
+        result['tags'] = tags
+    return result
+
+
+def vsp_task(name: str, module: str, spec: Dict[str, Any], state: str = 'present', **options: Any) -> Dict[str, Any]:
+    """A task calling a storage module of the collection with connection_info"""
+    args = {'connection_info': '{{ connection_info }}', 'state': state, 'spec': spec}
+    return task(name, f"{COLLECTION}.{module}", args, **options)
+
+
+def debug_task(name: str, msg: str, **options: Any) -> Dict[str, Any]:
+    return task(name, 'ansible.builtin.debug', {'msg': msg}, **options)
+
+
+def set_fact_task(name: str, facts: Dict[str, Any], **options: Any) -> Dict[str, Any]:
+    return task(name, 'ansible.builtin.set_fact', facts, **options)
+
+
+def add_host_task(name: str, group: str, loop: str) -> Dict[str, Any]:
+    """Add one local host per loop item to group (for per-shard / per-pipeline plays)"""
+    return task(name, 'ansible.builtin.add_host', {
+        'name': '{{ item }}',
+        'groups': group,
+        'ansible_connection': 'local',
+        'ansible_python_interpreter': '{{ ansible_playbook_python }}',
+    }, loop=loop)
+
+
+# Shared storage tasks; loop is the Jinja expression of the item list
+
+def create_ldevs_task(name: str, loop: str, full: bool = True, **options: Any) -> Dict[str, Any]:
+    """hv_ldev create at the facts' LDEV id, so LUN paths refer to the same LDEVs;
+    full adds capacity saving and data reduction share"""
+    spec = {'ldev_id': '{{ item.ldev_id }}', 'pool_id': '{{ item.pool_id }}', 'size': '{{ item.size }}',
+            'name': '{{ item.name }}'}
+    if full:
+        spec['capacity_saving'] = '{{ item.capacity_saving | default(omit) }}'
+        spec['data_reduction_share'] = '{{ item.data_reduction_share | default(omit) }}'
+    return vsp_task(name, 'hv_ldev', spec, loop=loop, label='LDEV {{ item.ldev_id }}: {{ item.name }}', **options)
+
+
+def create_hostgroups_task(name: str, loop: str, **options: Any) -> Dict[str, Any]:
+    """hv_hg create; entries with create: false already exist and are skipped"""
+    spec = {'name': '{{ item.name }}', 'port': '{{ item.port }}', 'host_mode': '{{ item.host_mode }}'}
+    return vsp_task(name, 'hv_hg', spec, loop=loop, label='HG {{ item.hg_id }}: {{ item.name }} on {{ item.port }}',
+                    when='item.create | default(true)', **options)
+
+
+def add_wwns_task(name: str, loop: str, **options: Any) -> Dict[str, Any]:
+    spec = {'state': 'add_wwn', 'name': '{{ item.name }}', 'port': '{{ item.port }}', 'wwns': '{{ item.wwns }}'}
+    return vsp_task(name, 'hv_hg', spec, loop=loop, label='{{ item.name }}',
+                    when='item.wwns | length > 0', **options)
+
+
+def present_ldevs_task(name: str, loop: str, **options: Any) -> Dict[str, Any]:
+    """hv_hg present_ldev, one call per LUN batch"""
+    spec = {'state': 'present_ldev', 'name': '{{ item.hostgroup_name }}', 'port': '{{ item.port }}',
+            'ldevs': '{{ item.ldev_ids }}'}
+    return vsp_task(name, 'hv_hg', spec, loop=loop,
+                    label='{{ item.ldev_ids | length }} LDEVs -> {{ item.hostgroup_name }} on {{ item.port }}',
+                    **options)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Streaming Playbook Writer
+Writes playbook text produced chunk by chunk (one LDEV, hostgroup or mapping
+at a time) straight to disk through a fixed-size buffer, so memory does not
+grow with the number of items. Output goes to a temporary file that replaces
+the target only once the playbook is complete.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Union
+
+
+class PlaybookWriter:
+    def __init__(self, path: Union[str, Path], buffer_size: int = 256 * 1024):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.buffer_size = buffer_size
+        self.chars_written = 0
+        # Time spent in file I/O (write, flush, rename), for --profile
+        self.write_seconds = 0.0
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._file = open(self.tmp_path, 'w')
+
+    def write(self, chunk: str):
+        """Buffer a chunk, flushing to disk once buffer_size is reached"""
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        self.chars_written += len(chunk)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_all(self, chunks: Iterable[str]):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def flush(self):
+        if self._buffer:
+            start = time.perf_counter()
+            self._file.write(''.join(self._buffer))
+            self.write_seconds += time.perf_counter() - start
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        """Flush remaining output and move the finished file into place"""
+        self.flush()
+        start = time.perf_counter()
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        self.write_seconds += time.perf_counter() - start
+
+    def abort(self):
+        """Discard partial output, leaving any existing playbook untouched"""
+        self._file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self) -> 'PlaybookWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
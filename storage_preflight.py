@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pre-flight Feasibility Check
+Validates a generated provisioning plan offline, before any playbook runs:
+- capacity requested per pool (total_capacity_in_mb of the LDEVs to create)
+  against the target pool's free capacity, warning/depletion thresholds and
+  virtual-capacity (subscription) limit
+- LDEV ids duplicated in the plan or already present on the target
+- hostgroup ports missing from the target's storage_ports, or not target ports
+
+The target is a second facts file (or the current state in delta mode). With
+no target, the plan is checked against its own facts as a rebuild of the same
+array: pools are assumed empty and only in-plan id duplicates are reported.
+
+Thin (HDP/HDT) LDEVs allocate pages as data is written, so the physical
+capacity expected per pool is the requested capacity times the source pool's
+observed fill ratio (used / located capacity); expected_fill overrides it.
+"""
+
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+PORTS_SECTION = {'storage_ports': 'port_data'}
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+class PreflightValidator:
+    def __init__(self, generator, target=None, expected_fill: Optional[float] = None):
+        """generator supplies the plan (its _iter_* extension points); target is a
+        generator over the target array's facts; expected_fill is a fraction"""
+        self.generator = generator
+        self.target = target
+        self.expected_fill = expected_fill
+        self.findings: List[Tuple[str, str]] = []
+        self.pool_report: List[Dict[str, Any]] = []
+
+    def _add(self, level: str, msg: str):
+        self.findings.append((level, msg))
+
+    def _fill_ratio(self, pool_id: Any) -> float:
+        if self.expected_fill is not None:
+            return self.expected_fill
+        source = self.generator.model.pools_by_id.get(pool_id) or {}
+        total = source.get('total_pool_capacity_mb') or 0
+        located = source.get('total_located_capacity_mb') or 0
+        available = source.get('available_volume_capacity_mb')
+        if total <= 0 or located <= 0 or available is None:
+            return 1.0
+        return min(1.0, max(0.0, (total - available) / located))
+
+    def check_capacity(self, requested: Dict[Any, float]):
+        target_pools = (self.target or self.generator).model.pools_by_id
+        for pool_id, requested_mb in sorted(requested.items(), key=lambda kv: str(kv[0])):
+            if pool_id is None or pool_id < 0:
+                self._add(WARNING, f"{requested_mb / 1024 / 1024:.2f} TB of LDEVs have no pool "
+                                   f"(pool_id {pool_id}); hv_ldev cannot create them in a pool")
+                continue
+            pool = target_pools.get(pool_id)
+            if pool is None:
+                self._add(ERROR, f"Pool {pool_id}: not present on the target "
+                                 f"({requested_mb / 1024 / 1024:.2f} TB requested)")
+                continue
+            total = pool.get('total_pool_capacity_mb') or 0
+            # Without a target the pool is rebuilt empty; otherwise use what is free now
+            free = pool.get('available_volume_capacity_mb', total) if self.target else total
+            needed = requested_mb * self._fill_ratio(pool_id)
+            used_rate = (total - free + needed) / total * 100 if total else float('inf')
+            depletion = pool.get('depletion_threshold') or 100
+            warning = pool.get('warning_threshold') or 100
+            self.pool_report.append({'pool_id': pool_id, 'name': pool.get('pool_name', ''),
+                                     'requested_mb': requested_mb, 'needed_mb': needed,
+                                     'free_mb': free, 'used_rate': used_rate})
+            label = f"Pool {pool_id} ({pool.get('pool_name', '')})"
+            if pool.get('pool_status') not in (None, '', 'NORMAL'):
+                self._add(WARNING, f"{label}: status {pool.get('pool_status')}")
+            if needed > free:
+                self._add(ERROR, f"{label}: needs {needed / 1024 / 1024:.2f} TB, only "
+                                 f"{free / 1024 / 1024:.2f} TB free")
+            elif used_rate > depletion:
+                self._add(ERROR, f"{label}: would reach {used_rate:.0f}% used, above the "
+                                 f"depletion threshold ({depletion}%)")
+            elif used_rate > warning:
+                self._add(WARNING, f"{label}: would reach {used_rate:.0f}% used, above the "
+                                   f"warning threshold ({warning}%)")
+            rate = pool.get('virtual_volume_capacity_rate') or -1
+            if rate > 0:
+                located = pool.get('total_located_capacity_mb', 0) if self.target else 0
+                limit = total * rate / 100
+                if located + requested_mb > limit:
+                    self._add(ERROR, f"{label}: {(located + requested_mb) / 1024 / 1024:.2f} TB virtual "
+                                     f"capacity exceeds the {rate}% subscription limit "
+                                     f"({limit / 1024 / 1024:.2f} TB)")
+
+    def check_ldev_ids(self, ldev_ids: List[Any]):
+        seen, duplicates = set(), set()
+        for ldev_id in ldev_ids:
+            (duplicates if ldev_id in seen else seen).add(ldev_id)
+        if duplicates:
+            self._add(ERROR, f"{len(duplicates)} LDEV id(s) appear more than once in the plan: "
+                             f"{self._sample(duplicates)}")
+        if self.target:
+            existing = [i for i in seen if i in self.target.model.ldev_rows]
+            if existing:
+                self._add(ERROR, f"{len(existing)} LDEV id(s) already exist on the target: "
+                                 f"{self._sample(existing)}")
+
+    def check_ports(self, ports: List[str]):
+        source = self.target or self.generator
+        port_data = {record.get('port_id'): record for _, record in source.iter_fact_records(PORTS_SECTION)}
+        if not port_data:
+            self._add(WARNING, "No storage_ports facts; port checks skipped")
+            return
+        missing = sorted(p for p in ports if p not in port_data)
+        if missing:
+            self._add(ERROR, f"{len(missing)} hostgroup port(s) missing on the target: {', '.join(missing)}")
+        no_target = sorted(p for p in ports if p in port_data
+                           and 'TAR' not in (port_data[p].get('port_attributes') or ['TAR']))
+        if no_target:
+            self._add(WARNING, f"Port(s) without the target (TAR) attribute: {', '.join(no_target)}")
+
+    @staticmethod
+    def _sample(values, limit: int = 10) -> str:
+        try:
+            values = sorted(values)
+        except TypeError:
+            values = sorted(values, key=str)
+        more = f" ... (+{len(values) - limit})" if len(values) > limit else ""
+        return ', '.join(str(v) for v in values[:limit]) + more
+
+    def run(self) -> bool:
+        """Run every check; True when there are no errors"""
+        gen = self.generator
+        model = gen.model
+        requested: Dict[Any, float] = {}
+        ldev_ids = []
+        for ldev in gen._iter_ldev_configs():
+            ldev_ids.append(ldev['ldev_id'])
+            mb = model.ldev_field(ldev['ldev_id'], 'total_capacity_in_mb') or 0
+            requested[ldev['pool_id']] = requested.get(ldev['pool_id'], 0) + mb
+        ports = {hg['port'] for hg in gen._iter_hostgroup_configs()}
+        ports.update(task['hg_port'] for task in gen._iter_provisioning_tasks())
+
+        self.check_capacity(requested)
+        self.check_ldev_ids(ldev_ids)
+        self.check_ports(sorted(p for p in ports if p))
+        return not any(level == ERROR for level, _ in self.findings)
+
+    def print_report(self) -> bool:
+        """Run the checks and print the report; True when there are no errors"""
+        start = time.perf_counter()
+        ok = self.run()
+        elapsed = time.perf_counter() - start
+        target = self.target.json_file if self.target else f"{self.generator.json_file} (rebuild)"
+        print("\n" + "="*80)
+        print(f"Pre-flight Check: {self.generator.json_file} -> {target}")
+        print("="*80)
+        for pool in self.pool_report:
+            print(f"• Pool {pool['pool_id']:<4} {pool['name'][:28]:<28} requested "
+                  f"{pool['requested_mb'] / 1024 / 1024:>9.2f} TB, expected "
+                  f"{pool['needed_mb'] / 1024 / 1024:>8.2f} TB of {pool['free_mb'] / 1024 / 1024:>8.2f} TB free "
+                  f"-> {pool['used_rate']:.0f}% used")
+        for level, msg in self.findings:
+            print(f"{'✗' if level == ERROR else '⚠'} {msg}")
+        errors = sum(1 for level, _ in self.findings if level == ERROR)
+        warnings = len(self.findings) - errors
+        print(f"\n{'✓ Passed' if ok else '✗ Failed'}: {errors} error(s), {warnings} warning(s) "
+              f"in {elapsed:.2f}s")
+        print("="*80 + "\n")
+        return ok
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Generator Profiling
+PhaseTimer accumulates the generator's wall time per phase for --profile:
+- load:    reading the facts file (JSON parse, or the streaming pass)
+- extract: building the indexed fact model
+- digest:  hashing the inputs for incremental regeneration
+- build:   producing the playbook data and YAML text
+- write:   buffered file output (write, flush, rename)
+build and write are also kept per playbook.
+
+Task timing on the Ansible side is done by storage_timing_callback.py, which
+write_timing_plugin copies next to the generated playbooks for --task-timing.
+"""
+
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from storage_playbook_writer import PlaybookWriter
+
+TIMING_PLUGIN_SOURCE = Path(__file__).parent / 'storage_timing_callback.py'
+TIMING_PLUGIN = Path('callback_plugins') / 'storage_task_timing.py'
+
+
+class PhaseTimer:
+    """Accumulated wall time per named phase, in first-use order"""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        # phase -> detail (e.g. playbook file) -> seconds
+        self.details: Dict[str, Dict[str, float]] = {}
+
+    def add(self, phase: str, seconds: float, detail: Optional[str] = None):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        if detail:
+            details = self.details.setdefault(phase, {})
+            details[detail] = details.get(detail, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, phase: str, detail: Optional[str] = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start, detail)
+
+    def merge(self, seconds: Dict[str, float]):
+        """Add another run's phase totals (e.g. a batch worker's)"""
+        for phase, value in seconds.items():
+            self.add(phase, value)
+
+    def print_report(self, title: str = "Generator Profile"):
+        total = sum(self.seconds.values()) or 1.0
+        print("\n" + "="*80)
+        print(title)
+        print("="*80)
+        print(f"{'Phase':<10} {'Seconds':>9} {'Share':>7}")
+        for phase, seconds in self.seconds.items():
+            print(f"{phase:<10} {seconds:>9.3f} {seconds / total:>7.1%}")
+        print(f"{'total':<10} {sum(self.seconds.values()):>9.3f}")
+        files = list(dict.fromkeys(f for phase in ('build', 'write') for f in self.details.get(phase, {})))
+        if files:
+            print(f"\n{'Playbook':<52} {'Build s':>9} {'Write s':>9}")
+            for name in files:
+                print(f"{name:<52} {self.details.get('build', {}).get(name, 0.0):>9.3f} "
+                      f"{self.details.get('write', {}).get(name, 0.0):>9.3f}")
+        print("="*80 + "\n")
+
+
+def write_timing_plugin(output_dir: Path) -> Path:
+    """Copy the task timing callback plugin to output_dir/callback_plugins, where
+    ansible-playbook loads it for the playbooks in output_dir"""
+    path = Path(output_dir) / TIMING_PLUGIN
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with PlaybookWriter(path) as writer:
+        writer.write(TIMING_PLUGIN_SOURCE.read_text())
+    return path
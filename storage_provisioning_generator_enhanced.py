@@ -7,603 +7,950 @@ Reads all_storage_facts.json and generates Ansible playbooks for:
 - Provisioning LDEVs to appropriate hostgroups based on mappings
 """
 
+import argparse
 import json
 import os
+import textwrap
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from storage_cache import PlaybookManifest, digest_records, digest_values, file_digest
+from storage_checkpoint import journaled
+from storage_chunks import CHUNK_MODES, chunk_filename, import_plays, iter_chunks
+from storage_external import EXTERNAL_PLAYBOOK, EXTERNAL_SECTIONS, ExternalStorageGenerator
+from storage_facts_model import StorageFactsModel
+from storage_facts_stream import stream_records
+from storage_ldev_policies import POLICY_PLAYBOOK, LdevPolicyGenerator
+from storage_playbook import (add_host_task, add_wwns_task, connection_vars, create_hostgroups_task,
+                              create_ldevs_task, debug_task, play, present_ldevs_task, set_fact_task)
+from storage_playbook_writer import PlaybookWriter
+from storage_preflight import PreflightValidator
+from storage_profile import PhaseTimer, write_timing_plugin
+from storage_replication import REPLICATION_PLAYBOOK, REPLICATION_SECTIONS, ReplicationRestoreGenerator
+from storage_resource_groups import RESOURCE_GROUP_PLAYBOOK, RESOURCE_GROUP_SECTIONS, ResourceGroupGenerator
+from storage_scheduler import PIPELINED_PLAYBOOK, ProvisioningScheduler
+from storage_snapshots import SNAPSHOT_PLAYBOOK, SNAPSHOT_SECTIONS, SnapshotRestoreGenerator
+from storage_yaml import YAML_BACKENDS, Stream, make_emitter
+
+DEFAULT_VAULT_FILE = '../ansible_vault_vars/ansible_vault_storage_var.yml'
+
+# Max LDEVs per hv_hg present_ldev call
+DEFAULT_LUN_BATCH_SIZE = 100
+
+PARALLEL_PLAYBOOK = '07_parallel_provisioning_workflow.yml'
+
+def batch_mappings(tasks: Iterable[Dict[str, Any]], max_batch: int) -> List[Dict[str, Any]]:
+    """Group per-LDEV provisioning tasks by (port, hostgroup) into batches of at
+    most max_batch LDEV ids, in first-seen order, so each batch is one hv_hg call"""
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for task in tasks:
+        groups.setdefault((task['hg_port'], task['hg_name']), []).append(task['ldev_id'])
+    batches = []
+    for (hg_port, hg_name), ldev_ids in groups.items():
+        for start in range(0, len(ldev_ids), max_batch):
+            batches.append({
+                'hg_name': hg_name,
+                'hg_port': hg_port,
+                'ldev_ids': ldev_ids[start:start + max_batch]
+            })
+    return batches
+
+def vars_file_for(vault_file: str, output_dir: str, serial: Optional[str] = None) -> str:
+    """vars_files entry for a vault file given relative to the working directory,
+    expanding '{serial}', as seen from playbooks written to output_dir"""
+    if serial:
+        vault_file = vault_file.replace('{serial}', serial)
+    return os.path.relpath(vault_file, output_dir)
 
 class StorageProvisioningGenerator:
-    def __init__(self, json_file: str):
+    def __init__(self, json_file: str, data: Optional[Dict[str, Any]] = None, streaming: bool = False,
+                 vault_file: str = DEFAULT_VAULT_FILE, verbose: bool = True, deterministic: bool = False,
+                 lun_batch_size: int = DEFAULT_LUN_BATCH_SIZE, parallel: int = 0, schedule: bool = False,
+                 snapshots: bool = False, external: bool = False, yaml_backend: str = 'builtin',
+                 chunk_size: int = 0, chunk_by: str = 'count', checkpoint_file: Optional[str] = None,
+                 task_timing: bool = False, replication: bool = False, resource_groups: bool = False,
+                 ldev_policies: bool = False):
         self.json_file = json_file
-        self.data = None
+        self.data = data
+        self.streaming = streaming
+        # vars_files entry, relative to the directory the playbooks are written to
+        self.vault_file = vault_file
+        self.verbose = verbose
+        # Deterministic output replaces the wall-clock 'Generated:' stamp
+        self.deterministic = deterministic
+        self.lun_batch_size = max(1, lun_batch_size)
+        # Max concurrent storage API operations in the sharded playbook; 0 disables it
+        self.parallel = max(0, parallel)
+        # Also write the dependency-scheduled (pipelined) workflow
+        self.schedule = schedule
+        # Also write the snapshot / ShadowImage restore playbook
+        self.snapshots = snapshots
+        # Also write the external storage (path group / parity group / volume) playbook
+        self.external = external
+        # Also write the journal / remote connection / quorum / replication pair playbook
+        self.replication = replication
+        # Also write the resource group aware (per resource group, concurrent) restore playbook
+        self.resource_groups = resource_groups
+        # Also write the QoS / tiering policy playbook, one entry per LDEV with non-default settings
+        self.ldev_policies = ldev_policies
+        # Serializer for the playbook data ('builtin' or 'pyyaml')
+        self.emitter = make_emitter(yaml_backend)
+        # Max items per chunk file of 03/04/05, cut by count or by pool / port; 0 disables chunking
+        self.chunk_size = max(0, chunk_size)
+        self.chunk_by = chunk_by
+        # Checkpoint journal 03/04/05/00 append completed items to, relative to the
+        # directory the playbooks are written to; None disables journaling
+        self.checkpoint_file = checkpoint_file
+        # Also write the task timing callback plugin next to the playbooks
+        self.task_timing = task_timing
+        # Wall time per generator phase, reported by --profile
+        self.timer = PhaseTimer()
         self.ldevs = []
         self.hostgroups = []
         self.ldev_hg_mappings = {}
-        self.load_facts()
+        self._model = None
+        # Records of optional sections, cached after one streaming pass
+        self._streamed_sections: Dict[str, List[Dict[str, Any]]] = {}
+        if self.data is None:
+            self.load_facts()
     
     def load_facts(self):
         """Load storage facts from JSON file"""
         try:
-            with open(self.json_file, 'r') as f:
-                self.data = json.load(f)
-            print(f"✓ Loaded storage facts from {self.json_file}")
+            if self.streaming:
+                # Only the sections the generators need are read; self.data stays unset
+                with self.timer.phase('load'):
+                    model = StorageFactsModel.from_stream(self.json_file)
+                self._set_model(model)
+                self._log(f"✓ Streamed storage facts from {self.json_file}")
+            else:
+                with self.timer.phase('load'), open(self.json_file, 'r') as f:
+                    data = json.load(f)
+                with self.timer.phase('extract'):
+                    self._set_model(StorageFactsModel.from_facts(data))
+                # The compact LDEV store holds what the generators read; free the volume dicts
+                data.get('ldevs', {}).get('ansible_facts', {}).pop('volumes', None)
+                self.data = data
+                self._log(f"✓ Loaded storage facts from {self.json_file}")
         except Exception as e:
             print(f"✗ Error loading JSON: {e}")
             exit(1)
     
+    def _log(self, msg: str):
+        if self.verbose:
+            print(msg)
+    
+    def _generated_stamp(self) -> str:
+        """Header timestamp; reproducible when deterministic (honours SOURCE_DATE_EPOCH)"""
+        if not self.deterministic:
+            return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        epoch = os.environ.get('SOURCE_DATE_EPOCH')
+        if epoch:
+            return datetime.fromtimestamp(int(epoch), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        return 'deterministic build'
+    
+    def _set_model(self, model: StorageFactsModel):
+        self._model = model
+        self.ldevs = model.ldevs
+        self.hostgroups = model.hostgroups
+        self.ldev_hg_mappings = model.ldev_hg_mappings
+    
+    @property
+    def model(self) -> StorageFactsModel:
+        """Indexed fact model, built once and shared by all generators"""
+        if self._model is None:
+            with self.timer.phase('extract'):
+                self._set_model(StorageFactsModel.from_facts(self.data))
+        return self._model
+    
+    def _optional_sections(self) -> Dict[str, str]:
+        """Fact sections read by the optional playbooks that are enabled"""
+        sections = {}
+        if self.snapshots:
+            sections.update(SNAPSHOT_SECTIONS)
+        if self.external:
+            sections.update(EXTERNAL_SECTIONS)
+        if self.replication:
+            sections.update(REPLICATION_SECTIONS)
+        if self.resource_groups:
+            sections.update(RESOURCE_GROUP_SECTIONS)
+        return sections
+    
+    def iter_fact_records(self, sections: Dict[str, str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (section, record) for fact sections the model does not index,
+        from the loaded document or, when streaming, from one pass over the file
+        that also reads every other enabled optional section"""
+        if self.data is None:
+            missing = {s: k for s, k in sections.items() if s not in self._streamed_sections}
+            if missing:
+                wanted = dict(self._optional_sections(), **missing)
+                wanted = {s: k for s, k in wanted.items() if s not in self._streamed_sections}
+                for section in wanted:
+                    self._streamed_sections[section] = []
+                for section, record in stream_records(self.json_file, sections=wanted):
+                    self._streamed_sections[section].append(record)
+            for section in sections:
+                for record in self._streamed_sections[section]:
+                    yield section, record
+            return
+        for section, key in sections.items():
+            for record in (self.data.get(section) or {}).get('ansible_facts', {}).get(key) or []:
+                yield section, record
+    
     def extract_ldevs(self) -> List[Dict[str, Any]]:
         """Extract all LDEVs from storage facts"""
-        if 'ldevs' not in self.data:
-            return []
-        
-        ldevs_data = self.data['ldevs'].get('ansible_facts', {}).get('volumes', [])
-        
-        # Process LDEVs and build mapping
-        for ldev in ldevs_data:
-            ldev_id = ldev.get('ldev_id')
-            if ldev.get('hostgroups'):
-                self.ldev_hg_mappings[ldev_id] = ldev['hostgroups']
-        
-        self.ldevs = ldevs_data
-        return ldevs_data
+        return self.model.ldevs
     
     def extract_hostgroups(self) -> List[Dict[str, Any]]:
         """Extract all Hostgroups from storage facts"""
-        if 'host_groups' not in self.data:
-            return []
-        
-        hgs_data = self.data['host_groups'].get('ansible_facts', {}).get('hostGroups', [])
-        self.hostgroups = hgs_data
-        return hgs_data
+        return self.model.hostgroups
     
-    def generate_ldev_playbook(self) -> str:
-        """Generate playbook to create all LDEVs that are associated with hostgroups"""
-        ldevs = self.extract_ldevs()
-        
-        # Build LDEV config list - only include LDEVs with hostgroup associations
-        ldev_configs = []
-        for ldev in ldevs:
-            ldev_id = ldev.get('ldev_id')
-            # Only include LDEV if it has associated hostgroups
-            if ldev.get('hostgroups'):
-                ldev_configs.append({
-                    'ldev_id': ldev_id,
-                    'name': ldev.get('name'),
-                    'size': ldev.get('total_capacity'),
-                    'pool_id': ldev.get('pool_id'),
-                    'emulation_type': ldev.get('emulation_type'),
-                    'capacity_saving': ldev.get('deduplication_compression_mode', 'compression_deduplication'),
-                    'data_reduction_share': ldev.get('is_data_reduction_share_enabled', True)
-                })
-        
-        playbook = f"""---
-####################################################################
-# Auto-Generated LDEV Creation Playbook - All LDEVs
-# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-# Total LDEVs: {len(ldev_configs)}
-####################################################################
-- name: Create All Logical Devices (LDEVs)
-  hosts: localhost
-  gather_facts: false
-
-  vars_files:
-    - ../ansible_vault_vars/ansible_vault_storage_var.yml
+    # Volume fields _ldev_config reads
+    LDEV_CONFIG_FIELDS = ('ldev_id', 'name', 'total_capacity', 'pool_id', 'emulation_type',
+                          'deduplication_compression_mode', 'is_data_reduction_share_enabled')
+    
+    @staticmethod
+    def _ldev_config(ldev: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'ldev_id': ldev.get('ldev_id'),
+            'name': ldev.get('name'),
+            'size': ldev.get('total_capacity'),
+            'pool_id': ldev.get('pool_id'),
+            'emulation_type': ldev.get('emulation_type'),
+            'capacity_saving': ldev.get('deduplication_compression_mode', 'compression_deduplication'),
+            'data_reduction_share': ldev.get('is_data_reduction_share_enabled', True)
+        }
+    
+    @staticmethod
+    def _hostgroup_config(hg: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'hg_id': hg.get('host_group_id'),
+            'name': hg.get('host_group_name'),
+            'port': hg.get('port_id'),
+            'host_mode': hg.get('host_mode'),
+            'host_mode_options': hg.get('host_mode_options', []),
+            'wwns': hg.get('wwns', [])
+        }
+    
+    def _provisioning_task(self, ldev_id: int, hg_port: str, hg_name: str) -> Dict[str, Any]:
+        return {
+            'ldev_id': ldev_id,
+            'ldev_name': self.model.ldev_name(ldev_id),
+            'hg_name': hg_name,
+            'hg_port': hg_port
+        }
+    
+    # The _iter_*/_count_* pairs below define what the playbooks contain;
+    # subclasses (e.g. the delta generator) override them to select a subset.
+    
+    def _iter_ldev_configs(self) -> Iterator[Dict[str, Any]]:
+        """Yield LDEV configs - only LDEVs with hostgroup associations"""
+        for ldev in self.model.mapped_ldevs(self.LDEV_CONFIG_FIELDS):
+            yield self._ldev_config(ldev)
+    
+    def _count_ldev_configs(self) -> int:
+        return self.model.count_mapped_ldevs()
+    
+    def _iter_hostgroup_configs(self) -> Iterator[Dict[str, Any]]:
+        """Yield hostgroup configs"""
+        for hg in self.model.hostgroups:
+            yield self._hostgroup_config(hg)
+    
+    def _count_hostgroup_configs(self) -> int:
+        return len(self.model.hostgroups)
+    
+    def _iter_provisioning_tasks(self) -> Iterator[Dict[str, Any]]:
+        """Yield provisioning tasks based on actual LDEV-HG mappings"""
+        for ldev_id, hg_port, hg_name in self.model.iter_mappings():
+            yield self._provisioning_task(ldev_id, hg_port, hg_name)
+    
+    def _count_provisioning_tasks(self) -> int:
+        return self.model.count_mappings()
+    
+    @staticmethod
+    def _batch_item(batch: Dict[str, Any]) -> Dict[str, Any]:
+        return {'hostgroup_name': batch['hg_name'], 'port': batch['hg_port'], 'ldev_ids': batch['ldev_ids']}
+    
+    @staticmethod
+    def _ldev_summary_item(ldev: Dict[str, Any]) -> Dict[str, Any]:
+        """The LDEV fields the combined workflow reads"""
+        return {key: ldev[key] for key in ('ldev_id', 'name', 'size', 'pool_id')}
+    
+    @staticmethod
+    def _hostgroup_summary_item(hg: Dict[str, Any]) -> Dict[str, Any]:
+        """The hostgroup fields the combined workflow reads"""
+        item = {key: hg[key] for key in ('hg_id', 'name', 'port', 'host_mode')}
+        if hg.get('create') is False:
+            # Hostgroup already exists; only its WWNs are added
+            item['create'] = False
+        return item
+    
+    def _provisioning_batches(self) -> List[Dict[str, Any]]:
+        """Provisioning tasks grouped into one hv_hg call per hostgroup batch"""
+        return batch_mappings(self._iter_provisioning_tasks(), self.lun_batch_size)
+    
+    def _document(self, title: str, plays: List[Dict[str, Any]], *notes: str) -> Iterator[str]:
+        """Yield, in chunks, a playbook: header comment, then the plays"""
+        header = [f"Auto-Generated {title}", f"Generated: {self._generated_stamp()}", *notes]
+        return self.emitter.iter_document(plays, header)
+    
+    def _journal_vars(self) -> Dict[str, str]:
+        """Play vars for the checkpoint journal (overridable with -e checkpoint_file=...)"""
+        if not self.checkpoint_file:
+            return {}
+        return {'checkpoint_file': f"{{{{ playbook_dir }}}}/{self.checkpoint_file}"}
+    
+    def _journaled(self, name: str, tasks: List[Dict[str, Any]], records: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """tasks, wrapped to journal records when a checkpoint file is set"""
+        return journaled(name, tasks, records) if self.checkpoint_file else tasks
+    
+    @staticmethod
+    def _part_name(name: str, part: str) -> str:
+        return f"{name} ({part})" if part else name
+    
+    @staticmethod
+    def _part_notes(part: str) -> List[str]:
+        return [f"Chunk: {part}; run the index playbook of the same name to run all chunks"] if part else []
+    
+    def iter_ldev_playbook(self, ldevs: Optional[List[Dict[str, Any]]] = None, part: str = '') -> Iterator[str]:
+        """Yield, in chunks, the playbook to create all LDEVs that are associated with hostgroups
+        (or only ldevs, as chunk part of a chunked playbook)"""
+        num_ldevs = self._count_ldev_configs() if ldevs is None else len(ldevs)
+        tasks = [
+            create_ldevs_task('Create All LDEVs from storage facts', '{{ ldev_config }}',
+                              register='ldev_result', tags=['ldev', 'always']),
+            debug_task('Debug LDEV creation results',
+                       'Created LDEV {{ item.result.volume.ldev_id }} - {{ item.result.volume.name }}',
+                       loop='{{ ldev_result.results }}', label='{{ item.item.name }}', when='item is succeeded'),
+            set_fact_task('Collect created LDEV IDs', {
+                'created_ldev_ids': "{{ ldev_result.results | map(attribute='result.volume.ldev_id') | list }}"},
+                when='ldev_result is succeeded'),
+        ]
+        tasks = self._journaled('Create LDEVs and journal completed ones', tasks, [('ldev', 'ldev_result')])
+        post_tasks = [debug_task('Display created LDEVs information', textwrap.dedent("""\
+            ✓ LDEVs Created Successfully!
+            Total LDEVs Created: {{ ldev_config | length }}
+            Created LDEV IDs: {{ created_ldev_ids | default([]) }}
+            """))]
+        return self._document('LDEV Creation Playbook - All LDEVs', [play(
+            self._part_name('Create All Logical Devices (LDEVs)', part), vars_files=[self.vault_file],
+            vars=connection_vars(**self._journal_vars(),
+                                 ldev_config=Stream(self._iter_ldev_configs() if ldevs is None else ldevs)),
+            tasks=tasks, post_tasks=post_tasks)], f"Total LDEVs: {num_ldevs}", *self._part_notes(part))
+    
+    def iter_hostgroup_playbook(self, hostgroups: Optional[List[Dict[str, Any]]] = None,
+                                part: str = '') -> Iterator[str]:
+        """Yield, in chunks, the playbook to create all Hostgroups (or only hostgroups, as chunk part)"""
+        num_hostgroups = self._count_hostgroup_configs() if hostgroups is None else len(hostgroups)
+        tasks = [
+            create_hostgroups_task('Create All Hostgroups from storage facts', '{{ hostgroup_config }}',
+                                   register='hostgroup_result', tags=['hostgroup', 'always']),
+            debug_task('Debug hostgroup creation results',
+                       'Created Hostgroup {{ item.item.hg_id }} - {{ item.item.name }} on {{ item.item.port }}',
+                       loop='{{ hostgroup_result.results }}', label='{{ item.item.name }}', when='item is succeeded'),
+            add_wwns_task('Add WWNs to Hostgroups', '{{ hostgroup_config }}',
+                          register='wwn_result' if self.checkpoint_file else None, tags=['hostgroup', 'wwn']),
+            set_fact_task('Collect created hostgroup information', {
+                'created_hostgroups': "{{ hostgroup_result.results | map(attribute='item') | list }}"},
+                when='hostgroup_result is succeeded'),
+        ]
+        tasks = self._journaled('Create Hostgroups and journal completed ones', tasks,
+                                [('hostgroup', 'hostgroup_result'), ('wwns', 'wwn_result')])
+        post_tasks = [debug_task('Display created hostgroups information', textwrap.dedent("""\
+            ✓ Hostgroups Created Successfully!
+            Total Hostgroups Created: {{ hostgroup_config | length }}
+            """))]
+        return self._document('Hostgroup Creation Playbook - All Hostgroups', [play(
+            self._part_name('Create All Hostgroups', part), vars_files=[self.vault_file],
+            vars=connection_vars(**self._journal_vars(), hostgroup_config=Stream(
+                self._iter_hostgroup_configs() if hostgroups is None else hostgroups)),
+            tasks=tasks, post_tasks=post_tasks)], f"Total Hostgroups: {num_hostgroups}", *self._part_notes(part))
+    
+    def iter_provision_playbook(self, batches: Optional[List[Dict[str, Any]]] = None,
+                                part: str = '') -> Iterator[str]:
+        """Yield, in chunks, the playbook to provision LDEVs to hostgroups based on actual mappings
+        (or only batches, as chunk part)"""
+        if batches is None:
+            num_mappings = self._count_provisioning_tasks()
+            batches = self._provisioning_batches()
+        else:
+            num_mappings = sum(len(batch['ldev_ids']) for batch in batches)
+        tasks = [
+            present_ldevs_task('Provision LDEVs to Hostgroups', '{{ provisioning_mappings }}',
+                               register='provision_result', tags=['provision', 'always']),
+            debug_task('Debug provisioning results',
+                       "Provisioned LDEVs {{ item.item.ldev_ids | join(', ') }} to {{ item.item.hostgroup_name }}",
+                       loop='{{ provision_result.results }}',
+                       label='{{ item.item.hostgroup_name }} on {{ item.item.port }}', when='item is succeeded'),
+        ]
+        tasks = self._journaled('Provision LDEVs and journal completed mappings', tasks,
+                                [('mapping', 'provision_result')])
+        post_tasks = [debug_task('Display provisioning summary', textwrap.dedent("""\
+            ✓ LDEVs Provisioned Successfully!
+            Total Mappings: {{ provisioning_mappings | map(attribute='ldev_ids') | map('length') | sum }}
+            API Calls: {{ provisioning_mappings | length }}
+            Successful: {{ provision_result.results | selectattr('is_succeeded') | length }}
+            Failed: {{ provision_result.results | selectattr('failed', 'true') | length }}
+            """))]
+        # One provisioning_mappings entry (and one API call) per hostgroup batch
+        return self._document('LDEV Provisioning to Hostgroups Playbook', [play(
+            self._part_name('Provision All LDEVs to Hostgroups', part), vars_files=[self.vault_file],
+            vars=connection_vars(**self._journal_vars(),
+                                 provisioning_mappings=Stream(map(self._batch_item, batches))),
+            tasks=tasks, post_tasks=post_tasks)],
+            f"Total LDEV-HG Mappings: {num_mappings}",
+            f"Batched hv_hg calls: {len(batches)} (max {self.lun_batch_size} LDEVs per call)",
+            *self._part_notes(part))
+    
+    def iter_combined_workflow(self) -> Iterator[str]:
+        """Yield, in chunks, the combined playbook with all three tasks - only includes LDEVs with hostgroup associations"""
+        num_ldevs = self._count_ldev_configs()
+        num_hostgroups = self._count_hostgroup_configs()
+        num_mappings = self._count_provisioning_tasks()
+        batches = self._provisioning_batches()
+        tasks, post_tasks = self._combined_tasks()
+        tasks = self._journaled('Provision storage and journal completed items', tasks, [
+            ('ldev', 'ldev_result'), ('hostgroup', 'hostgroup_result'), ('mapping', 'provision_result')])
+        return self._document('Complete Provisioning Workflow', [play(
+            'Complete Storage Provisioning Workflow', vars_files=[self.vault_file],
+            vars=connection_vars(**self._journal_vars(), **self._combined_vars(batches)),
+            tasks=tasks, post_tasks=post_tasks)],
+            f"LDEVs: {num_ldevs}, Hostgroups: {num_hostgroups}, Mappings: {num_mappings} in {len(batches)} hv_hg calls")
+    
+    def _combined_vars(self, batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """The combined workflow's data: ldev_config, hostgroup_config and
+        provisioning_mappings (batched per hostgroup), streamed"""
+        return {
+            'ldev_config': Stream(map(self._ldev_summary_item, self._iter_ldev_configs())),
+            'hostgroup_config': Stream(map(self._hostgroup_summary_item, self._iter_hostgroup_configs())),
+            'provisioning_mappings': Stream(map(self._batch_item, batches)),
+        }
+    
+    @staticmethod
+    def _combined_tasks() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """The combined workflow's tasks and post_tasks; they read only play/host vars"""
+        tasks = [
+            create_ldevs_task('Create All LDEVs from storage facts', '{{ ldev_config }}', full=False,
+                              register='ldev_result', tags=['ldev', 'always']),
+            set_fact_task('Collect LDEV creation results', {
+                'created_ldevs': "{{ ldev_result.results | map(attribute='item') | list }}"},
+                when='ldev_result is succeeded'),
+            create_hostgroups_task('Create All Hostgroups from storage facts', '{{ hostgroup_config }}',
+                                   register='hostgroup_result', tags=['hostgroup', 'always']),
+            set_fact_task('Collect Hostgroup creation results', {
+                'created_hostgroups': "{{ hostgroup_result.results | map(attribute='item') | list }}"},
+                when='hostgroup_result is succeeded'),
+            present_ldevs_task('Provision LDEVs to Hostgroups', '{{ provisioning_mappings }}',
+                               register='provision_result', tags=['provision', 'always']),
+        ]
+        post_tasks = [debug_task('Display Provisioning Summary', textwrap.dedent("""\
+            ╔════════════════════════════════════════════════════════════╗
+            ║           STORAGE PROVISIONING WORKFLOW COMPLETE           ║
+            ╚════════════════════════════════════════════════════════════╝
 
-  vars:
-    connection_info:
-      address: "{{{{ storage_address }}}}"
-      username: "{{{{ vault_storage_username }}}}"
-      password: "{{{{ vault_storage_secret }}}}"
-    
-    # LDEV Configuration extracted from all_storage_facts.json
-    ldev_config:
-"""
-        
-        # Add each LDEV config
-        for ldev in ldev_configs:
-            playbook += f"""      - ldev_id: {ldev['ldev_id']}
-        name: "{ldev['name']}"
-        size: "{ldev['size']}"
-        pool_id: {ldev['pool_id']}
-        emulation_type: "{ldev['emulation_type']}"
-        capacity_saving: "{ldev['capacity_saving']}"
-        data_reduction_share: {str(ldev['data_reduction_share']).lower()}
-"""
-        
-        playbook += f"""
-  tasks:
-    ####################################################################
-    # Task: Create All LDEVs
-    ####################################################################
-    - name: Create All LDEVs from storage facts
-      hitachivantara.vspone_block.vsp.hv_ldev:
-        connection_info: "{{ connection_info }}"
-        state: present
-        spec:
-          pool_id: "{{ item.pool_id }}"
-          size: "{{ item.size }}"
-          name: "{{ item.name }}"
-          capacity_saving: "{{ item.capacity_saving }}"
-          data_reduction_share: "{{ item.data_reduction_share }}"
-      register: ldev_result
-      loop: "{{ ldev_config }}"
-      loop_control:
-        label: "LDEV {{ item.ldev_id }}: {{ item.name }}"
-      tags:
-        - ldev
-        - always
+            ✓ LDEVs Created: {{ ldev_config | length }}
+            ✓ Hostgroups Created: {{ hostgroup_config | length }}
+            ✓ LDEV-HG Mappings: {{ provisioning_mappings | map(attribute='ldev_ids') | map('length') | sum }}
 
-    - name: Debug LDEV creation results
-      ansible.builtin.debug:
-        msg: "Created LDEV {{ item.result.volume.ldev_id }} - {{ item.result.volume.name }}"
-      loop: "{{ ldev_result.results }}"
-      loop_control:
-        label: "{{ item.item.name }}"
-      when: item is succeeded
+            Execution Status:
+            - LDEV Creation: {{ ldev_result.results | rejectattr('failed') | length }} successful
+            - Hostgroup Creation: {{ hostgroup_result.results | rejectattr('failed') | length }} successful
+            - LDEV Provisioning: {{ provision_result.results | rejectattr('failed') | length }} successful
+            """))]
+        return tasks, post_tasks
+    
+    def _shard_plan(self) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]],
+                                   Dict[str, List[Dict[str, Any]]]]:
+        """Split work into independent shards: LDEVs round-robin over self.parallel
+        shards; hostgroups and LUN batches by port, which never depend on each other"""
+        ldev_shards: Dict[str, List[Dict[str, Any]]] = {}
+        for i, ldev in enumerate(self._iter_ldev_configs()):
+            ldev_shards.setdefault(f"ldev-shard-{i % self.parallel}", []).append(ldev)
+        hostgroups_by_port: Dict[str, List[Dict[str, Any]]] = {}
+        mappings_by_port: Dict[str, List[Dict[str, Any]]] = {}
+        for hg in self._iter_hostgroup_configs():
+            hostgroups_by_port.setdefault(f"port-{hg['port']}", []).append(hg)
+        for batch in self._provisioning_batches():
+            mappings_by_port.setdefault(f"port-{batch['hg_port']}", []).append(self._batch_item(batch))
+        return ldev_shards, hostgroups_by_port, mappings_by_port
+    
+    def iter_parallel_workflow(self) -> Iterator[str]:
+        """Yield, in chunks, the complete workflow split into shards that run
+        concurrently; serial caps each play at self.parallel shard hosts, each
+        making one storage API call at a time"""
+        ldev_shards, hostgroups_by_port, mappings_by_port = self._shard_plan()
+        port_shards = list(dict.fromkeys([*hostgroups_by_port, *mappings_by_port]))
+        num_batches = sum(len(b) for b in mappings_by_port.values())
 
-    - name: Collect created LDEV IDs
-      ansible.builtin.set_fact:
-        created_ldev_ids: "{{ ldev_result.results | map(attribute='result.volume.ldev_id') | list }}"
-      when: ldev_result is succeeded
+        def shard_loop(var: str) -> str:
+            return f"{{{{ {var}[inventory_hostname] | default([]) }}}}"
 
-  post_tasks:
-    - name: Display created LDEVs information
-      ansible.builtin.debug:
-        msg: |
-          ✓ LDEVs Created Successfully!
-          Total LDEVs Created: {{ ldev_config | length }}
-          Created LDEV IDs: {{ created_ldev_ids | default([]) }}
-"""
-        
-        return playbook
+        build = play('Build Provisioning Shards', vars={'ldev_shards': list(ldev_shards), 'port_shards': port_shards},
+                     tasks=[add_host_task('Add LDEV shard hosts', 'ldev_shards', '{{ ldev_shards }}'),
+                            add_host_task('Add port shard hosts', 'port_shards', '{{ port_shards }}')])
+        # Step 1: create LDEVs, one shard per host
+        ldevs = play('Create LDEVs (sharded)', hosts='ldev_shards', strategy='free', serial=self.parallel,
+                     vars_files=[self.vault_file], vars=connection_vars(ldevs_by_shard=ldev_shards),
+                     tasks=[create_ldevs_task('Create LDEVs in shard', shard_loop('ldevs_by_shard'), tags=['ldev'])])
+        # Step 2: hostgroups and LUNs, one port per host; each port proceeds independently
+        # serial: a shard host runs its tasks in sequence, so N hosts at once make at most N API calls
+        ports = play('Configure Hostgroups and LUNs (sharded by port)', hosts='port_shards', strategy='free',
+                     serial=self.parallel, vars_files=[self.vault_file],
+                     vars=connection_vars(hostgroups_by_port=hostgroups_by_port, mappings_by_port=mappings_by_port),
+                     tasks=[create_hostgroups_task('Create Hostgroups on port', shard_loop('hostgroups_by_port'),
+                                                   tags=['hostgroup']),
+                            add_wwns_task('Add WWNs to Hostgroups on port', shard_loop('hostgroups_by_port'),
+                                          tags=['hostgroup', 'wwn']),
+                            present_ldevs_task('Provision LDEVs to Hostgroups on port', shard_loop('mappings_by_port'),
+                                               tags=['provision'])])
+        return self._document('Parallel Provisioning Workflow', [build, ldevs, ports],
+            f"LDEVs: {self._count_ldev_configs()} in {len(ldev_shards)} shards, Hostgroups: {self._count_hostgroup_configs()}, "
+            f"LUN batches: {num_batches}, across {len(port_shards)} port shards",
+            f"Concurrency: {self.parallel} API operations (run ansible-playbook with -f {self.parallel} or more)",
+            f"Step 1 creates LDEVs, one shard per host; step 2 creates hostgroups and presents",
+            f"LUNs, one port per host; each play runs at most {self.parallel} shard hosts at once (serial),",
+            f"each making one API call at a time")
+    
+    def iter_pipelined_workflow(self) -> Iterator[str]:
+        """Yield, in chunks, the workflow scheduled as independent dependency pipelines"""
+        return ProvisioningScheduler(self).iter_playbook()
+    
+    def iter_snapshot_restore_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the snapshot / ShadowImage restore playbook"""
+        return SnapshotRestoreGenerator(self).iter_playbook()
+    
+    def iter_external_storage_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the external path group / parity group / volume playbook"""
+        return ExternalStorageGenerator(self).iter_playbook()
+    
+    def iter_replication_restore_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the journal / remote connection / quorum / replication pair playbook"""
+        return ReplicationRestoreGenerator(self).iter_playbook()
+    
+    def iter_resource_group_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the resource group aware restore playbook"""
+        return ResourceGroupGenerator(self).iter_playbook()
+    
+    def iter_ldev_policy_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the QoS / tiering policy playbook"""
+        return LdevPolicyGenerator(self).iter_playbook()
+    
+    def generate_ldev_playbook(self) -> str:
+        """Generate playbook to create all LDEVs that are associated with hostgroups"""
+        return ''.join(self.iter_ldev_playbook())
     
     def generate_hostgroup_playbook(self) -> str:
         """Generate playbook to create all Hostgroups"""
-        hostgroups = self.extract_hostgroups()
-        
-        # Build hostgroup config list
-        hg_configs = []
-        for hg in hostgroups:
-            hg_configs.append({
-                'hg_id': hg.get('host_group_id'),
-                'name': hg.get('host_group_name'),
-                'port': hg.get('port_id'),
-                'host_mode': hg.get('host_mode'),
-                'host_mode_options': hg.get('host_mode_options', []),
-                'wwns': hg.get('wwns', [])
-            })
-        
-        playbook = f"""---
-####################################################################
-# Auto-Generated Hostgroup Creation Playbook - All Hostgroups
-# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-# Total Hostgroups: {len(hg_configs)}
-####################################################################
-- name: Create All Hostgroups
-  hosts: localhost
-  gather_facts: false
-
-  vars_files:
-    - ../ansible_vault_vars/ansible_vault_storage_var.yml
-
-  vars:
-    connection_info:
-      address: "{{{{ storage_address }}}}"
-      username: "{{{{ vault_storage_username }}}}"
-      password: "{{{{ vault_storage_secret }}}}"
-    
-    # Hostgroup Configuration extracted from all_storage_facts.json
-    hostgroup_config:
-"""
-        
-        # Add each hostgroup config
-        for hg in hg_configs:
-            playbook += f"""      - hg_id: {hg['hg_id']}
-        name: "{hg['name']}"
-        port: "{hg['port']}"
-        host_mode: "{hg['host_mode']}"
-        host_mode_options: {hg['host_mode_options']}
-        wwns: {hg['wwns']}
-"""
-        
-        playbook += f"""
-  tasks:
-    ####################################################################
-    # Task: Create All Hostgroups
-    ####################################################################
-    - name: Create All Hostgroups from storage facts
-      hitachivantara.vspone_block.vsp.hv_hg:
-        connection_info: "{{ connection_info }}"
-        state: present
-        spec:
-          name: "{{ item.name }}"
-          port: "{{ item.port }}"
-          host_mode: "{{ item.host_mode }}"
-      register: hostgroup_result
-      loop: "{{ hostgroup_config }}"
-      loop_control:
-        label: "HG {{ item.hg_id }}: {{ item.name }} on {{ item.port }}"
-      tags:
-        - hostgroup
-        - always
-
-    - name: Debug hostgroup creation results
-      ansible.builtin.debug:
-        msg: "Created Hostgroup {{ item.item.hg_id }} - {{ item.item.name }} on {{ item.item.port }}"
-      loop: "{{ hostgroup_result.results }}"
-      loop_control:
-        label: "{{ item.item.name }}"
-      when: item is succeeded
-
-    ####################################################################
-    # Task: Add WWNs to Hostgroups (if any exist)
-    ####################################################################
-    - name: Add WWNs to Hostgroups
-      hitachivantara.vspone_block.vsp.hv_hg:
-        connection_info: "{{ connection_info }}"
-        state: present
-        spec:
-          state: add_wwn
-          name: "{{ item.name }}"
-          port: "{{ item.port }}"
-          wwns: "{{ item.wwns }}"
-      loop: "{{ hostgroup_config }}"
-      loop_control:
-        label: "{{ item.name }}"
-      when: 
-        - item.wwns | length > 0
-      tags:
-        - hostgroup
-        - wwn
-
-    - name: Collect created hostgroup information
-      ansible.builtin.set_fact:
-        created_hostgroups: "{{ hostgroup_result.results | map(attribute='item') | list }}"
-      when: hostgroup_result is succeeded
-
-  post_tasks:
-    - name: Display created hostgroups information
-      ansible.builtin.debug:
-        msg: |
-          ✓ Hostgroups Created Successfully!
-          Total Hostgroups Created: {{ hostgroup_config | length }}
-"""
-        
-        return playbook
+        return ''.join(self.iter_hostgroup_playbook())
     
     def generate_provision_playbook(self) -> str:
         """Generate playbook to provision LDEVs to hostgroups based on actual mappings"""
-        self.extract_ldevs()
-        self.extract_hostgroups()
-        
-        # Build provisioning tasks based on actual LDEV-HG mappings
-        provisioning_tasks = []
-        
-        for ldev_id, hg_list in self.ldev_hg_mappings.items():
-            # Find LDEV name
-            ldev_name = next((l['name'] for l in self.ldevs if l['ldev_id'] == ldev_id), f"LDEV-{ldev_id}")
-            
-            for hg_mapping in hg_list:
-                hg_name = hg_mapping.get('name')
-                hg_port = hg_mapping.get('port_id')
-                
-                provisioning_tasks.append({
-                    'ldev_id': ldev_id,
-                    'ldev_name': ldev_name,
-                    'hg_name': hg_name,
-                    'hg_port': hg_port
-                })
-        
-        playbook = f"""---
-####################################################################
-# Auto-Generated LDEV Provisioning to Hostgroups Playbook
-# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-# Total LDEV-HG Mappings: {len(provisioning_tasks)}
-####################################################################
-- name: Provision All LDEVs to Hostgroups
-  hosts: localhost
-  gather_facts: false
-
-  vars_files:
-    - ../ansible_vault_vars/ansible_vault_storage_var.yml
-
-  vars:
-    connection_info:
-      address: "{{{{ storage_address }}}}"
-      username: "{{{{ vault_storage_username }}}}"
-      password: "{{{{ vault_storage_secret }}}}"
-    
-    # LDEV to Hostgroup Provisioning Mappings from all_storage_facts.json
-    provisioning_mappings:
-"""
-        
-        # Add each provisioning mapping
-        for task in provisioning_tasks:
-            playbook += f"""      - ldev_id: {task['ldev_id']}
-        ldev_name: "{task['ldev_name']}"
-        hostgroup_name: "{task['hg_name']}"
-        port: "{task['hg_port']}"
-"""
-        
-        playbook += f"""
-  tasks:
-    ####################################################################
-    # Task: Provision LDEVs to Hostgroups
-    ####################################################################
-    - name: Provision LDEVs to Hostgroups
-      hitachivantara.vspone_block.vsp.hv_hg:
-        connection_info: "{{ connection_info }}"
-        state: present
-        spec:
-          state: present_ldev
-          name: "{{ item.hostgroup_name }}"
-          port: "{{ item.port }}"
-          ldevs: ["{{ item.ldev_id }}"]
-      register: provision_result
-      loop: "{{ provisioning_mappings }}"
-      loop_control:
-        label: "LDEV {{ item.ldev_id }} ({{ item.ldev_name }}) -> {{ item.hostgroup_name }} on {{ item.port }}"
-      tags:
-        - provision
-        - always
-
-    - name: Debug provisioning results
-      ansible.builtin.debug:
-        msg: "Provisioned LDEV {{ item.item.ldev_id }} to {{ item.item.hostgroup_name }}"
-      loop: "{{ provision_result.results }}"
-      loop_control:
-        label: "{{ item.item.ldev_name }} -> {{ item.item.hostgroup_name }}"
-      when: item is succeeded
-
-  post_tasks:
-    - name: Display provisioning summary
-      ansible.builtin.debug:
-        msg: |
-          ✓ LDEVs Provisioned Successfully!
-          Total Mappings: {{ provisioning_mappings | length }}
-          Successful: {{ provision_result.results | selectattr('is_succeeded') | length }}
-          Failed: {{ provision_result.results | selectattr('failed', 'true') | length }}
-"""
-        
-        return playbook
+        return ''.join(self.iter_provision_playbook())
     
     def generate_combined_workflow(self) -> str:
-        """Generate combined playbook with all three tasks - only includes LDEVs with hostgroup associations"""
-        self.extract_ldevs()
-        self.extract_hostgroups()
-        
-        # Build LDEV config - only include LDEVs with hostgroup associations
-        ldev_configs = []
-        for ldev in self.ldevs:
-            ldev_id = ldev.get('ldev_id')
-            # Only include LDEV if it has associated hostgroups
-            if ldev.get('hostgroups'):
-                ldev_configs.append({
-                    'ldev_id': ldev_id,
-                    'name': ldev.get('name'),
-                    'size': ldev.get('total_capacity'),
-                    'pool_id': ldev.get('pool_id'),
-                    'capacity_saving': ldev.get('deduplication_compression_mode', 'compression_deduplication'),
-                    'data_reduction_share': ldev.get('is_data_reduction_share_enabled', True)
-                })
-        
-        # Build hostgroup config
-        hg_configs = []
-        for hg in self.hostgroups:
-            hg_configs.append({
-                'hg_id': hg.get('host_group_id'),
-                'name': hg.get('host_group_name'),
-                'port': hg.get('port_id'),
-                'host_mode': hg.get('host_mode'),
-                'host_mode_options': hg.get('host_mode_options', []),
-                'wwns': hg.get('wwns', [])
-            })
-        
-        # Build provisioning mappings
-        provisioning_tasks = []
-        for ldev_id, hg_list in self.ldev_hg_mappings.items():
-            ldev_name = next((l['name'] for l in self.ldevs if l['ldev_id'] == ldev_id), f"LDEV-{ldev_id}")
-            for hg_mapping in hg_list:
-                provisioning_tasks.append({
-                    'ldev_id': ldev_id,
-                    'ldev_name': ldev_name,
-                    'hg_name': hg_mapping.get('name'),
-                    'hg_port': hg_mapping.get('port_id')
-                })
-        
-        playbook = f"""---
-####################################################################
-# Auto-Generated Complete Provisioning Workflow
-# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-# LDEVs: {len(ldev_configs)}, Hostgroups: {len(hg_configs)}, Mappings: {len(provisioning_tasks)}
-####################################################################
-- name: Complete Storage Provisioning Workflow
-  hosts: localhost
-  gather_facts: false
-
-  vars_files:
-    - ../ansible_vault_vars/ansible_vault_storage_var.yml
-
-  vars:
-    connection_info:
-      address: "{{{{ storage_address }}}}"
-      username: "{{{{ vault_storage_username }}}}"
-      password: "{{{{ vault_storage_secret }}}}"
-    
-    # All LDEVs from all_storage_facts.json
-    ldev_config:
-"""
-        
-        # Add LDEV configs
-        for ldev in ldev_configs:  # Include all LDEVs
-            playbook += f"""      - ldev_id: {ldev['ldev_id']}
-        name: "{ldev['name']}"
-        size: "{ldev['size']}"
-        pool_id: {ldev['pool_id']}
-"""
-        
-        
-        playbook += f"""
-    # All Hostgroups from all_storage_facts.json
-    hostgroup_config:
-"""
-        
-        # Add hostgroup configs
-        for hg in hg_configs:  # Include all hostgroups
-            playbook += f"""      - hg_id: {hg['hg_id']}
-        name: "{hg['name']}"
-        port: "{hg['port']}"
-        host_mode: "{hg['host_mode']}"
-"""
-        
-        
-        playbook += f"""
-    # LDEV-Hostgroup Provisioning Mappings
-    provisioning_mappings:
-"""
-        
-        # Add provisioning mappings
-        for task in provisioning_tasks:  # Include all mappings
-            playbook += f"""      - ldev_id: {task['ldev_id']}
-        ldev_name: "{task['ldev_name']}"
-        hostgroup_name: "{task['hg_name']}"
-        port: "{task['hg_port']}"
-"""
-        
-        
-        playbook += f"""
-
-  tasks:
-    ####################################################################
-    # Step 1: Create All LDEVs
-    ####################################################################
-    - name: Create All LDEVs from storage facts
-      hitachivantara.vspone_block.vsp.hv_ldev:
-        connection_info: "{{{{ connection_info }}}}"
-        state: present
-        spec:
-          pool_id: "{{{{ item.pool_id }}}}"
-          size: "{{{{ item.size }}}}"
-          name: "{{{{ item.name }}}}"
-      register: ldev_result
-      loop: "{{{{ ldev_config }}}}"
-      loop_control:
-        label: "LDEV {{{{ item.ldev_id }}}}: {{{{ item.name }}}}"
-      tags:
-        - ldev
-        - always
-
-    - name: Collect LDEV creation results
-      ansible.builtin.set_fact:
-        created_ldevs: "{{{{ ldev_result.results | map(attribute='item') | list }}}}"
-      when: ldev_result is succeeded
-
-    ####################################################################
-    # Step 2: Create All Hostgroups
-    ####################################################################
-    - name: Create All Hostgroups from storage facts
-      hitachivantara.vspone_block.vsp.hv_hg:
-        connection_info: "{{{{ connection_info }}}}"
-        state: present
-        spec:
-          name: "{{{{ item.name }}}}"
-          port: "{{{{ item.port }}}}"
-          host_mode: "{{{{ item.host_mode }}}}"
-      register: hostgroup_result
-      loop: "{{{{ hostgroup_config }}}}"
-      loop_control:
-        label: "HG {{{{ item.hg_id }}}}: {{{{ item.name }}}} on {{{{ item.port }}}}"
-      tags:
-        - hostgroup
-        - always
-
-    - name: Collect Hostgroup creation results
-      ansible.builtin.set_fact:
-        created_hostgroups: "{{{{ hostgroup_result.results | map(attribute='item') | list }}}}"
-      when: hostgroup_result is succeeded
-
-    ####################################################################
-    # Step 3: Provision LDEVs to Hostgroups
-    ####################################################################
-    - name: Provision LDEVs to Hostgroups
-      hitachivantara.vspone_block.vsp.hv_hg:
-        connection_info: "{{{{ connection_info }}}}"
-        state: present
-        spec:
-          state: present_ldev
-          name: "{{{{ item.hostgroup_name }}}}"
-          port: "{{{{ item.port }}}}"
-          ldevs: ["{{{{ item.ldev_id }}}}"]
-      register: provision_result
-      loop: "{{{{ provisioning_mappings }}}}"
-      loop_control:
-        label: "LDEV {{{{ item.ldev_id }}}} -> {{{{ item.hostgroup_name }}}}"
-      tags:
-        - provision
-        - always
-
-  post_tasks:
-    - name: Display Provisioning Summary
-      ansible.builtin.debug:
-        msg: |
-          ╔════════════════════════════════════════════════════════════╗
-          ║           STORAGE PROVISIONING WORKFLOW COMPLETE           ║
-          ╚════════════════════════════════════════════════════════════╝
-          
-          ✓ LDEVs Created: {{{{ ldev_config | length }}}}
-          ✓ Hostgroups Created: {{{{ hostgroup_config | length }}}}
-          ✓ LDEV-HG Mappings: {{{{ provisioning_mappings | length }}}}
-          
-          Execution Status:
-          - LDEV Creation: {{{{ ldev_result.results | rejectattr('failed') | length }}}} successful
-          - Hostgroup Creation: {{{{ hostgroup_result.results | rejectattr('failed') | length }}}} successful
-          - LDEV Provisioning: {{{{ provision_result.results | rejectattr('failed') | length }}}} successful
-"""
-        
-        return playbook
+        """Generate combined playbook with all three tasks"""
+        return ''.join(self.iter_combined_workflow())
     
-    def generate_all(self):
-        """Generate all playbooks"""
-        output_dir = Path('generated_playbooks')
-        output_dir.mkdir(exist_ok=True)
+    def _input_digests(self) -> Dict[str, str]:
+        """Content hashes of the fact sections and of each playbook's inputs"""
+        model = self.model
+        # Templates live in the storage_* modules, so any change to them invalidates every playbook
+        templates = sorted(Path(__file__).parent.glob('storage_*.py'))
+        options = digest_values(*map(file_digest, templates), self.vault_file, str(self.deterministic),
+                                str(self.lun_batch_size), str(self.parallel), self.emitter.name,
+                                str(self.chunk_size), self.chunk_by, str(self.checkpoint_file))
+        ldevs = digest_records(self._iter_ldev_configs())
+        hostgroups = digest_records(self._iter_hostgroup_configs())
+        mappings = digest_records(self._iter_provisioning_tasks())
+        digests = {
+            'section:ldevs': digest_records(model.ldevs),
+            'section:host_groups': digest_records(model.hostgroups),
+            '03_create_ldevs_all.yml': digest_values(options, ldevs),
+            '04_create_hostgroups_all.yml': digest_values(options, hostgroups),
+            '05_provision_ldevs_to_hostgroups_all.yml': digest_values(options, mappings),
+            '00_complete_provisioning_workflow_enhanced.yml': digest_values(options, ldevs, hostgroups, mappings),
+            PARALLEL_PLAYBOOK: digest_values(options, ldevs, hostgroups, mappings),
+            PIPELINED_PLAYBOOK: digest_values(options, ldevs, hostgroups, mappings),
+        }
+        if self.snapshots:
+            # S-VOLs are checked against the LDEVs 03 creates
+            digests[SNAPSHOT_PLAYBOOK] = digest_values(
+                options, ldevs, digest_records(record for _, record in self.iter_fact_records(SNAPSHOT_SECTIONS)))
+        if self.external:
+            digests[EXTERNAL_PLAYBOOK] = digest_values(
+                options, ldevs, digest_records(record for _, record in self.iter_fact_records(EXTERNAL_SECTIONS)))
+        if self.replication:
+            # Journal LDEVs are created here unless 03 creates them
+            digests[REPLICATION_PLAYBOOK] = digest_values(
+                options, ldevs, digests['section:ldevs'],
+                digest_records(record for _, record in self.iter_fact_records(REPLICATION_SECTIONS)))
+        if self.resource_groups:
+            # Resource groups and virtual LDEV ids come from the LDEV and hostgroup records
+            digests[RESOURCE_GROUP_PLAYBOOK] = digest_values(
+                options, ldevs, hostgroups, mappings, digests['section:ldevs'], digests['section:host_groups'],
+                digest_records(record for _, record in self.iter_fact_records(RESOURCE_GROUP_SECTIONS)))
+        if self.ldev_policies:
+            # The policies come from the LDEV records
+            digests[POLICY_PLAYBOOK] = digest_values(options, ldevs, digests['section:ldevs'])
+        return digests
+    
+    def playbook_set(self) -> Dict[str, Callable[[], Iterator[str]]]:
+        """Output filename -> chunk generator for every playbook generate_all writes"""
+        playbooks = {
+            '03_create_ldevs_all.yml': self.iter_ldev_playbook,
+            '04_create_hostgroups_all.yml': self.iter_hostgroup_playbook,
+            '05_provision_ldevs_to_hostgroups_all.yml': self.iter_provision_playbook,
+            '00_complete_provisioning_workflow_enhanced.yml': self.iter_combined_workflow
+        }
+        if self.parallel:
+            playbooks[PARALLEL_PLAYBOOK] = self.iter_parallel_workflow
+        if self.schedule:
+            playbooks[PIPELINED_PLAYBOOK] = self.iter_pipelined_workflow
+        if self.snapshots:
+            playbooks[SNAPSHOT_PLAYBOOK] = self.iter_snapshot_restore_playbook
+        if self.external:
+            playbooks[EXTERNAL_PLAYBOOK] = self.iter_external_storage_playbook
+        if self.replication:
+            playbooks[REPLICATION_PLAYBOOK] = self.iter_replication_restore_playbook
+        if self.resource_groups:
+            playbooks[RESOURCE_GROUP_PLAYBOOK] = self.iter_resource_group_playbook
+        if self.ldev_policies:
+            playbooks[POLICY_PLAYBOOK] = self.iter_ldev_policy_playbook
+        if self.chunk_size:
+            # The workflow runs the chunked playbooks through their indexes
+            playbooks['00_complete_provisioning_workflow_enhanced.yml'] = lambda: self._document(
+                'Complete Provisioning Workflow - Chunk Index',
+                import_plays((title, filename) for filename, (_, _, _, title) in self._chunk_sources().items()),
+                f"Chunks of at most {self.chunk_size} items, by {self.chunk_by}")
+        return playbooks
+    
+    def _chunk_sources(self) -> Dict[str, Tuple[Callable[[], Iterable[Dict[str, Any]]],
+                                                Optional[Callable[[Dict[str, Any]], str]],
+                                                Callable[..., Iterator[str]], str]]:
+        """Chunked filename -> (items, group key or None, chunk renderer, title)"""
+        by_group = self.chunk_by == 'group'
+        return {
+            '03_create_ldevs_all.yml': (
+                self._iter_ldev_configs, (lambda ldev: f"pool-{ldev['pool_id']}") if by_group else None,
+                self.iter_ldev_playbook, 'Create All LDEVs'),
+            '04_create_hostgroups_all.yml': (
+                self._iter_hostgroup_configs, (lambda hg: f"port-{hg['port']}") if by_group else None,
+                self.iter_hostgroup_playbook, 'Create All Hostgroups'),
+            '05_provision_ldevs_to_hostgroups_all.yml': (
+                self._provisioning_batches, (lambda batch: f"port-{batch['hg_port']}") if by_group else None,
+                self.iter_provision_playbook, 'Provision All LDEVs to Hostgroups'),
+        }
+    
+    def _write_chunks(self, output_dir: Path, filename: str) -> List[Tuple[str, str]]:
+        """Write filename's items as chunk playbooks in one pass; return (part, chunk file)
+        pairs ordered by group (first seen) and chunk number"""
+        items, key, render, _ = self._chunk_sources()[filename]
+        numbers: Dict[Optional[str], int] = {}
+        parts = []
+        for group, chunk in iter_chunks(items(), self.chunk_size, key):
+            number = numbers[group] = numbers.get(group, 0) + 1
+            part = f"{group} #{number}" if group else f"#{number}"
+            chunk_file = chunk_filename(filename, group, number)
+            self._write_playbook(output_dir / chunk_file, render(chunk, part), filename)
+            parts.append((list(numbers).index(group), number, part, chunk_file))
+        if not parts:
+            # Nothing to create; keep one (empty) chunk so the index stays a valid playbook
+            chunk_file = chunk_filename(filename, None, 1)
+            self._write_playbook(output_dir / chunk_file, render([], '#1'), filename)
+            parts.append((0, 1, '#1', chunk_file))
+        return [(part, chunk_file) for _, _, part, chunk_file in sorted(parts)]
+    
+    def _iter_chunk_index(self, filename: str, parts: List[Tuple[str, str]]) -> Iterator[str]:
+        """Yield, in chunks, the index playbook importing filename's chunks in order"""
+        title = self._chunk_sources()[filename][3]
+        return self._document(f'{title} - Chunk Index',
+                              import_plays((f"{title} ({part})", chunk_file) for part, chunk_file in parts),
+                              f"Chunks: {len(parts)} of at most {self.chunk_size} items, by {self.chunk_by}")
+    
+    def _write_playbook(self, path: Path, chunks: Iterable[str], playbook: str) -> PlaybookWriter:
+        """Stream chunks to path; the time spent producing them counts as build, file I/O as write"""
+        start = time.perf_counter()
+        with PlaybookWriter(path) as writer:
+            writer.write_all(chunks)
+        self.timer.add('build', time.perf_counter() - start - writer.write_seconds, playbook)
+        self.timer.add('write', writer.write_seconds, playbook)
+        return writer
+    
+    def generate_all(self, output_dir: str = 'generated_playbooks', incremental: bool = True) -> List[Path]:
+        """Generate all playbooks and return their paths
+
+        With incremental, playbooks whose inputs are unchanged since the last
+        run (per the manifest in output_dir) are left untouched."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        print("\n" + "="*80)
-        print("Storage Provisioning Playbook Generator (Enhanced)")
-        print("="*80)
+        self._log("\n" + "="*80)
+        self._log("Storage Provisioning Playbook Generator (Enhanced)")
+        self._log("="*80)
         
-        # Extract data
+        # Build the indexed fact model once; every generator below reuses it
         self.extract_ldevs()
         self.extract_hostgroups()
         
-        print(f"\n✓ Found {len(self.ldevs)} LDEVs")
-        print(f"✓ Found {len(self.hostgroups)} Hostgroups")
-        print(f"✓ Found {len(self.ldev_hg_mappings)} LDEV-HG Mappings")
-        
-        # Generate playbooks
-        playbooks = {
-            '03_create_ldevs_all.yml': self.generate_ldev_playbook(),
-            '04_create_hostgroups_all.yml': self.generate_hostgroup_playbook(),
-            '05_provision_ldevs_to_hostgroups_all.yml': self.generate_provision_playbook(),
-            '00_complete_provisioning_workflow_enhanced.yml': self.generate_combined_workflow()
-        }
-        
-        for filename, content in playbooks.items():
+        self._log(f"\n✓ Found {len(self.ldevs)} LDEVs")
+        self._log(f"✓ Found {len(self.hostgroups)} Hostgroups")
+        self._log(f"✓ Found {len(self.ldev_hg_mappings)} LDEV-HG Mappings")
+        
+        # Loaded even without incremental, so chunk files of the last run can be cleaned up
+        manifest = PlaybookManifest(output_dir).load()
+        with self.timer.phase('digest'):
+            digests = self._input_digests()
+        sections = {name.split(':', 1)[1]: digest for name, digest in digests.items() if name.startswith('section:')}
+        if incremental:
+            for name, changed in manifest.changed_sections(sections).items():
+                self._log(f"• Section {name}: {'changed' if changed else 'unchanged'}")
+        manifest.sections = sections
+        
+        # Stream each playbook straight to its file; nothing is held in memory
+        outputs = []
+        chunked = self._chunk_sources() if self.chunk_size else {}
+        for filename, iter_playbook in self.playbook_set().items():
             filepath = output_dir / filename
-            with open(filepath, 'w') as f:
-                f.write(content)
-            size = len(content) / 1024
-            print(f"✓ Generated: {filepath} ({size:.1f} KB)")
-        
-        print("\n" + "="*80)
-        print("Summary")
-        print("="*80)
-        print(f"Total LDEVs to create: {len(self.ldevs)}")
-        print(f"Total Hostgroups to create: {len(self.hostgroups)}")
-        print(f"Total LDEV-HG Mappings: {len(self.ldev_hg_mappings)}")
-        print(f"\nAll playbooks saved to: {output_dir}")
-        print("="*80 + "\n")
+            outputs.append(filepath)
+            if incremental and manifest.is_current(filename, digests[filename], filepath):
+                outputs.extend(output_dir / part for part in manifest.parts(filename))
+                self._log(f"✓ Unchanged: {filepath} (skipped)")
+                continue
+            stale = set(manifest.parts(filename))
+            chunk_files = []
+            if filename in chunked:
+                parts = self._write_chunks(output_dir, filename)
+                chunk_files = [chunk_file for _, chunk_file in parts]
+                outputs.extend(output_dir / chunk_file for chunk_file in chunk_files)
+                iter_playbook = lambda: self._iter_chunk_index(filename, parts)
+            writer = self._write_playbook(filepath, iter_playbook(), filename)
+            for chunk_file in stale.difference(chunk_files):
+                (output_dir / chunk_file).unlink(missing_ok=True)
+            manifest.record(filename, digests[filename], filepath, parts=chunk_files)
+            size = writer.chars_written / 1024
+            if chunk_files:
+                self._log(f"✓ Generated: {filepath} ({size:.1f} KB index, chunk files: {len(chunk_files)})")
+            else:
+                self._log(f"✓ Generated: {filepath} ({size:.1f} KB)")
+        manifest.save()
+        if self.task_timing:
+            outputs.append(write_timing_plugin(output_dir))
+            self._log(f"✓ Task timing plugin: {outputs[-1]}")
+        
+        self._log("\n" + "="*80)
+        self._log("Summary")
+        self._log("="*80)
+        # What the playbooks hold, which delta and resume generators narrow down
+        self._log(f"Total LDEVs to create: {self._count_ldev_configs()}")
+        self._log(f"Total Hostgroups to create: {self._count_hostgroup_configs()}")
+        self._log(f"Total LDEV-HG Mappings: {self._count_provisioning_tasks()}")
+        self._log(f"\nAll playbooks saved to: {output_dir}")
+        self._log("="*80 + "\n")
+        return outputs
+
+def run_preflight(generator: StorageProvisioningGenerator, args, default_target=None):
+    """Check the plan against the target facts and exit: 0 if feasible, 1 on errors"""
+    target = default_target
+    if args.target_facts:
+        target = StorageProvisioningGenerator(args.target_facts, streaming=args.stream, verbose=False)
+    fill = None if args.expected_fill is None else args.expected_fill / 100
+    exit(0 if PreflightValidator(generator, target, expected_fill=fill).print_report() else 1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Ansible provisioning playbooks from storage facts")
+    parser.add_argument('facts_files', nargs='*', default=['all_storage_facts.json'],
+                        help="Storage facts JSON file (default: all_storage_facts.json); "
+                             "with --batch, any number of files, directories or glob patterns")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="Directory for generated playbooks (default: generated_playbooks, or "
+                             "generated_playbooks/delta with --diff-against); with --batch, one "
+                             "subdirectory per storage serial number is created here")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream only the needed fact sections instead of loading the whole file")
+    parser.add_argument('--force', action='store_true',
+                        help="Rewrite every playbook even if its inputs are unchanged since the last run")
+    parser.add_argument('--deterministic', action='store_true',
+                        help="Reproducible output: no wall-clock timestamp (uses SOURCE_DATE_EPOCH if set)")
+    parser.add_argument('--lun-batch-size', type=int, default=DEFAULT_LUN_BATCH_SIZE,
+                        help=f"Max LDEVs per hostgroup provisioning call (default: {DEFAULT_LUN_BATCH_SIZE})")
+    parser.add_argument('--parallel', type=int, default=0, metavar='N',
+                        help=f"Also generate {PARALLEL_PLAYBOOK}, sharding LDEVs into N groups and "
+                             f"hostgroups/LUNs by port; each play runs at most N shard hosts (serial: N), "
+                             f"so at most N API operations are in flight")
+    parser.add_argument('--schedule', action='store_true',
+                        help=f"Print a dependency-aware stage plan and also generate {PIPELINED_PLAYBOOK}, "
+                             f"running independent hostgroup pipelines without global barriers")
+    parser.add_argument('--snapshots', action='store_true',
+                        help=f"Also generate {SNAPSHOT_PLAYBOOK}, recreating snapshot and ShadowImage "
+                             f"pairs with one split call per group instead of per pair")
+    parser.add_argument('--external', action='store_true',
+                        help=f"Also generate {EXTERNAL_PLAYBOOK}, recreating external path groups and "
+                             f"parity groups and mapping external volumes in batches per path group")
+    parser.add_argument('--replication', action='store_true',
+                        help=f"Also generate {REPLICATION_PLAYBOOK}, recreating remote connections, journals "
+                             f"and quorum disks, then replication pairs in batches per journal / consistency "
+                             f"group once the journals are ready")
+    parser.add_argument('--resource-groups', action='store_true',
+                        help=f"Also generate {RESOURCE_GROUP_PLAYBOOK}, recreating resource groups (virtual "
+                             f"storage machines) first, then each group's LDEVs (with their virtual LDEV ids), "
+                             f"hostgroups and LUNs in concurrent per-group plays")
+    parser.add_argument('--ldev-policies', action='store_true',
+                        help=f"Also generate {POLICY_PLAYBOOK}, reapplying QoS, tiering, relocation and data "
+                             f"reduction process mode settings per LDEV (defaults skipped)")
+    parser.add_argument('--yaml-backend', choices=YAML_BACKENDS, default='builtin',
+                        help="Playbook serializer: the built-in streaming emitter (default) or "
+                             "PyYAML's safe dumper (LibYAML-accelerated when available; slower)")
+    parser.add_argument('--chunk-size', type=int, default=0, metavar='N',
+                        help="Split the LDEV, hostgroup and provisioning playbooks into chunk files of at "
+                             "most N items each; the usual file names become index playbooks that "
+                             "import their chunks")
+    parser.add_argument('--chunk-by', choices=CHUNK_MODES, default='count',
+                        help="With --chunk-size, cut chunks in source order ('count', default) or "
+                             "never mix pools (LDEVs) or ports (hostgroups, LUN batches) in a chunk ('group')")
+    parser.add_argument('--profile', action='store_true',
+                        help="Report generator wall time per phase (load, extract, digest, build, write) "
+                             "and build/write time per playbook")
+    parser.add_argument('--task-timing', action='store_true',
+                        help="Also write callback_plugins/storage_task_timing.py next to the playbooks; "
+                             "ansible-playbook then reports per-item latency, p50/p95 and throughput per "
+                             "task and writes them to timing_report.json")
+    parser.add_argument('--preflight', action='store_true',
+                        help="Only check the plan offline (pool capacity and thresholds, LDEV id "
+                             "collisions, missing ports) and exit non-zero on errors; nothing is generated")
+    parser.add_argument('--target-facts', metavar='TARGET_FACTS',
+                        help="With --preflight, facts of the array being provisioned (default: the "
+                             "--diff-against facts, else the facts file itself as an emptied rebuild)")
+    parser.add_argument('--expected-fill', type=float, default=None, metavar='PCT',
+                        help="With --preflight, percent of requested LDEV capacity expected to be "
+                             "physically allocated (default: the source pool's observed fill ratio)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Generate playbooks for many arrays in parallel")
+    parser.add_argument('--inventory', action='store_true',
+                        help="With --batch, also write an inventory (one host per array serial), per-array "
+                             "host_vars and a workflow targeting all arrays, run in parallel via forks")
+    parser.add_argument('--array-address', action='append', default=[], metavar='SERIAL=ADDRESS',
+                        help="With --inventory, the REST address of an array whose facts record none "
+                             "(repeatable); arrays without an address fail")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="Worker processes for --batch (default: number of CPUs)")
+    parser.add_argument('--vault-file', default='ansible_vault_vars/ansible_vault_storage_var.yml',
+                        help="Vault vars file referenced by the playbooks, relative to the working "
+                             "directory; '{serial}' is replaced by the array's serial number")
+    parser.add_argument('--diff-against', metavar='CURRENT_FACTS',
+                        help="Treat the facts file as desired state and generate only what is "
+                             "missing from this current-state facts file")
+    parser.add_argument('--checkpoint', metavar='JOURNAL',
+                        help="Make 03/04/05/00 append every completed LDEV, hostgroup, WWN set and mapping "
+                             "to this local journal file (relative to the working directory; '{serial}' "
+                             "is replaced by the array's serial number), even when the run fails")
+    parser.add_argument('--resume', action='store_true',
+                        help="With --checkpoint, generate only the work the journal does not record as "
+                             "completed, to rerun after a failed run")
+    parser.add_argument('--remove', action='store_true',
+                        help="With --diff-against, also generate 06_remove_drift.yml for items "
+                             "absent from the desired state")
+    args = parser.parse_args()
+    if not args.batch and len(args.facts_files) > 1:
+        parser.error("multiple facts files require --batch")
+    if args.diff_against and args.batch:
+        parser.error("--diff-against cannot be combined with --batch")
+    if args.preflight and args.batch:
+        parser.error("--preflight checks one array; run it per facts file instead of with --batch")
+    if (args.target_facts or args.expected_fill is not None) and not args.preflight:
+        parser.error("--target-facts and --expected-fill require --preflight")
+    if args.expected_fill is not None and not 0 <= args.expected_fill <= 100:
+        parser.error("--expected-fill must be a percentage between 0 and 100")
+    if args.inventory and not args.batch:
+        parser.error("--inventory requires --batch")
+    if args.array_address and not args.inventory:
+        parser.error("--array-address requires --inventory")
+    if any('=' not in item for item in args.array_address):
+        parser.error("--array-address takes SERIAL=ADDRESS")
+    if args.remove and not args.diff_against:
+        parser.error("--remove requires --diff-against")
+    if args.parallel < 0:
+        parser.error("--parallel must be 0 (disabled) or a positive number of concurrent operations")
+    if args.lun_batch_size < 1:
+        parser.error("--lun-batch-size must be at least 1")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.resume and (args.batch or args.diff_against):
+        parser.error("--resume works on one array and cannot be combined with --batch or --diff-against")
+    if args.chunk_size < 0:
+        parser.error("--chunk-size must be 0 (disabled) or a positive number of items")
+    if args.output_dir is None:
+        args.output_dir = 'generated_playbooks/delta' if args.diff_against else 'generated_playbooks'
+    return args
 
 if __name__ == '__main__':
-    generator = StorageProvisioningGenerator('all_storage_facts.json')
-    generator.generate_all()
+    args = parse_args()
+    if args.batch:
+        from storage_batch import run_batch
+        results = run_batch(args.facts_files, args.output_dir, jobs=args.jobs,
+                            vault_file=args.vault_file, streaming=args.stream,
+                            incremental=not args.force, deterministic=args.deterministic,
+                            lun_batch_size=args.lun_batch_size, parallel=args.parallel,
+                            schedule=args.schedule, snapshots=args.snapshots,
+                            external=args.external, replication=args.replication,
+                            resource_groups=args.resource_groups, ldev_policies=args.ldev_policies,
+                            inventory=args.inventory,
+                            addresses=dict(item.split('=', 1) for item in args.array_address),
+                            yaml_backend=args.yaml_backend, chunk_size=args.chunk_size,
+                            chunk_by=args.chunk_by, checkpoint_file=args.checkpoint,
+                            task_timing=args.task_timing, profile=args.profile)
+        if any(not r['ok'] for r in results):
+            exit(1)
+    elif args.diff_against:
+        from storage_diff import DeltaProvisioningGenerator
+        generator = DeltaProvisioningGenerator(args.facts_files[0], args.diff_against,
+                                               include_removals=args.remove, streaming=args.stream,
+                                               deterministic=args.deterministic,
+                                               lun_batch_size=args.lun_batch_size, parallel=args.parallel,
+                                               schedule=args.schedule, snapshots=args.snapshots,
+                                               external=args.external, replication=args.replication,
+                                               resource_groups=args.resource_groups,
+                                               ldev_policies=args.ldev_policies,
+                                               yaml_backend=args.yaml_backend,
+                                               chunk_size=args.chunk_size, chunk_by=args.chunk_by,
+                                               task_timing=args.task_timing)
+        generator.vault_file = vars_file_for(args.vault_file, args.output_dir, generator.model.serial_number)
+        if args.checkpoint:
+            generator.checkpoint_file = vars_file_for(args.checkpoint, args.output_dir, generator.model.serial_number)
+        for name, count in generator.diff.summary().items():
+            print(f"• {name.replace('_', ' ').capitalize()}: {count}")
+        if args.preflight:
+            run_preflight(generator, args, default_target=generator.current)
+        generator.generate_all(args.output_dir, incremental=not args.force)
+        if args.profile:
+            generator.timer.print_report()
+        if args.schedule:
+            ProvisioningScheduler(generator).print_plan()
+    else:
+        generator_class, resume_options = StorageProvisioningGenerator, {}
+        if args.resume:
+            from storage_resume import ResumeProvisioningGenerator
+            generator_class, resume_options = ResumeProvisioningGenerator, {'journal_file': args.checkpoint}
+        generator = generator_class(args.facts_files[0], streaming=args.stream,
+                                    deterministic=args.deterministic,
+                                    lun_batch_size=args.lun_batch_size, parallel=args.parallel,
+                                    schedule=args.schedule, snapshots=args.snapshots,
+                                    external=args.external, replication=args.replication,
+                                    resource_groups=args.resource_groups, ldev_policies=args.ldev_policies,
+                                    yaml_backend=args.yaml_backend,
+                                    chunk_size=args.chunk_size, chunk_by=args.chunk_by,
+                                    task_timing=args.task_timing, **resume_options)
+        if args.resume:
+            for name, count in generator.journal.summary().items():
+                print(f"• {name.replace('_', ' ').capitalize()}: {count}")
+        if args.preflight:
+            run_preflight(generator, args)
+        generator.vault_file = vars_file_for(args.vault_file, args.output_dir, generator.model.serial_number)
+        if args.checkpoint:
+            generator.checkpoint_file = vars_file_for(args.checkpoint, args.output_dir, generator.model.serial_number)
+        generator.generate_all(args.output_dir, incremental=not args.force)
+        if args.profile:
+            generator.timer.print_report()
+        if args.schedule:
+            ProvisioningScheduler(generator).print_plan()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Remote Replication Restore Playbook Generation
+Rebuilds replication from the facts in dependency order:
+1. journal volume LDEVs the LDEV playbooks do not create (they are unmapped)
+2. remote connections (one call per remote path group, with all its paths)
+3. journals, then a readiness gate that polls each journal until it reports
+   a usable status, so no pair is submitted to a journal still being set up
+4. quorum disks (GAD)
+5. replication pairs, in batches of one journal / consistency group (at most
+   lun_batch_size pairs): each batch is submitted asynchronously in one go and
+   waited for before the next batch starts
+
+Pairs come from the hur_pairs / truecopy_pairs / gad_pairs sections when the
+facts were gathered with the pair facts modules; pairs listed from the
+secondary side (another primary serial) are skipped. Otherwise they are
+derived from the LDEVs' provision types (HORC, GAD) and the journals' active
+mirrors; what those do not record (the S-VOL side, and a journal or quorum
+disk that is ambiguous) comes from play vars that a precondition requires.
+"""
+
+from typing import List, Dict, Any, Iterator, Tuple
+
+from storage_playbook import COLLECTION, connection_vars, create_ldevs_task, play, task, vsp_task
+
+REPLICATION_PLAYBOOK = '11_restore_replication.yml'
+
+# section -> key under ansible_facts
+REPLICATION_SECTIONS = {
+    'remote_connections': 'remote_connections',
+    'journals': 'journal_volume',
+    'quorum_disks': 'quorum_disk',
+    'hur_pairs': 'data',
+    'truecopy_pairs': 'data',
+    'gad_pairs': 'data',
+}
+
+# Pair section -> (module, label)
+PAIR_TYPES = {
+    'hur_pairs': ('hv_hur', 'HUR'),
+    'truecopy_pairs': ('hv_truecopy', 'TrueCopy'),
+    'gad_pairs': ('hv_gad', 'GAD'),
+}
+
+# provision_type attribute of an LDEV -> pair section it is derived into;
+# HORC is HUR when the array has an active primary journal mirror, else TrueCopy
+VOLUME_PAIR_ATTRIBUTES = {'HORC': 'hur_pairs', 'GAD': 'gad_pairs'}
+
+# Journal statuses in which pairs can be created (no pairs yet, or normal)
+JOURNAL_READY_STATUSES = ['SMPL', 'PJNN', 'SJNN']
+
+SECONDARY_CONNECTION_INFO = {
+    'address': '{{ secondary_storage_address }}',
+    'username': '{{ vault_secondary_storage_username | default(vault_storage_username) }}',
+    'password': '{{ vault_secondary_storage_secret | default(vault_storage_secret) }}',
+}
+
+
+def _first(record: Dict[str, Any], *keys: str) -> Any:
+    """First present key; pair facts name volumes differently per module version"""
+    for key in keys:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+
+def _pair(record: Dict[str, Any]) -> Dict[str, Any]:
+    cg = _first(record, 'consistency_group_id', 'ctg_id')
+    return {
+        'pvol': _first(record, 'primary_volume_id', 'pvol_ldev_id', 'ldev_id'),
+        'svol': _first(record, 'secondary_volume_id', 'svol_ldev_id', 'remote_ldev_id'),
+        'consistency_group_id': cg if cg is not None and cg >= 0 else None,
+        'mirror_unit_id': _first(record, 'mirror_unit_id', 'mu_number'),
+        'journal_id': _first(record, 'primary_journal_group_id', 'primary_volume_journal_id', 'pvol_journal_id'),
+        'secondary_journal_id': _first(record, 'secondary_journal_group_id', 'secondary_volume_journal_id',
+                                       'svol_journal_id'),
+        'quorum_disk_id': _first(record, 'quorum_disk_id', 'quorum_id'),
+        'fence_level': record.get('fence_level'),
+    }
+
+
+def _remote_connection(conn: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'remote_serial': conn.get('remote_serial_number'),
+        'remote_storage_type_id': conn.get('remote_storage_type_id'),
+        'path_group_id': conn.get('path_group_id'),
+        'min_paths': conn.get('min_num_of_paths', 1),
+        'timeout_s': conn.get('timeout_value_for_remote_io_in_seconds', 15),
+        'round_trip_ms': conn.get('round_trip_time_in_milli_seconds', 1),
+        'paths': [{'local_port': p.get('local_port_id'), 'remote_port': p.get('remote_port_id')}
+                  for p in conn.get('remote_paths') or []],
+    }
+
+
+def _journal(journal: Dict[str, Any]) -> Dict[str, Any]:
+    # The journal facts call the journal ID journal_pool_id
+    return {
+        'journal_id': _first(journal, 'journal_id', 'journal_pool_id'),
+        'ldev_ids': journal.get('ldev_ids') or [],
+        'mp_blade_id': journal.get('mp_blade_id', 0),
+        'is_cache_mode_enabled': bool(journal.get('is_cache_mode_enabled', True)),
+        'data_overflow_watch_seconds': journal.get('data_overflow_watch_seconds', 60),
+    }
+
+
+def _mirrors(journal: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Active mirrors (consistency groups) of a journal; P* journal statuses are
+    the primary side, S* the secondary side"""
+    journal_id = _first(journal, 'journal_id', 'journal_pool_id')
+    primary = str(journal.get('journal_status') or '').startswith('P')
+    return [{'journal_id': journal_id, 'mirror_unit_id': mirror.get('mirror_unit_id'),
+             'consistency_group_id': mirror.get('consistency_group_id'), 'primary': primary}
+            for mirror in journal.get('mirrors') or [] if mirror.get('status') not in (None, 'SMPL')]
+
+
+def _attributes(ldev: Dict[str, Any]) -> List[str]:
+    return [part.strip() for part in str(ldev.get('provision_type') or '').split(',')]
+
+
+def _quorum_disk(disk: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': disk.get('quorum_disk_id'),
+        'ldev_id': disk.get('ldev_id'),
+        'remote_serial': disk.get('remote_serial_number'),
+        'remote_storage_type_id': disk.get('remote_storage_type_id'),
+        'read_response_guaranteed_time': disk.get('read_response_guaranteed_time', 40),
+    }
+
+
+class ReplicationRestoreGenerator:
+    def __init__(self, generator):
+        """Collect replication config through the generator's fact access"""
+        self.generator = generator
+        self.remote_connections: List[Dict[str, Any]] = []
+        self.journals: List[Dict[str, Any]] = []
+        self.quorum_disks: List[Dict[str, Any]] = []
+        # pair section -> pairs, first listing of each (pvol, svol, mirror unit) only
+        self.pairs: Dict[str, List[Dict[str, Any]]] = {section: [] for section in PAIR_TYPES}
+        self.mirrors: List[Dict[str, Any]] = []
+        # Play vars the derived pairs refer to, which the facts do not record,
+        # and the values the facts allow for those that pick among several
+        self.required_vars: List[str] = []
+        self.choices: Dict[str, List[Any]] = {}
+        self.secondary_side = 0
+        serial = generator.model.serial_number
+        seen = set()
+        for section, record in generator.iter_fact_records(REPLICATION_SECTIONS):
+            if section == 'remote_connections':
+                self.remote_connections.append(_remote_connection(record))
+            elif section == 'journals':
+                self.journals.append(_journal(record))
+                self.mirrors.extend(_mirrors(record))
+            elif section == 'quorum_disks':
+                self.quorum_disks.append(_quorum_disk(record))
+            else:
+                primary = _first(record, 'primary_storage_serial_number', 'pvol_storage_serial_number')
+                if primary is not None and serial and str(primary) != str(serial):
+                    self.secondary_side += 1
+                    continue
+                pair = _pair(record)
+                key = (section, pair['pvol'], pair['svol'], pair['mirror_unit_id'])
+                if pair['pvol'] is not None and key not in seen:
+                    seen.add(key)
+                    self.pairs[section].append(pair)
+        self.derived = not self.count_pairs()
+        if self.derived:
+            self._derive_pairs()
+
+    def _derive_pairs(self):
+        """Pairs of the LDEVs whose provision type marks them as replicated. The
+        facts name neither the S-VOL nor its array, so the module allocates the
+        S-VOL in secondary_pool_id. With several active primary mirrors (or
+        quorum disks) the facts do not say which one a volume uses, so a play
+        var picks one of them"""
+        primary = [m for m in self.mirrors if m['primary']]
+        secondary = [m for m in self.mirrors if not m['primary']]
+        horc = 'hur_pairs' if primary else 'truecopy_pairs'
+        if len(primary) == 1:
+            hur = {'journal_id': primary[0]['journal_id'], 'mirror_unit_id': primary[0]['mirror_unit_id'],
+                   'consistency_group_id': primary[0]['consistency_group_id']}
+        else:
+            hur = {'journal_id': '{{ hur_mirror.journal_id }}', 'mirror_unit_id': '{{ hur_mirror.mirror_unit_id }}',
+                   'consistency_group_id': '{{ hur_mirror.consistency_group_id }}'}
+        quorum_ids = [d['id'] for d in self.quorum_disks if d['id'] is not None]
+        quorum = quorum_ids[0] if len(quorum_ids) == 1 else '{{ gad_quorum_disk_id }}'
+
+        for ldev in self.generator.model.ldevs.iter_records(fields=('ldev_id', 'provision_type')):
+            attributes = _attributes(ldev)
+            for attribute, section in VOLUME_PAIR_ATTRIBUTES.items():
+                if attribute not in attributes:
+                    continue
+                section = horc if attribute == 'HORC' else section
+                if section == 'hur_pairs' and secondary and not primary:
+                    # Only secondary journals: this array holds the S-VOLs
+                    self.secondary_side += 1
+                    continue
+                pair = {'pvol': ldev['ldev_id'], 'svol': None, 'consistency_group_id': None,
+                        'mirror_unit_id': None, 'journal_id': None, 'secondary_journal_id': None,
+                        'quorum_disk_id': None, 'fence_level': None}
+                if section == 'hur_pairs':
+                    pair.update(hur, secondary_journal_id='{{ hur_secondary_journal_id }}')
+                elif section == 'gad_pairs':
+                    pair['quorum_disk_id'] = quorum
+                self.pairs[section].append(pair)
+
+        required = ['secondary_pool_id'] if self.count_pairs() else []
+        if self.pairs['hur_pairs']:
+            required.append('hur_secondary_journal_id')
+            if len(primary) != 1:
+                required.append('hur_consistency_group_id')
+                self.choices['hur_consistency_group_id'] = [m['consistency_group_id'] for m in primary]
+        if self.pairs['gad_pairs'] and len(quorum_ids) != 1:
+            required.append('gad_quorum_disk_id')
+            self.choices['gad_quorum_disk_id'] = quorum_ids
+        self.required_vars = required
+
+    def batches(self) -> List[Dict[str, Any]]:
+        """Pairs grouped by type, journal and consistency group, in chunks of at most lun_batch_size"""
+        groups: Dict[Tuple[str, Any, Any, Any], List[Dict[str, Any]]] = {}
+        for section, pairs in self.pairs.items():
+            for pair in pairs:
+                key = (section, pair['journal_id'], pair['secondary_journal_id'], pair['consistency_group_id'])
+                groups.setdefault(key, []).append(pair)
+        size = self.generator.lun_batch_size
+        return [{'section': section, 'journal_id': journal_id, 'secondary_journal_id': secondary_journal_id,
+                 'consistency_group_id': cg, 'pairs': pairs[i:i + size]}
+                for (section, journal_id, secondary_journal_id, cg), pairs in groups.items()
+                for i in range(0, len(pairs), size)]
+
+    def waves(self, batch: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        """A batch's pairs in waves of at most parallel pairs (the whole batch
+        without --parallel); each wave is submitted at once and awaited"""
+        pairs = batch['pairs']
+        size = self.generator.parallel or len(pairs)
+        return [pairs[i:i + size] for i in range(0, len(pairs), size)]
+
+    def journal_ldevs(self) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """LDEV configs of journal volumes that 03 does not create, and journal
+        volumes the facts have no LDEV record for"""
+        gen = self.generator
+        created = {ldev['ldev_id'] for ldev in gen._iter_ldev_configs()}
+        configs, unknown = [], []
+        for journal in self.journals:
+            for ldev_id in journal['ldev_ids']:
+                if ldev_id in created:
+                    continue
+                ldev = gen.model.get_ldev(ldev_id)
+                if ldev is None:
+                    unknown.append(ldev_id)
+                else:
+                    # Journal volumes report no data reduction share; leave it to the module
+                    configs.append({key: value for key, value in gen._ldev_config(ldev).items()
+                                    if value is not None})
+        return configs, unknown
+
+    def count_pairs(self) -> int:
+        return sum(len(pairs) for pairs in self.pairs.values())
+
+    def _requirements(self) -> List[str]:
+        """Play vars the pairs play needs, with the allowed values of a choice"""
+        return [f"{name} (one of {self.choices[name]})" if name in self.choices else name
+                for name in ['secondary_storage_address', *self.required_vars]]
+
+    def _batch_tasks(self, index: int, batch: Dict[str, Any], step: str) -> List[Dict[str, Any]]:
+        """Submit one wave of a batch asynchronously, then wait for all of its pairs"""
+        module, label = PAIR_TYPES[batch['section']]
+        spec: Dict[str, Any] = {
+            'primary_volume_id': '{{ item.pvol }}',
+            'secondary_volume_id': '{{ item.svol | default(omit) }}',
+            # Without a known S-VOL the module allocates one in the secondary pool
+            'secondary_pool_id': '{{ omit if item.svol is defined else secondary_pool_id }}',
+        }
+        if batch['section'] == 'hur_pairs':
+            spec['primary_volume_journal_id'] = batch['journal_id']
+            spec['secondary_volume_journal_id'] = batch['secondary_journal_id']
+            spec['mirror_unit_id'] = '{{ item.mirror_unit_id | default(omit) }}'
+        elif batch['section'] == 'gad_pairs':
+            spec['quorum_disk_id'] = '{{ item.quorum_disk_id | default(omit) }}'
+        elif batch['section'] == 'truecopy_pairs':
+            spec['fence_level'] = "{{ item.fence_level | default(omit, true) }}"
+        if batch['consistency_group_id'] is not None:
+            spec['consistency_group_id'] = batch['consistency_group_id']
+        where = ', '.join(part for part in (
+            f"journal {batch['journal_id']}" if batch['journal_id'] is not None else '',
+            f"CG {batch['consistency_group_id']}" if batch['consistency_group_id'] is not None else 'no CG') if part)
+
+        pair_label = "{{ item.pvol }} -> {{ item.svol | default('new S-VOL') }}"
+        submit = vsp_task(f"Submit {label} pairs: {where} ({step})", module, spec,
+                          loop=f"{{{{ replication_batches[{index}] }}}}", label=pair_label,
+                          register='pair_jobs', tags=['pairs'])
+        submit[f"{COLLECTION}.{module}"]['secondary_connection_info'] = '{{ secondary_connection_info }}'
+        submit.update({'async': '{{ pair_timeout_seconds }}', 'poll': 0})
+        wait = task(f"Wait for {label} pairs: {where} ({step})", 'ansible.builtin.async_status',
+                    {'jid': '{{ item.ansible_job_id }}'}, loop='{{ pair_jobs.results }}',
+                    label=pair_label.replace('item.', 'item.item.'), register='pair_job', tags=['pairs'])
+        wait.update({'until': 'pair_job.finished', 'retries': '{{ pair_wait_retries }}',
+                     'delay': '{{ pair_wait_delay }}'})
+        return [submit, wait]
+
+    def iter_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the replication restore playbook"""
+        gen = self.generator
+        batches = self.batches()
+        journal_ldevs, unknown_ldevs = self.journal_ldevs()
+
+        infrastructure = [
+            create_ldevs_task('Create journal volume LDEVs', '{{ journal_ldevs }}', tags=['journal']),
+            vsp_task('Create remote connections', 'hv_remote_connection', {
+                'remote_storage_serial_number': '{{ item.remote_serial }}',
+                'remote_storage_type_id': '{{ item.remote_storage_type_id }}',
+                'path_group_id': '{{ item.path_group_id }}',
+                'min_remote_paths': '{{ item.min_paths }}',
+                'remote_io_timeout_in_sec': '{{ item.timeout_s }}',
+                'round_trip_in_msec': '{{ item.round_trip_ms }}',
+                'remote_paths': '{{ item.paths }}',
+            }, loop='{{ remote_connections }}',
+                label='{{ item.remote_serial }} path group {{ item.path_group_id }} ({{ item.paths | length }} paths)',
+                tags=['remote_connection']),
+            vsp_task('Create journals', 'hv_journal', {
+                'journal_id': '{{ item.journal_id }}',
+                'ldev_ids': '{{ item.ldev_ids }}',
+                'mp_blade_id': '{{ item.mp_blade_id }}',
+                'is_cache_mode_enabled': '{{ item.is_cache_mode_enabled }}',
+                'data_overflow_watch_in_seconds': '{{ item.data_overflow_watch_seconds }}',
+            }, loop='{{ journals }}', label='Journal {{ item.journal_id }}: LDEVs {{ item.ldev_ids | join(\', \') }}',
+                tags=['journal']),
+        ]
+        # Pairs go to a journal only once it reports a usable status
+        ready = vsp_task('Wait for journals to be ready', 'hv_journal_facts', {'journal_id': '{{ item.journal_id }}'},
+                         loop='{{ journals }}', label='Journal {{ item.journal_id }}', register='journal_state',
+                         tags=['journal'])
+        # A facts module takes no state
+        del ready[f"{COLLECTION}.hv_journal_facts"]['state']
+        ready.update({
+            'until': "journal_state is succeeded and (journal_state.ansible_facts.journal_volume | default([]) "
+                     "| selectattr('journal_status', 'in', journal_ready_statuses) | list | length) > 0",
+            'retries': '{{ journal_ready_retries }}',
+            'delay': '{{ journal_ready_delay }}',
+        })
+        infrastructure.append(ready)
+        infrastructure.append(vsp_task('Create quorum disks', 'hv_quorum_disk', {
+            'id': '{{ item.id }}',
+            'ldev_id': '{{ item.ldev_id }}',
+            'remote_storage_serial_number': '{{ item.remote_serial }}',
+            'remote_storage_type_id': '{{ item.remote_storage_type_id }}',
+            'read_response_guaranteed_time': '{{ item.read_response_guaranteed_time }}',
+        }, loop='{{ quorum_disks }}', label='Quorum {{ item.id }}: LDEV {{ item.ldev_id }}', tags=['quorum']))
+
+        plays = [play('Restore Replication Infrastructure', vars_files=[gen.vault_file], vars=connection_vars(
+            journal_ldevs=journal_ldevs,
+            remote_connections=self.remote_connections,
+            journals=self.journals,
+            quorum_disks=self.quorum_disks,
+            journal_ready_statuses=JOURNAL_READY_STATUSES,
+            journal_ready_retries=30,
+            journal_ready_delay=10,
+        ), tasks=infrastructure)]
+        # (batch, pairs) per submission: each wave of at most parallel pairs is one submit and wait
+        submissions = []
+        for number, batch in enumerate(batches, 1):
+            waves = self.waves(batch)
+            for part, pairs in enumerate(waves, 1):
+                step = f"batch {number}/{len(batches)}" + (f", wave {part}/{len(waves)}" if len(waves) > 1 else '')
+                submissions.append((batch, pairs, step))
+        if batches:
+            # The secondary array and whatever the derived pairs need are not in the facts
+            required = ['secondary_storage_address', *self.required_vars]
+            checks = [f"{name} is defined" for name in required]
+            checks.extend(f"({name} | int) in {values}" for name, values in self.choices.items())
+            pair_tasks = [task('Require the secondary array settings', 'ansible.builtin.assert', {
+                'that': checks,
+                'fail_msg': f"Set {', '.join(self._requirements())} in the vars file or with -e "
+                            f"before restoring pairs"})]
+            pair_vars = {}
+            if 'hur_consistency_group_id' in self.choices:
+                pair_vars['hur_mirrors'] = [{key: m[key] for key in ('journal_id', 'mirror_unit_id',
+                                                                      'consistency_group_id')}
+                                            for m in self.mirrors if m['primary']]
+                pair_vars['hur_mirror'] = ("{{ hur_mirrors | selectattr('consistency_group_id', 'equalto', "
+                                           "hur_consistency_group_id | int) | first }}")
+            for index, (batch, _, step) in enumerate(submissions):
+                pair_tasks.extend(self._batch_tasks(index, batch, step))
+            plays.append(play('Restore Replication Pairs', vars_files=[gen.vault_file], vars=connection_vars(
+                secondary_connection_info=dict(SECONDARY_CONNECTION_INFO),
+                pair_timeout_seconds=3600,
+                pair_wait_retries=360,
+                pair_wait_delay=10,
+                **pair_vars,
+                replication_batches=[[{key: pair[key] for key in ('pvol', 'svol', 'mirror_unit_id',
+                                                                   'quorum_disk_id', 'fence_level')
+                                       if pair[key] is not None} for pair in pairs]
+                                     for _, pairs, _ in submissions],
+            ), tasks=pair_tasks))
+
+        pair_counts = ', '.join(f"{PAIR_TYPES[section][1]} {len(pairs)}" for section, pairs in self.pairs.items())
+        notes = [
+            f"Remote connections: {len(self.remote_connections)}, journals: {len(self.journals)} "
+            f"({len(journal_ldevs)} journal LDEVs created here), quorum disks: {len(self.quorum_disks)}",
+            f"Pairs: {self.count_pairs()} ({pair_counts}) in {len(batches)} batches "
+            f"(per journal / consistency group, max {gen.lun_batch_size} pairs)"
+            f"{f', submitted {gen.parallel} at a time' if gen.parallel else ''}",
+        ]
+        if self.derived and self.count_pairs():
+            notes.append("No hur_pairs / truecopy_pairs / gad_pairs sections in the facts; pairs derived from "
+                         "the LDEV provision types (HORC, GAD) and the journal mirrors, S-VOLs allocated in "
+                         "secondary_pool_id")
+        elif not self.count_pairs():
+            notes.append("No replication pairs in the facts; only the infrastructure is restored")
+        if batches:
+            notes.append(f"Requires: {', '.join(self._requirements())}")
+        if self.secondary_side:
+            notes.append(f"Skipped {self.secondary_side} pairs listed from the secondary side")
+        if unknown_ldevs:
+            notes.append(f"Journal LDEVs missing from the facts (must exist first): {unknown_ldevs[:20]}")
+        quorum_ldevs = sorted(d['ldev_id'] for d in self.quorum_disks if d['ldev_id'] is not None)
+        if quorum_ldevs:
+            notes.append(f"Quorum disk LDEVs (usually external volumes, see --external) must exist first: "
+                         f"{quorum_ldevs[:20]}")
+        return gen._document('Replication Restore Playbook', plays, *notes)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Resource Group Aware Restore Playbook Generation
+Restores multi-tenant arrays (virtual storage machines, global-active-device
+setups) with their resource groups and virtual LDEV ids:
+1. resource groups first: each one is created with its virtual storage
+   machine (serial / model), its ports and parity groups, and its LDEV ids
+   reserved, so the LDEVs are created inside it
+2. then one play per resource group, all running concurrently (one local host
+   each, strategy free): LDEVs at their original ids with their virtual LDEV
+   ids, hostgroups (added to the resource group), WWNs and LUNs
+3. finally LUN batches whose LDEVs sit in another resource group than the
+   hostgroup, which depend on two per-group plays
+
+The default resource group (meta_resource, id 0) always exists and is never
+created; its LDEVs and hostgroups form one more per-group play.
+"""
+
+from typing import List, Dict, Any, Iterator, Tuple
+
+from storage_playbook import (COLLECTION, add_host_task, add_wwns_task, connection_vars, create_hostgroups_task,
+                              create_ldevs_task, play, present_ldevs_task, vsp_task)
+
+RESOURCE_GROUP_PLAYBOOK = '12_restore_resource_groups.yml'
+
+# section -> key under ansible_facts
+RESOURCE_GROUP_SECTIONS = {
+    'resource_groups': 'resource_groups',
+}
+
+DEFAULT_RESOURCE_GROUP_ID = 0
+
+# Facts report -1 for LDEVs without a virtual LDEV id
+NO_VIRTUAL_LDEV_ID = -1
+
+
+def shard_name(rg_id: Any) -> str:
+    return f"rg-{rg_id}"
+
+
+def _resource_group(record: Dict[str, Any]) -> Dict[str, Any]:
+    rg = {
+        'id': record.get('id'),
+        'name': record.get('name'),
+        'virtual_storage_id': record.get('virtual_storage_id', 0),
+        'ldevs': record.get('ldevs') or [],
+        'ports': record.get('ports') or [],
+        'parity_groups': record.get('parity_groups') or [],
+        'external_parity_groups': record.get('external_parity_groups') or [],
+    }
+    if rg['virtual_storage_id']:
+        rg['virtual_serial_number'] = record.get('virtual_serial_number')
+        rg['virtual_model'] = record.get('virtual_model')
+    return rg
+
+
+class ResourceGroupGenerator:
+    def __init__(self, generator):
+        """Collect resource groups through the generator's fact access"""
+        self.generator = generator
+        # Resource groups to create, in facts order; the default group is skipped
+        self.resource_groups: List[Dict[str, Any]] = []
+        self.names: Dict[Any, str] = {DEFAULT_RESOURCE_GROUP_ID: 'meta_resource'}
+        for _, record in generator.iter_fact_records(RESOURCE_GROUP_SECTIONS):
+            rg = _resource_group(record)
+            if rg['id'] == DEFAULT_RESOURCE_GROUP_ID:
+                continue
+            self.resource_groups.append(rg)
+            self.names[rg['id']] = rg['name']
+
+    def ldev_group(self, ldev_id: int) -> Any:
+        return self.generator.model.ldev_field(ldev_id, 'resource_group_id', DEFAULT_RESOURCE_GROUP_ID)
+
+    def hostgroup_group(self, port: str, name: str) -> Any:
+        hg = self.generator.model.get_hostgroup(port, name)
+        return DEFAULT_RESOURCE_GROUP_ID if hg is None else hg.get('resource_group_id', DEFAULT_RESOURCE_GROUP_ID)
+
+    def _ldev_item(self, ldev: Dict[str, Any]) -> Dict[str, Any]:
+        """LDEV config plus its virtual LDEV id, when it has one"""
+        virtual_id = self.generator.model.ldev_field(ldev['ldev_id'], 'virtual_ldev_id', NO_VIRTUAL_LDEV_ID)
+        if virtual_id is None or virtual_id == NO_VIRTUAL_LDEV_ID:
+            return ldev
+        return dict(ldev, virtual_ldev_id=virtual_id)
+
+    def partition(self) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]],
+                                 Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """LDEVs, hostgroups and LUN batches per resource group shard, plus the
+        LUN batches that map LDEVs of another resource group than the hostgroup's"""
+        gen = self.generator
+        ldevs: Dict[str, List[Dict[str, Any]]] = {}
+        hostgroups: Dict[str, List[Dict[str, Any]]] = {}
+        mappings: Dict[str, List[Dict[str, Any]]] = {}
+        cross: List[Dict[str, Any]] = []
+        for ldev in gen._iter_ldev_configs():
+            ldevs.setdefault(shard_name(self.ldev_group(ldev['ldev_id'])), []).append(self._ldev_item(ldev))
+        for hg in gen._iter_hostgroup_configs():
+            hostgroups.setdefault(shard_name(self.hostgroup_group(hg['port'], hg['name'])), []).append(hg)
+        for batch in gen._provisioning_batches():
+            rg_id = self.hostgroup_group(batch['hg_port'], batch['hg_name'])
+            if all(self.ldev_group(ldev_id) == rg_id for ldev_id in batch['ldev_ids']):
+                mappings.setdefault(shard_name(rg_id), []).append(gen._batch_item(batch))
+            else:
+                cross.append(gen._batch_item(batch))
+        return ldevs, hostgroups, mappings, cross
+
+    def _create_tasks(self) -> List[Dict[str, Any]]:
+        """Create each resource group with its virtual storage machine and reserved resources"""
+        create = vsp_task('Create resource groups', 'hv_resource_group', {
+            'name': '{{ item.name }}',
+            'virtual_storage_serial': "{{ item.virtual_serial_number | default(omit) }}",
+            'virtual_storage_model': "{{ item.virtual_model | default(omit) }}",
+            'ports': '{{ item.ports }}',
+            'parity_groups': '{{ item.parity_groups + item.external_parity_groups }}',
+            'ldevs': '{{ item.ldevs }}',
+        }, loop='{{ resource_groups }}',
+            label='{{ item.name }} ({{ item.ldevs | length }} LDEV ids, {{ item.ports | length }} ports)',
+            tags=['resource_group'])
+        return [create]
+
+    def _shard_tasks(self) -> List[Dict[str, Any]]:
+        """One resource group's LDEVs, hostgroups, WWNs and LUNs"""
+        def shard_loop(var: str) -> str:
+            return f"{{{{ {var}[inventory_hostname] | default([]) }}}}"
+
+        ldevs = create_ldevs_task('Create LDEVs in resource group', shard_loop('ldevs_by_group'), tags=['ldev'])
+        # Virtual storage machines also need the virtual LDEV id
+        ldevs[f"{COLLECTION}.hv_ldev"]['spec']['vldev_id'] = "{{ item.virtual_ldev_id | default(omit) }}"
+        add_hostgroups = vsp_task('Add hostgroups to resource group', 'hv_resource_group', {
+            'state': 'add_resource',
+            'name': '{{ resource_group_names[inventory_hostname] }}',
+            'host_groups': '{{ resource_group_hostgroups[inventory_hostname] }}',
+        }, when='inventory_hostname in resource_group_hostgroups', tags=['resource_group', 'hostgroup'])
+        return [
+            ldevs,
+            create_hostgroups_task('Create hostgroups in resource group', shard_loop('hostgroups_by_group'),
+                                   tags=['hostgroup']),
+            add_hostgroups,
+            add_wwns_task('Add WWNs to hostgroups in resource group', shard_loop('hostgroups_by_group'),
+                          tags=['hostgroup', 'wwn']),
+            present_ldevs_task('Provision LDEVs in resource group', shard_loop('mappings_by_group'),
+                               tags=['provision']),
+        ]
+
+    def iter_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the resource group aware restore playbook"""
+        gen = self.generator
+        ldevs, hostgroups, mappings, cross = self.partition()
+        shards = list(dict.fromkeys([*ldevs, *hostgroups, *mappings]))
+        rg_ids = {shard_name(rg_id): rg_id for rg_id in self.names}
+        unknown = sorted(shard for shard in shards if shard not in rg_ids)
+        virtual = sum(1 for items in ldevs.values() for ldev in items if 'virtual_ldev_id' in ldev)
+
+        plays = []
+        if self.resource_groups:
+            plays.append(play('Restore Resource Groups', vars_files=[gen.vault_file],
+                              vars=connection_vars(resource_groups=self.resource_groups),
+                              tasks=self._create_tasks()))
+        plays.append(play('Build Resource Group Shards', vars={'resource_group_shards': shards},
+                          tasks=[add_host_task('Add resource group hosts', 'resource_group_shards',
+                                               '{{ resource_group_shards }}')]))
+        # A group's host runs its tasks in sequence, so serial N caps the play at N API calls
+        plays.append(play('Restore Resource Group Contents (one resource group per host)',
+                          hosts='resource_group_shards', strategy='free', serial=gen.parallel,
+                          vars_files=[gen.vault_file],
+                          vars=connection_vars(
+                              resource_group_names={shard: self.names.get(rg_ids.get(shard), shard)
+                                                    for shard in shards},
+                              ldevs_by_group=ldevs, hostgroups_by_group=hostgroups, mappings_by_group=mappings,
+                              # The default group takes no resources
+                              resource_group_hostgroups={
+                                  shard: [{'name': hg['name'], 'port': hg['port']} for hg in items]
+                                  for shard, items in hostgroups.items()
+                                  if shard != shard_name(DEFAULT_RESOURCE_GROUP_ID)}),
+                          tasks=self._shard_tasks()))
+        if cross:
+            plays.append(play('Provision Cross-Resource-Group Mappings', vars_files=[gen.vault_file],
+                              vars=connection_vars(cross_group_mappings=cross),
+                              tasks=[present_ldevs_task('Provision LDEVs across resource groups',
+                                                        '{{ cross_group_mappings }}', tags=['provision'])]))
+
+        notes = [
+            f"Resource groups: {len(self.resource_groups)} created "
+            f"({sum(1 for rg in self.resource_groups if rg['virtual_storage_id'])} with a virtual storage machine), "
+            f"{len(shards)} restored concurrently, one per host (run ansible-playbook with -f {len(shards)} or more)"
+            f"{f'; serial: at most {gen.parallel} at once' if gen.parallel else ''}",
+            f"LDEVs: {sum(map(len, ldevs.values()))} ({virtual} with a virtual LDEV id), "
+            f"Hostgroups: {sum(map(len, hostgroups.values()))}, "
+            f"LUN batches: {sum(map(len, mappings.values()))} within a resource group, {len(cross)} across",
+        ]
+        if not self.resource_groups:
+            notes.append("No resource_groups section in the facts; everything is restored to the default group")
+        if unknown:
+            notes.append(f"Resource groups missing from the resource_groups facts (must exist first): {unknown[:20]}")
+        if any(rg['external_parity_groups'] for rg in self.resource_groups):
+            notes.append("External parity groups (see --external) must exist before the resource groups")
+        return gen._document('Resource Group Restore Playbook', plays, *notes)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Resume From a Checkpoint Journal
+Generates the standard playbook set without the items a previous, failed
+run recorded as completed in its checkpoint journal (storage_checkpoint.py):
+- LDEVs and LDEV-hostgroup mappings in the journal are dropped
+- hostgroups whose WWNs were added (or that have none) are dropped;
+  hostgroups that were only created are kept with create: false, so only
+  their WWNs are added
+Unlike --diff-against, this needs no fresh facts from the array.
+"""
+
+from typing import Dict, Any, Iterator, Optional
+
+from storage_checkpoint import CheckpointJournal
+from storage_provisioning_generator_enhanced import StorageProvisioningGenerator
+
+
+class ResumeProvisioningGenerator(StorageProvisioningGenerator):
+    """Generates the standard playbook set minus the work a checkpoint journal records as done"""
+
+    def __init__(self, json_file: str, journal_file: str, **kwargs):
+        super().__init__(json_file, **kwargs)
+        self.journal_file = journal_file
+        self._journal: Optional[CheckpointJournal] = None
+
+    @property
+    def journal(self) -> CheckpointJournal:
+        """The journal, read once; '{serial}' in its path is the array's serial number"""
+        if self._journal is None:
+            path = self.journal_file.replace('{serial}', self.model.serial_number or '')
+            self._journal = CheckpointJournal(path).load()
+            self._log(f"✓ Loaded checkpoint journal {path}")
+            if self._journal.skipped:
+                self._log(f"⚠ Skipped {self._journal.skipped} unreadable journal lines")
+        return self._journal
+
+    def _iter_ldev_configs(self) -> Iterator[Dict[str, Any]]:
+        done = self.journal.ldevs
+        for config in super()._iter_ldev_configs():
+            if config['ldev_id'] not in done:
+                yield config
+
+    def _count_ldev_configs(self) -> int:
+        return sum(1 for _ in self._iter_ldev_configs())
+
+    def _iter_hostgroup_configs(self) -> Iterator[Dict[str, Any]]:
+        journal = self.journal
+        for config in super()._iter_hostgroup_configs():
+            key = (config['port'], config['name'])
+            if key in journal.wwns or (key in journal.hostgroups and not config['wwns']):
+                continue
+            if key in journal.hostgroups:
+                # Created before the failure; only its WWNs are still missing
+                config['create'] = False
+            yield config
+
+    def _count_hostgroup_configs(self) -> int:
+        return sum(1 for _ in self._iter_hostgroup_configs())
+
+    def _iter_provisioning_tasks(self) -> Iterator[Dict[str, Any]]:
+        done = self.journal.mappings
+        for task in super()._iter_provisioning_tasks():
+            if (task['ldev_id'], task['hg_port'], task['hg_name']) not in done:
+                yield task
+
+    def _count_provisioning_tasks(self) -> int:
+        return sum(1 for _ in self._iter_provisioning_tasks())
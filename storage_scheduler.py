@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Dependency-Aware Provisioning Scheduler
+Models the restore as a DAG instead of three global barriers
+(all LDEVs -> all hostgroups -> all mappings):
+- pool -> LDEV
+- port -> hostgroup -> WWNs
+- LDEV + hostgroup -> LUN batch
+Pools and ports already exist on the array and cost no API calls. Work is
+assigned to the earliest stage its dependencies allow, and the DAG is split
+into independent pipelines (connected hostgroup/LDEV components) that each
+provision as soon as their own LDEVs exist.
+"""
+
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from storage_playbook import (add_host_task, add_wwns_task, connection_vars, create_hostgroups_task,
+                              create_ldevs_task, play, present_ldevs_task)
+
+PIPELINED_PLAYBOOK = '08_pipelined_provisioning_workflow.yml'
+
+# Node kinds in dependency order; 'pool' and 'port' are pre-existing resources
+KINDS = ('pool', 'port', 'ldev', 'hostgroup', 'wwn', 'lun')
+KIND_LABELS = {
+    'pool': 'pools', 'port': 'ports', 'ldev': 'LDEVs', 'hostgroup': 'hostgroups',
+    'wwn': 'WWN sets', 'lun': 'LUN batches',
+}
+
+
+class Node:
+    __slots__ = ('key', 'kind', 'item', 'api_calls', 'deps', 'stage')
+
+    def __init__(self, key: Tuple, kind: str, item: Optional[Dict[str, Any]], api_calls: int):
+        self.key = key
+        self.kind = kind
+        self.item = item
+        self.api_calls = api_calls
+        self.deps: List['Node'] = []
+        self.stage = 0
+
+
+class ProvisioningScheduler:
+    def __init__(self, generator):
+        """Build the DAG from the generator's LDEV, hostgroup and LUN batch iterators,
+        so delta generators are scheduled over their delta only"""
+        self.generator = generator
+        self.nodes: Dict[Tuple, Node] = {}
+        self._build()
+        self._assign_stages()
+
+    def _node(self, key: Tuple, kind: str, item: Optional[Dict[str, Any]] = None, api_calls: int = 0) -> Node:
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = Node(key, kind, item, api_calls)
+        return node
+
+    def _build(self):
+        for ldev in self.generator._iter_ldev_configs():
+            node = self._node(('ldev', ldev['ldev_id']), 'ldev', ldev, 1)
+            node.deps.append(self._node(('pool', ldev['pool_id']), 'pool'))
+        for hg in self.generator._iter_hostgroup_configs():
+            hg_key = ('hostgroup', hg['port'], hg['name'])
+            port = self._node(('port', hg['port']), 'port')
+            hg_node = self._node(hg_key, 'hostgroup', hg, 0 if hg.get('create') is False else 1)
+            hg_node.deps.append(port)
+            if hg['wwns']:
+                self._node(('wwn', hg['port'], hg['name']), 'wwn', hg, 1).deps.append(hg_node)
+        for i, batch in enumerate(self.generator._provisioning_batches()):
+            node = self._node(('lun', i), 'lun', batch, 1)
+            hg_key = ('hostgroup', batch['hg_port'], batch['hg_name'])
+            # Hostgroups not being created (e.g. already present in a delta) still anchor the batch
+            node.deps.append(self._node(hg_key, 'hostgroup'))
+            if self.nodes[hg_key].item is None:
+                self.nodes[hg_key].deps.append(self._node(('port', batch['hg_port']), 'port'))
+            for ldev_id in batch['ldev_ids']:
+                ldev_node = self.nodes.get(('ldev', ldev_id))
+                if ldev_node is not None:
+                    node.deps.append(ldev_node)
+
+    def _assign_stages(self):
+        """Earliest stage per node: one after its latest dependency; free nodes don't add a stage"""
+        for kind in KINDS:
+            for node in self.nodes.values():
+                if node.kind == kind and node.deps:
+                    node.stage = max(d.stage for d in node.deps) + (1 if node.api_calls else 0)
+
+    def stages(self) -> List[Dict[str, int]]:
+        """Per stage: node count per kind plus 'api_calls'"""
+        plan: List[Dict[str, int]] = []
+        for node in self.nodes.values():
+            while len(plan) <= node.stage:
+                plan.append({'api_calls': 0})
+            counts = plan[node.stage]
+            if node.api_calls or node.kind in ('pool', 'port'):
+                counts[node.kind] = counts.get(node.kind, 0) + 1
+            counts['api_calls'] += node.api_calls
+        return plan
+
+    def critical_path(self) -> List[Node]:
+        """Longest chain of dependent API calls, ending at the latest-finishing node"""
+        best: Dict[Tuple, Tuple[int, Optional[Node]]] = {}
+        for kind in KINDS:
+            for node in self.nodes.values():
+                if node.kind != kind:
+                    continue
+                prev = max(node.deps, key=lambda d: best[d.key][0], default=None)
+                best[node.key] = ((best[prev.key][0] if prev else 0) + node.api_calls, prev)
+        if not best:
+            return []
+        key = max(best, key=lambda k: best[k][0])
+        path = []
+        node = self.nodes[key]
+        while node is not None:
+            if node.api_calls:
+                path.append(node)
+            node = best[node.key][1]
+        return path[::-1]
+
+    def pipelines(self) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """Independent pipelines: hostgroups joined by shared LDEVs, with their
+        LDEVs, WWN sets and LUN batches; largest (most API calls) first"""
+        parent: Dict[Tuple, Tuple] = {}
+
+        def find(key: Tuple) -> Tuple:
+            while parent.setdefault(key, key) != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        def union(a: Tuple, b: Tuple):
+            parent[find(a)] = find(b)
+
+        work = [n for n in self.nodes.values() if n.api_calls]
+        for node in work:
+            find(node.key)
+            for dep in node.deps:
+                if dep.kind not in ('pool', 'port'):
+                    union(node.key, dep.key)
+
+        groups: Dict[Tuple, Dict[str, List[Dict[str, Any]]]] = {}
+        for node in work:
+            pipeline = groups.setdefault(find(node.key), {'ldevs': [], 'hostgroups': [], 'luns': []})
+            if node.kind == 'ldev':
+                pipeline['ldevs'].append(node.item)
+            elif node.kind == 'lun':
+                pipeline['luns'].append(node.item)
+            elif node.kind == 'hostgroup' or self.nodes[('hostgroup',) + node.key[1:]].api_calls == 0:
+                # A WWN set on a hostgroup that is not created (create: false) lists it here
+                pipeline['hostgroups'].append(node.item)
+        # Longest pipelines first, so the critical one is never started last
+        return sorted(groups.values(), key=self._pipeline_calls, reverse=True)
+
+    @staticmethod
+    def _pipeline_calls(pipeline: Dict[str, List[Dict[str, Any]]]) -> int:
+        return (len(pipeline['ldevs']) + len(pipeline['luns'])
+                + sum(1 for hg in pipeline['hostgroups'] if hg.get('create') is not False)
+                + sum(1 for hg in pipeline['hostgroups'] if hg['wwns']))
+
+    def print_plan(self):
+        """Print the stage plan, critical path and pipeline summary"""
+        stages = self.stages()
+        total = sum(s['api_calls'] for s in stages)
+        print("\n" + "="*80)
+        print("Dependency-Aware Stage Plan")
+        print("="*80)
+        for i, counts in enumerate(stages):
+            parts = ', '.join(f"{counts[k]} {KIND_LABELS[k]}" for k in KINDS if counts.get(k))
+            suffix = " (existing)" if i == 0 else ""
+            print(f"Stage {i}: {parts or 'nothing'}{suffix} - {counts['api_calls']} API calls")
+        path = self.critical_path()
+        print(f"\nCritical path: {len(path)} dependent API calls"
+              + (f" ({' -> '.join(self._describe(n) for n in path)})" if path else ""))
+        pipelines = self.pipelines()
+        if pipelines:
+            longest = self._pipeline_calls(pipelines[0])
+            print(f"Pipelines: {len(pipelines)} independent, longest {longest} API calls "
+                  f"(of {total} total; the barrier workflow runs all {total} in sequence)")
+        print("="*80 + "\n")
+
+    @staticmethod
+    def _describe(node: Node) -> str:
+        if node.kind == 'ldev':
+            return f"LDEV {node.item['ldev_id']}"
+        if node.kind == 'lun':
+            return f"LUNs {node.item['hg_name']}@{node.item['hg_port']}"
+        return f"{node.kind} {node.item['name']}@{node.item['port']}"
+
+    def iter_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, a workflow running each pipeline as its own host"""
+        gen = self.generator
+        pipelines = self.pipelines()
+        names = [f"pipeline-{i:03d}" for i in range(len(pipelines))]
+        stages = self.stages()
+        pipeline_vars = {name: {
+            'api_calls': self._pipeline_calls(pipeline),
+            'ldevs': pipeline['ldevs'],
+            'hostgroups': pipeline['hostgroups'],
+            'luns': [gen._batch_item(batch) for batch in pipeline['luns']],
+        } for name, pipeline in zip(names, pipelines)}
+        build = play('Build Provisioning Pipelines', vars={'pipeline_hosts': names},
+                     tasks=[add_host_task('Add pipeline hosts', 'provisioning_pipelines', '{{ pipeline_hosts }}')])
+        # A pipeline host runs its tasks in sequence, so serial N caps the play at N API calls
+        run = play('Run Provisioning Pipelines', hosts='provisioning_pipelines', strategy='free', serial=gen.parallel,
+                   vars_files=[gen.vault_file], vars=connection_vars(pipelines=pipeline_vars), tasks=[
+                       create_ldevs_task('Create pipeline LDEVs', '{{ pipelines[inventory_hostname].ldevs }}',
+                                         tags=['ldev']),
+                       create_hostgroups_task('Create pipeline Hostgroups',
+                                              '{{ pipelines[inventory_hostname].hostgroups }}',
+                                              tags=['hostgroup']),
+                       add_wwns_task('Add WWNs to pipeline Hostgroups', '{{ pipelines[inventory_hostname].hostgroups }}',
+                                     tags=['hostgroup', 'wwn']),
+                       present_ldevs_task('Provision pipeline LDEVs to Hostgroups',
+                                          '{{ pipelines[inventory_hostname].luns }}', tags=['provision']),
+                   ])
+        return gen._document(
+            'Pipelined Provisioning Workflow', [build, run],
+            "Stages: " + ' | '.join(f"{i}: {s['api_calls']} calls" for i, s in enumerate(stages)),
+            f"Critical path: {len(self.critical_path())} dependent API calls",
+            f"Pipelines: {len(pipelines)}, each provisions its LUNs as soon as its own LDEVs and",
+            f"hostgroups exist; ansible-playbook -f N runs N pipelines at once"
+            f"{f' (serial: at most {gen.parallel} pipelines, so {gen.parallel} API calls)' if gen.parallel else ''}")
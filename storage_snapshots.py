@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Snapshot / ShadowImage Restore Playbook Generation
+Rebuilds Thin Image snapshot trees and ShadowImage pairs from the facts,
+grouped by snapshot group (ShadowImage: copy group):
+- pairs are created with their group name, pool and mirror unit
+- groups whose pairs were all split (PSUS) are split with ONE group-level
+  call after their pairs exist, instead of one split call per pair
+- ShadowImage pairs outside a copy group are split per pair
+- cascaded pairs (whose P-VOL is another pair's S-VOL) are created one tree
+  level at a time, after their parent level has been split
+"""
+
+from typing import List, Dict, Any, Iterator, Tuple
+
+from storage_playbook import connection_vars, play, vsp_task
+
+SNAPSHOT_PLAYBOOK = '09_restore_snapshots.yml'
+
+# section -> key under ansible_facts
+SNAPSHOT_SECTIONS = {
+    'snapshots': 'snapshots',
+    'shadow_image_pairs': 'data',
+}
+
+SPLIT_STATUSES = ('PSUS', 'PSUE')
+
+# Pair fields written to the playbook vars
+SNAPSHOT_PAIR_KEYS = ('pvol', 'svol', 'mirror_unit_id', 'pool_id', 'is_consistency_group',
+                      'is_data_reduction_force_copy', 'can_cascade', 'is_clone', 'auto_split')
+SI_PAIR_KEYS = ('pvol', 'svol', 'copy_group_name', 'copy_pair_name', 'new_group', 'consistency_group_id',
+                'copy_pace_track_size', 'split')
+
+
+def _snapshot_pair(snap: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'pvol': snap.get('primary_volume_id'),
+        'svol': snap.get('secondary_volume_id', -1),
+        'mirror_unit_id': snap.get('mirror_unit_id'),
+        'pool_id': snap.get('pool_id'),
+        'is_consistency_group': bool(snap.get('is_consistency_group')),
+        'is_data_reduction_force_copy': bool(snap.get('is_data_reduction_force_copy', True)),
+        'can_cascade': bool(snap.get('can_cascade', True)),
+        'is_clone': bool(snap.get('is_clone')),
+        'status': snap.get('status'),
+    }
+
+
+def _shadow_image_pair(pair: Dict[str, Any]) -> Dict[str, Any]:
+    cg = pair.get('consistency_group_id')
+    return {
+        'pvol': pair.get('primary_volume_id'),
+        'svol': pair.get('secondary_volume_id', -1),
+        'mirror_unit_id': pair.get('mirror_unit_id'),
+        'copy_group_name': pair.get('copy_group_name') or None,
+        'copy_pair_name': pair.get('copy_pair_name') or None,
+        'consistency_group_id': cg if cg is not None and cg >= 0 else None,
+        'copy_pace_track_size': pair.get('copy_pace_track_size') or 'MEDIUM',
+        'status': pair.get('status'),
+    }
+
+
+class SnapshotRestoreGenerator:
+    def __init__(self, generator):
+        """Collect snapshot and ShadowImage pairs through the generator's fact access"""
+        self.generator = generator
+        self.snapshot_groups: Dict[str, List[Dict[str, Any]]] = {}
+        # copy group name -> pairs; pairs the facts list without a copy group
+        self.shadow_image_groups: Dict[str, List[Dict[str, Any]]] = {}
+        self.shadow_image_pairs: List[Dict[str, Any]] = []
+        for section, record in generator.iter_fact_records(SNAPSHOT_SECTIONS):
+            if section == 'snapshots':
+                name = record.get('snapshot_group_name') or f"pvol-{record.get('primary_volume_id')}"
+                self.snapshot_groups.setdefault(name, []).append(_snapshot_pair(record))
+            else:
+                pair = _shadow_image_pair(record)
+                if pair['copy_group_name']:
+                    self.shadow_image_groups.setdefault(pair['copy_group_name'], []).append(pair)
+                else:
+                    self.shadow_image_pairs.append(pair)
+        self._assign_levels()
+
+    def _assign_levels(self):
+        """Tree level per snapshot pair: 0 for P-VOLs that are not snapshot S-VOLs"""
+        parent_of = {}
+        for pairs in self.snapshot_groups.values():
+            for pair in pairs:
+                if pair['svol'] is not None and pair['svol'] >= 0:
+                    parent_of[pair['svol']] = pair['pvol']
+
+        def depth(ldev_id: int) -> int:
+            level, seen = 0, set()
+            while ldev_id in parent_of and ldev_id not in seen:
+                seen.add(ldev_id)
+                ldev_id = parent_of[ldev_id]
+                level += 1
+            return level
+
+        for pairs in self.snapshot_groups.values():
+            for pair in pairs:
+                pair['level'] = depth(pair['pvol'])
+
+    def levels(self) -> List[List[Dict[str, Any]]]:
+        """Per tree level, the snapshot groups to handle there. A group is split
+        as a whole at its deepest level when every pair in it was split; pairs
+        that must be split earlier (parents of a cascade) auto-split on creation"""
+        plan: List[List[Dict[str, Any]]] = []
+        for name, pairs in self.snapshot_groups.items():
+            group_level = max(p['level'] for p in pairs)
+            group_split = all(p['status'] in SPLIT_STATUSES for p in pairs)
+            by_level: Dict[int, List[Dict[str, Any]]] = {}
+            for pair in pairs:
+                pair['auto_split'] = pair['status'] in SPLIT_STATUSES and (
+                    not group_split or pair['level'] < group_level)
+                by_level.setdefault(pair['level'], []).append(pair)
+            for level, level_pairs in by_level.items():
+                while len(plan) <= level:
+                    plan.append([])
+                plan[level].append({
+                    'name': name,
+                    'split': group_split and level == group_level,
+                    'pairs': level_pairs,
+                })
+        return plan
+
+    def count_pairs(self) -> Tuple[int, int]:
+        return (sum(len(p) for p in self.snapshot_groups.values()),
+                sum(len(p) for p in self.shadow_image_groups.values()) + len(self.shadow_image_pairs))
+
+    def api_calls(self) -> Tuple[int, int]:
+        """(grouped, per-pair) API call estimates: create + split"""
+        grouped = per_pair = 0
+        groups = [*self.snapshot_groups.values(), *self.shadow_image_groups.values(),
+                  *([pair] for pair in self.shadow_image_pairs)]
+        for pairs in groups:
+            splits = sum(1 for p in pairs if p['status'] in SPLIT_STATUSES)
+            grouped += len(pairs) + (1 if splits == len(pairs) else splits)
+            per_pair += len(pairs) + splits
+        return grouped, per_pair
+
+    def shadow_image_plan(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """ShadowImage pairs to create, each marked for a per-pair split, and the
+        copy groups to split with one call because all of their pairs were split"""
+        pairs, split_groups = [], []
+        for name, group in self.shadow_image_groups.items():
+            group_split = all(p['status'] in SPLIT_STATUSES for p in group)
+            if group_split:
+                split_groups.append(name)
+            for index, pair in enumerate(group):
+                pair['new_group'] = True if index == 0 else None
+                pair['split'] = pair['status'] in SPLIT_STATUSES and not group_split
+                pairs.append(pair)
+        for pair in self.shadow_image_pairs:
+            pair['new_group'] = None
+            pair['split'] = pair['status'] in SPLIT_STATUSES
+            pairs.append(pair)
+        return pairs, split_groups
+
+    def missing_svols(self) -> List[int]:
+        """S-VOLs that the LDEV playbooks do not create (they are not hostgroup-mapped)"""
+        created = {ldev['ldev_id'] for ldev in self.generator._iter_ldev_configs()}
+        pairs = [*self.shadow_image_pairs, *(p for groups in (self.snapshot_groups, self.shadow_image_groups)
+                                              for pairs in groups.values() for p in pairs)]
+        svols = {p['svol'] for p in pairs if p['svol'] is not None and p['svol'] >= 0}
+        return sorted(svols - created)
+
+    def iter_playbook(self) -> Iterator[str]:
+        """Yield, in chunks, the snapshot / ShadowImage restore playbook"""
+        gen = self.generator
+        levels = self.levels()
+        num_snapshots, num_si = self.count_pairs()
+        grouped, per_pair = self.api_calls()
+        missing = self.missing_svols()
+
+        play_vars = {}
+        tasks = []
+        for level, groups in enumerate(levels):
+            play_vars[f"snapshot_level_{level}"] = [
+                {'name': group['name'], 'split': group['split'],
+                 'pairs': [{key: pair[key] for key in SNAPSHOT_PAIR_KEYS} for pair in group['pairs']]}
+                for group in groups]
+            # Create the level's pairs, then split each of its groups once
+            tasks.append(vsp_task(f"Create snapshot pairs (level {level})", 'hv_snapshot', {
+                'pvol': '{{ item.1.pvol }}',
+                'svol': '{{ item.1.svol if item.1.svol >= 0 else omit }}',
+                'pool_id': '{{ item.1.pool_id }}',
+                'snapshot_group_name': '{{ item.0.name }}',
+                'mirror_unit_id': '{{ item.1.mirror_unit_id }}',
+                'is_consistency_group': '{{ item.1.is_consistency_group }}',
+                'is_data_reduction_force_copy': '{{ item.1.is_data_reduction_force_copy }}',
+                'can_cascade': '{{ item.1.can_cascade }}',
+                'is_clone': '{{ item.1.is_clone }}',
+                'auto_split': '{{ item.1.auto_split }}',
+            }, loop=f"{{{{ snapshot_level_{level} | subelements('pairs') }}}}",
+                label='{{ item.0.name }}: LDEV {{ item.1.pvol }} MU {{ item.1.mirror_unit_id }}', tags=['snapshot']))
+            tasks.append(vsp_task(f"Split snapshot groups (level {level})", 'hv_snapshot_group',
+                                  {'snapshot_group_name': '{{ item.name }}'}, state='split',
+                                  loop=f"{{{{ snapshot_level_{level} | selectattr('split') | list }}}}",
+                                  label='{{ item.name }} ({{ item.pairs | length }} pairs)', tags=['snapshot']))
+
+        # hv_shadow_image_pair creates one pair per call; pairs join their copy
+        # group, and only copy groups that exist on the array are split as a group
+        shadow_image_pairs, split_groups = self.shadow_image_plan()
+        play_vars['shadow_image_pairs'] = [{key: pair[key] for key in SI_PAIR_KEYS if pair[key] is not None}
+                                           for pair in shadow_image_pairs]
+        play_vars['shadow_image_split_groups'] = split_groups
+        pair_label = '{{ item.copy_group_name | default(\'no copy group\') }}: {{ item.pvol }} -> {{ item.svol }}'
+        names = {
+            'copy_group_name': '{{ item.copy_group_name | default(omit) }}',
+            'copy_pair_name': '{{ item.copy_pair_name | default(omit) }}',
+        }
+        tasks.append(vsp_task('Create ShadowImage pairs', 'hv_shadow_image_pair', {
+            'primary_volume_id': '{{ item.pvol }}',
+            'secondary_volume_id': '{{ item.svol }}',
+            **names,
+            'is_new_group_creation': '{{ item.new_group | default(omit) }}',
+            'consistency_group_id': '{{ item.consistency_group_id | default(omit) }}',
+            'copy_pace_track_size': '{{ item.copy_pace_track_size }}',
+        }, loop='{{ shadow_image_pairs }}', label=pair_label, tags=['shadow_image']))
+        tasks.append(vsp_task('Split ShadowImage copy groups', 'hv_shadow_image_group',
+                              {'copy_group_name': '{{ item }}'}, state='split',
+                              loop='{{ shadow_image_split_groups }}', label='{{ item }}', tags=['shadow_image']))
+        tasks.append(vsp_task('Split ShadowImage pairs', 'hv_shadow_image_pair', {
+            'primary_volume_id': '{{ item.pvol }}',
+            'secondary_volume_id': '{{ item.svol }}',
+            **names,
+        }, state='split', loop="{{ shadow_image_pairs | selectattr('split') | list }}",
+            label=pair_label, tags=['shadow_image']))
+
+        notes = [
+            f"Snapshot pairs: {num_snapshots} in {len(self.snapshot_groups)} groups, tree levels: {len(levels)}",
+            f"ShadowImage pairs: {num_si}, {num_si - len(self.shadow_image_pairs)} of them in "
+            f"{len(self.shadow_image_groups)} copy groups",
+            f"API calls: {grouped} with group-level splits (per-pair create + split: {per_pair})",
+        ]
+        if missing:
+            notes.append(f"S-VOLs not created by 03_create_ldevs_all.yml (must exist first): "
+                         f"{missing[:20]}{' ...' if len(missing) > 20 else ''}")
+        return gen._document('Snapshot / ShadowImage Restore Playbook', [play(
+            'Restore Snapshot and ShadowImage Pairs', vars_files=[gen.vault_file],
+            vars=connection_vars(**play_vars), tasks=tasks)], *notes)
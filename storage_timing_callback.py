@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Storage Task Timing (Ansible callback plugin)
+Copied to callback_plugins/storage_task_timing.py next to the generated
+playbooks by --task-timing; Ansible loads it from there automatically.
+It times every loop item of every task: an item's latency is the time since
+the same host's previous item of the task (or since the host started the
+task), which for the serial hv_ldev / hv_hg loops is the REST round trip.
+At the end of the run it prints a per-task summary and writes a JSON report
+(items, failures, p50 / p95 / max latency, throughput, and every item's
+latency) to $STORAGE_TIMING_REPORT, or timing_report.json next to the
+playbook.
+
+This file runs inside ansible-playbook and is never imported by the generator.
+"""
+
+import json
+import math
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+DOCUMENTATION = '''
+    name: storage_task_timing
+    type: aggregate
+    short_description: Per-item latency and throughput of storage task loops
+    description:
+      - Writes a JSON timing report of every task and loop item at the end of the run.
+    options: {}
+'''
+
+REPORT_NAME = 'timing_report.json'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'storage_task_timing'
+    # Loaded without being listed in callbacks_enabled
+    CALLBACK_NEEDS_ENABLED = False
+
+    def __init__(self):
+        super().__init__()
+        self.report_path = os.environ.get('STORAGE_TIMING_REPORT')
+        self.playbook = None
+        self.run_started = time.time()
+        # task uuid -> record, in the order tasks first start
+        self.tasks = {}
+        # (task uuid, host) -> time the host started the task or finished its last item
+        self.last = {}
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = playbook._file_name
+        if not self.report_path:
+            self.report_path = os.path.join(playbook._basedir, REPORT_NAME)
+
+    def v2_runner_on_start(self, host, task):
+        now = time.time()
+        self.tasks.setdefault(task._uuid, {
+            'task': task.get_name(), 'started': now, 'ended': now, 'items': [], 'looped': False})
+        self.last[(task._uuid, host.get_name())] = now
+
+    def _item(self, result, status):
+        now = time.time()
+        key = (result._task._uuid, result._host.get_name())
+        record = self.tasks.get(result._task._uuid)
+        if record is None:
+            return
+        started = self.last.get(key, now)
+        self.last[key] = now
+        record['ended'] = now
+        item = result._result.get('_ansible_item_label', result._result.get('item'))
+        record['items'].append({'host': result._host.get_name(), 'item': str(item),
+                                'seconds': round(now - started, 6), 'status': status})
+
+    def _loop_item(self, result, status):
+        record = self.tasks.get(result._task._uuid)
+        if record is not None:
+            record['looped'] = True
+        self._item(result, status)
+
+    def v2_runner_item_on_ok(self, result):
+        self._loop_item(result, 'ok')
+
+    def v2_runner_item_on_failed(self, result):
+        self._loop_item(result, 'failed')
+
+    def v2_runner_item_on_skipped(self, result):
+        self._loop_item(result, 'skipped')
+
+    def _task_done(self, result, status):
+        """Final result of a task on a host; a task without a loop is one item"""
+        record = self.tasks.get(result._task._uuid)
+        if record is None:
+            return
+        if record['looped'] or 'results' in result._result:
+            record['ended'] = time.time()
+        else:
+            self._item(result, status)
+
+    def v2_runner_on_ok(self, result):
+        self._task_done(result, 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._task_done(result, 'failed')
+
+    def v2_runner_on_skipped(self, result):
+        self._task_done(result, 'skipped')
+
+    def _summary(self, record):
+        timed = sorted(i['seconds'] for i in record['items'] if i['status'] != 'skipped')
+        wall = record['ended'] - record['started']
+        return {
+            'task': record['task'],
+            'items': len(timed),
+            'failed': sum(1 for i in record['items'] if i['status'] == 'failed'),
+            'skipped': sum(1 for i in record['items'] if i['status'] == 'skipped'),
+            'wall_s': round(wall, 6),
+            'p50_s': percentile(timed, 50),
+            'p95_s': percentile(timed, 95),
+            'max_s': timed[-1] if timed else 0.0,
+            'mean_s': round(sum(timed) / len(timed), 6) if timed else 0.0,
+            'items_per_s': round(len(timed) / wall, 3) if wall > 0 else 0.0,
+        }
+
+    def v2_playbook_on_stats(self, stats):
+        tasks = [dict(self._summary(record), item_latencies=record['items']) for record in self.tasks.values()]
+        report = {
+            'playbook': self.playbook,
+            'started': self.run_started,
+            'wall_s': round(time.time() - self.run_started, 6),
+            'tasks': tasks,
+        }
+        with open(self.report_path, 'w') as f:
+            json.dump(report, f, indent=1)
+            f.write('\n')
+
+        self._display.banner('STORAGE TASK TIMING')
+        self._display.display(f"{'items':>7} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'items/s':>9}  task")
+        for task in tasks:
+            if task['items']:
+                self._display.display(f"{task['items']:>7} {task['p50_s']:>8.3f} {task['p95_s']:>8.3f} "
+                                      f"{task['max_s']:>8.3f} {task['items_per_s']:>9.2f}  {task['task']}")
+        self._display.display(f"Timing report: {self.report_path}")
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Host Group / WWN / LUN Path Topology Index
+Answers path questions during incidents without rereading the facts file:
+- ldev:      the hostgroups, ports, LUNs and host WWNs that see an LDEV
+- port:      what a port failure breaks: LDEVs left without any path, and
+             LDEVs that keep paths through other ports
+- hostgroup: a hostgroup's LUNs and WWNs
+- wwn:       the hostgroups a host WWN is registered in and the LDEVs it sees
+- summary:   per-port hostgroup / LDEV counts and single-port LDEVs
+LDEV paths are the union of each volume's hostgroups list and each
+hostgroup's lun_paths (which also give the LUN). The index is cached next to
+the facts file (.<facts name>.topology.json), keyed by the file's size and
+modification time, so only the first query parses the facts.
+
+Usage:
+    python3 storage_topology.py all_storage_facts.json ldev 1024
+    python3 storage_topology.py all_storage_facts.json port CL1-A
+    python3 storage_topology.py all_storage_facts.json hostgroup CL1-A DC1-ESXi-Cluster
+    python3 storage_topology.py all_storage_facts.json wwn 10000010abcdef01 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from storage_facts_model import wwn_key
+from storage_facts_stream import stream_records
+from storage_playbook_writer import PlaybookWriter
+
+TOPOLOGY_VERSION = 1
+
+TOPOLOGY_SECTIONS = {
+    'ldevs': 'volumes',
+    'host_groups': 'hostGroups',
+    'storage_ports': 'port_data',
+    'storage_system': 'storage_system',
+}
+TOPOLOGY_FIELDS = {
+    'ldevs': ('ldev_id', 'name', 'hostgroups'),
+    'host_groups': ('host_group_id', 'host_group_name', 'port_id', 'host_mode', 'lun_paths', 'wwns'),
+    'storage_ports': ('port_id', 'port_type', 'wwn'),
+}
+
+HostgroupKey = Tuple[str, str]
+
+
+def cache_path(facts_file: str) -> Path:
+    path = Path(facts_file)
+    return path.with_name(f".{path.name}.topology.json")
+
+
+def _source_key(facts_file: str) -> Dict[str, int]:
+    stat = os.stat(facts_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _first(record: Dict[str, Any], *keys: str) -> Any:
+    """First present key; lun_paths use snake_case or camelCase depending on the facts version"""
+    for key in keys:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+
+class TopologyIndex:
+    """Bidirectional LDEV <-> hostgroup <-> port <-> WWN index"""
+
+    def __init__(self):
+        self.serial: Optional[str] = None
+        # port_id -> port_type, port WWN
+        self.ports: Dict[str, Dict[str, Any]] = {}
+        # Hostgroups are numbered in first-seen order
+        self.hostgroups: List[HostgroupKey] = []
+        self.hostgroup_numbers: Dict[HostgroupKey, int] = {}
+        self.hostgroup_info: List[Dict[str, Any]] = []
+        self.hostgroup_wwns: List[List[str]] = []
+        self.ldev_names: Dict[int, str] = {}
+        # ldev_id -> hostgroup number -> LUN (None when only the volume side lists the path)
+        self.paths: Dict[int, Dict[int, Optional[int]]] = {}
+        # Reverse indexes, derived from the above
+        self.hostgroup_ldevs: List[Dict[int, Optional[int]]] = []
+        self.port_hostgroups: Dict[str, List[int]] = {}
+        self.wwn_hostgroups: Dict[str, List[int]] = {}
+
+    def _hostgroup(self, port: str, name: str) -> int:
+        key = (port, name)
+        number = self.hostgroup_numbers.get(key)
+        if number is None:
+            number = self.hostgroup_numbers[key] = len(self.hostgroups)
+            self.hostgroups.append(key)
+            self.hostgroup_info.append({})
+            self.hostgroup_wwns.append([])
+        return number
+
+    def _add_path(self, ldev_id: int, number: int, lun: Optional[int] = None):
+        paths = self.paths.setdefault(ldev_id, {})
+        if paths.get(number) is None:
+            paths[number] = lun
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, Dict[str, Any]]]) -> 'TopologyIndex':
+        """Build the index from (section, record) pairs, e.g. from stream_records()"""
+        index = cls()
+        for section, record in records:
+            if section == 'ldevs':
+                ldev_id = record.get('ldev_id')
+                index.ldev_names[ldev_id] = record.get('name') or ''
+                for hg in record.get('hostgroups') or []:
+                    index._add_path(ldev_id, index._hostgroup(hg.get('port_id'), hg.get('name')))
+            elif section == 'host_groups':
+                number = index._hostgroup(record.get('port_id'), record.get('host_group_name'))
+                index.hostgroup_info[number] = {'id': record.get('host_group_id'),
+                                                'host_mode': record.get('host_mode')}
+                index.hostgroup_wwns[number] = [wwn_key(w) for w in record.get('wwns') or []]
+                for path in record.get('lun_paths') or []:
+                    ldev_id = _first(path, 'ldev_id', 'ldevId')
+                    if ldev_id is not None:
+                        index._add_path(int(ldev_id), number, _first(path, 'lun_id', 'lunId', 'lun'))
+            elif section == 'storage_ports':
+                index.ports[record.get('port_id')] = {'type': record.get('port_type'), 'wwn': record.get('wwn')}
+            elif section == 'storage_system':
+                serial = (record or {}).get('serial_number')
+                index.serial = str(serial) if serial else None
+        index._derive()
+        return index
+
+    @classmethod
+    def from_file(cls, facts_file: str) -> 'TopologyIndex':
+        """Build the index with one streaming pass over the facts file"""
+        return cls.from_records(stream_records(facts_file, sections=TOPOLOGY_SECTIONS, fields=TOPOLOGY_FIELDS))
+
+    def _derive(self):
+        self.hostgroup_ldevs = [{} for _ in self.hostgroups]
+        for ldev_id, paths in self.paths.items():
+            for number, lun in paths.items():
+                self.hostgroup_ldevs[number][ldev_id] = lun
+        self.port_hostgroups = {}
+        self.wwn_hostgroups = {}
+        for number, (port, _) in enumerate(self.hostgroups):
+            self.port_hostgroups.setdefault(port, []).append(number)
+            for wwn in self.hostgroup_wwns[number]:
+                self.wwn_hostgroups.setdefault(wwn, []).append(number)
+
+    # Persistent cache
+
+    def to_cache(self) -> Dict[str, Any]:
+        paths = []
+        for ldev_id, hg_paths in self.paths.items():
+            for number, lun in hg_paths.items():
+                paths.extend((ldev_id, number, lun))
+        return {
+            'serial': self.serial,
+            'ports': self.ports,
+            'hostgroups': [[port, name, info.get('id'), info.get('host_mode'), wwns] for (port, name), info, wwns
+                           in zip(self.hostgroups, self.hostgroup_info, self.hostgroup_wwns)],
+            'ldev_ids': list(self.ldev_names),
+            'ldev_names': list(self.ldev_names.values()),
+            # Flat (ldev_id, hostgroup number, lun) triples
+            'paths': paths,
+        }
+
+    @classmethod
+    def from_cache(cls, data: Dict[str, Any]) -> 'TopologyIndex':
+        index = cls()
+        index.serial = data['serial']
+        index.ports = data['ports']
+        for port, name, hg_id, host_mode, wwns in data['hostgroups']:
+            index.hostgroup_info[index._hostgroup(port, name)] = {'id': hg_id, 'host_mode': host_mode}
+            index.hostgroup_wwns[-1] = wwns
+        index.ldev_names = dict(zip(data['ldev_ids'], data['ldev_names']))
+        paths = data['paths']
+        for i in range(0, len(paths), 3):
+            index.paths.setdefault(paths[i], {})[paths[i + 1]] = paths[i + 2]
+        index._derive()
+        return index
+
+    @classmethod
+    def load(cls, facts_file: str, cache_file: Optional[str] = None,
+             rebuild: bool = False) -> Tuple['TopologyIndex', bool]:
+        """The index for facts_file and whether it came from the cache; a
+        missing, stale or unreadable cache is rebuilt and rewritten"""
+        path = Path(cache_file) if cache_file else cache_path(facts_file)
+        source = _source_key(facts_file)
+        if not rebuild:
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == TOPOLOGY_VERSION and data.get('source') == source:
+                    return cls.from_cache(data), True
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        index = cls.from_file(facts_file)
+        try:
+            with PlaybookWriter(path) as writer:
+                writer.write(json.dumps({'version': TOPOLOGY_VERSION, 'source': source, **index.to_cache()},
+                                        separators=(',', ':')))
+        except OSError:
+            # A read-only facts directory only costs the cache
+            pass
+        return index, False
+
+    # Queries; each returns plain data (printed as JSON with --json)
+
+    def _hostgroup_ref(self, number: int, lun: Optional[int] = None) -> Dict[str, Any]:
+        port, name = self.hostgroups[number]
+        ref = {'port': port, 'hostgroup': name, 'wwns': self.hostgroup_wwns[number]}
+        if lun is not None:
+            ref['lun'] = lun
+        return ref
+
+    def _ldev_ref(self, ldev_id: int, lun: Optional[int] = None) -> Dict[str, Any]:
+        ref = {'ldev_id': ldev_id, 'name': self.ldev_names.get(ldev_id, f"LDEV-{ldev_id}")}
+        if lun is not None:
+            ref['lun'] = lun
+        return ref
+
+    def ldev(self, ldev_id: int) -> Dict[str, Any]:
+        """Which hostgroups, ports and host WWNs see the LDEV"""
+        paths = self.paths.get(ldev_id, {})
+        result = self._ldev_ref(ldev_id)
+        result.update({
+            'known': ldev_id in self.ldev_names or ldev_id in self.paths,
+            'paths': [self._hostgroup_ref(number, lun) for number, lun in paths.items()],
+            'ports': sorted({self.hostgroups[number][0] for number in paths}),
+            'wwns': sorted({w for number in paths for w in self.hostgroup_wwns[number]}),
+        })
+        return result
+
+    def port(self, port_id: str) -> Dict[str, Any]:
+        """What breaks if the port goes: LDEVs with no path through any other
+        port, and LDEVs that keep paths through other ports"""
+        numbers = self.port_hostgroups.get(port_id, [])
+        ldev_ids = dict.fromkeys(ldev_id for number in numbers for ldev_id in self.hostgroup_ldevs[number])
+        lost, degraded = [], []
+        for ldev_id in ldev_ids:
+            other_ports = sorted({self.hostgroups[n][0] for n in self.paths[ldev_id]} - {port_id})
+            if other_ports:
+                degraded.append(dict(self._ldev_ref(ldev_id), remaining_ports=other_ports))
+            else:
+                lost.append(self._ldev_ref(ldev_id))
+        return {
+            'port': port_id,
+            'known': port_id in self.ports or port_id in self.port_hostgroups,
+            'port_info': self.ports.get(port_id, {}),
+            'hostgroups': [self._hostgroup_ref(number) for number in numbers],
+            'ldevs': len(ldev_ids),
+            'lose_all_paths': lost,
+            'keep_other_paths': degraded,
+        }
+
+    def hostgroup(self, port_id: str, name: str) -> Dict[str, Any]:
+        """A hostgroup's LUNs and WWNs"""
+        number = self.hostgroup_numbers.get((port_id, name))
+        if number is None:
+            return {'port': port_id, 'hostgroup': name, 'known': False, 'wwns': [], 'ldevs': []}
+        result = self._hostgroup_ref(number)
+        result.update(known=True, **self.hostgroup_info[number])
+        result['ldevs'] = [self._ldev_ref(ldev_id, lun) for ldev_id, lun in self.hostgroup_ldevs[number].items()]
+        return result
+
+    def wwn(self, wwn: str) -> Dict[str, Any]:
+        """The hostgroups a host WWN is registered in and the LDEVs it sees"""
+        key = wwn_key(wwn)
+        numbers = self.wwn_hostgroups.get(key, [])
+        return {
+            'wwn': key,
+            'known': bool(numbers),
+            'hostgroups': [{'port': self.hostgroups[n][0], 'hostgroup': self.hostgroups[n][1]} for n in numbers],
+            'ldevs': [self._ldev_ref(ldev_id) for ldev_id in
+                      dict.fromkeys(ldev_id for n in numbers for ldev_id in self.hostgroup_ldevs[n])],
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        ports = {}
+        for port, numbers in self.port_hostgroups.items():
+            ports[port] = {'hostgroups': len(numbers),
+                           'ldevs': len({ldev_id for n in numbers for ldev_id in self.hostgroup_ldevs[n]})}
+        single_port = sum(1 for paths in self.paths.values() if len({self.hostgroups[n][0] for n in paths}) == 1)
+        return {
+            'serial': self.serial,
+            'ldevs': len(self.ldev_names),
+            'mapped_ldevs': len(self.paths),
+            'hostgroups': len(self.hostgroups),
+            'paths': sum(len(paths) for paths in self.paths.values()),
+            'wwns': len(self.wwn_hostgroups),
+            'single_port_ldevs': single_port,
+            'ports': ports,
+        }
+
+
+def _ldev_line(ldev: Dict[str, Any]) -> str:
+    lun = f" (LUN {ldev['lun']})" if 'lun' in ldev else ''
+    return f"LDEV {ldev['ldev_id']}: {ldev['name']}{lun}"
+
+
+def print_result(query: str, result: Dict[str, Any], limit: int = 50):
+    """Human-readable query result; long lists are cut at limit lines"""
+    def listing(items: List[str]):
+        for line in items[:limit]:
+            print(f"  • {line}")
+        if len(items) > limit:
+            print(f"  … {len(items) - limit} more (use --json for all)")
+
+    if not result.get('known', True):
+        print(f"✗ Not found in the facts: {query}")
+        return
+    if query == 'ldev':
+        print(f"{_ldev_line(result)} — {len(result['paths'])} paths on ports {', '.join(result['ports']) or '-'}")
+        listing([f"{p['port']} / {p['hostgroup']}" + (f" LUN {p['lun']}" if 'lun' in p else '') +
+                 (f" WWNs {', '.join(p['wwns'])}" if p['wwns'] else '') for p in result['paths']])
+    elif query == 'port':
+        info = result['port_info']
+        print(f"Port {result['port']} ({info.get('type') or 'unknown type'}): {len(result['hostgroups'])} "
+              f"hostgroups, {result['ldevs']} LDEVs")
+        print(f"✗ LDEVs losing every path: {len(result['lose_all_paths'])}")
+        listing([_ldev_line(l) for l in result['lose_all_paths']])
+        print(f"⚠ LDEVs keeping paths through other ports: {len(result['keep_other_paths'])}")
+        listing([f"{_ldev_line(l)} via {', '.join(l['remaining_ports'])}" for l in result['keep_other_paths']])
+    elif query == 'hostgroup':
+        print(f"Hostgroup {result['port']} / {result['hostgroup']} (id {result.get('id')}, "
+              f"{result.get('host_mode')}): {len(result['ldevs'])} LDEVs, WWNs {', '.join(result['wwns']) or '-'}")
+        listing([_ldev_line(l) for l in result['ldevs']])
+    elif query == 'wwn':
+        print(f"WWN {result['wwn']}: {len(result['hostgroups'])} hostgroups, {len(result['ldevs'])} LDEVs")
+        listing([f"{h['port']} / {h['hostgroup']}" for h in result['hostgroups']])
+        listing([_ldev_line(l) for l in result['ldevs']])
+    else:
+        print(f"Array {result['serial']}: {result['ldevs']} LDEVs ({result['mapped_ldevs']} mapped), "
+              f"{result['hostgroups']} hostgroups, {result['paths']} paths, {result['wwns']} WWNs")
+        print(f"⚠ LDEVs reachable through a single port: {result['single_port_ldevs']}")
+        listing([f"{port}: {p['hostgroups']} hostgroups, {p['ldevs']} LDEVs" for port, p in result['ports'].items()])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the LDEV / hostgroup / port / WWN path topology "
+                                                 "of a storage facts file")
+    parser.add_argument('facts_file', help="Storage facts JSON file")
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument('--cache', default=None,
+                         help="Index cache file (default: .<facts name>.topology.json next to the facts)")
+    options.add_argument('--rebuild', action='store_true', help="Rebuild the cached index from the facts")
+    options.add_argument('--json', action='store_true', help="Print the result as JSON")
+    options.add_argument('--limit', type=int, default=50, help="Max lines per list in text output (default: 50)")
+    queries = parser.add_subparsers(dest='query', required=True)
+    queries.add_parser('ldev', parents=[options],
+                       help="Hostgroups, ports and WWNs that see an LDEV").add_argument('ldev_id', type=int)
+    queries.add_parser('port', parents=[options],
+                       help="LDEVs losing all paths or degraded if a port fails").add_argument('port_id')
+    hostgroup = queries.add_parser('hostgroup', parents=[options], help="LUNs and WWNs of a hostgroup")
+    hostgroup.add_argument('port_id')
+    hostgroup.add_argument('name')
+    queries.add_parser('wwn', parents=[options],
+                       help="Hostgroups and LDEVs a host WWN reaches").add_argument('wwn')
+    queries.add_parser('summary', parents=[options], help="Per-port counts and single-port LDEVs")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start = time.perf_counter()
+    try:
+        index, cached = TopologyIndex.load(args.facts_file, args.cache, rebuild=args.rebuild)
+    except OSError as e:
+        print(f"✗ Error reading facts: {e}")
+        exit(1)
+    loaded_s = time.perf_counter() - start
+    if args.query == 'ldev':
+        result = index.ldev(args.ldev_id)
+    elif args.query == 'port':
+        result = index.port(args.port_id)
+    elif args.query == 'hostgroup':
+        result = index.hostgroup(args.port_id, args.name)
+    elif args.query == 'wwn':
+        result = index.wwn(args.wwn)
+    else:
+        result = index.summary()
+    try:
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"✓ Topology index {'from cache' if cached else 'built from ' + args.facts_file} ({loaded_s:.2f}s)")
+            print_result(args.query, result, args.limit)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (e.g. head) closed the pipe; point stdout at devnull so the
+        # flush at interpreter exit does not raise again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        exit(1)
+    exit(0 if result.get('known', True) else 1)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Structured YAML Emission
+Playbooks are built as plain data (dicts, lists, scalars) and serialized
+here, instead of being hand-formatted with f-strings:
+- strings are written plain when that is unambiguous, otherwise
+  double-quoted with JSON escaping (valid YAML), so names with quotes,
+  colons, braces or non-ASCII text and Jinja expressions round-trip intact
+- multi-line strings become literal blocks (msg: |)
+- lists of numbers are written in flow style (ldev_ids: [1, 2, 3]),
+  everything else in block style with Ansible's customary indentation
+- Stream(iterable) values are written item by item, so LDEV / hostgroup /
+  mapping lists of any size are never held in memory
+
+Two backends produce the same data:
+- 'builtin' (default): the emitter below
+- 'pyyaml': PyYAML's safe dumper, the LibYAML-based CSafeDumper when
+  available. Its representer runs in Python and is about 8x slower on
+  large item lists (see benchmarks/bench_yaml_emit.py), so it is kept as a
+  reference and fallback rather than the default
+"""
+
+import re
+from functools import lru_cache
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+YAML_BACKENDS = ('builtin', 'pyyaml')
+
+# Strings written plain: they start with a letter, '_', '/' or './', hold no YAML
+# indicators and cannot be read as a number, date, boolean or null; anything
+# else is double-quoted
+_PLAIN_RE = re.compile(r'(?:[A-Za-z_/]|\.\.?/)[A-Za-z0-9_./()\- ]*\Z')
+# YAML 1.1 (PyYAML / Ansible) words that would load as booleans or null
+_RESERVED_WORDS = {'y', 'yes', 'n', 'no', 'true', 'false', 'on', 'off', 'null', '~'}
+# Characters YAML readers reject unescaped; such strings are written ASCII-escaped
+_NON_PRINTABLE_RE = re.compile('[\x7f-\x9f\u2028\u2029\ufeff\ud800-\udfff\ufffe\uffff]')
+# Characters a literal block cannot hold as written: anything outside printable
+# text, tab and newline (line breaks such as \r or \x85 would be normalized)
+_LITERAL_UNSAFE_RE = re.compile('[^\t\n\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd'
+                                '\U00010000-\U0010ffff]')
+
+BANNER = '#' * 68 + '\n'
+
+# Sequences under these keys get a blank line between items, as in hand-written playbooks
+_SPACED_LISTS = {'tasks', 'pre_tasks', 'post_tasks', 'handlers'}
+
+
+class Stream:
+    """A sequence value produced lazily and written one item at a time"""
+
+    __slots__ = ('items',)
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+
+def _literal_ok(text: str) -> bool:
+    """Whether a multi-line string loads back unchanged from a literal block:
+    it needs a content line, printable text only, no line whose leading space
+    would set the block's indentation, and at most one trailing newline (a
+    keep-chomped |+ block would swallow a following blank separator line)"""
+    if not text.strip('\n') or text.endswith('\n\n') or _LITERAL_UNSAFE_RE.search(text):
+        return False
+    first = next(line for line in text.split('\n') if line)
+    return first[0] not in (' ', '\t')
+
+
+def _is_plain(value: str) -> bool:
+    return bool(_PLAIN_RE.match(value)) and not value.endswith(' ') and value.lower() not in _RESERVED_WORDS
+
+
+def quote(value: str) -> str:
+    """Double-quoted YAML scalar (JSON string escaping is a subset of YAML's)"""
+    if _NON_PRINTABLE_RE.search(value):
+        return encode_basestring_ascii(value)
+    return encode_basestring(value)
+
+
+@lru_cache(maxsize=65536)
+def _string(value: str) -> str:
+    return value if _is_plain(value) else quote(value)
+
+
+def scalar(value: Any) -> str:
+    """Inline YAML text of a scalar"""
+    if isinstance(value, str):
+        return _string(value)
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return 'null'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if value != value:
+            return '.nan'
+        if value in (float('inf'), float('-inf')):
+            return '.inf' if value > 0 else '-.inf'
+        text = repr(value)
+        # YAML 1.1 floats need a dot: 1e+20 would load as a string
+        if '.' not in text:
+            text = text.replace('e', '.0e', 1)
+        return text
+    raise TypeError(f"Cannot emit {type(value).__name__} value {value!r} as YAML")
+
+
+@lru_cache(maxsize=1024)
+def _flat_heads(keys: Tuple[Any, ...], indent: int, first_prefix: str) -> List[str]:
+    """'key: ' line starts for a mapping with these keys, the first after first_prefix"""
+    pad = ' ' * indent
+    return [(first_prefix if i == 0 else pad) + scalar(name) + ': ' for i, name in enumerate(keys)]
+
+
+def _is_flow_list(value: Any) -> bool:
+    """Empty lists and lists of numbers (e.g. ldev_ids) are written inline"""
+    return isinstance(value, (list, tuple)) and not any(
+        isinstance(item, (str, dict, list, tuple, Stream)) for item in value)
+
+
+class YamlEmitter:
+    """Built-in streaming emitter; see the module docstring for the output style"""
+
+    name = 'builtin'
+
+    def iter_document(self, value: Any, header: Optional[List[str]] = None) -> Iterator[str]:
+        """Yield a whole YAML document: '---', a banner-framed header comment, then value"""
+        yield "---\n"
+        if header:
+            yield BANNER + ''.join(f"# {line}\n" if line else "#\n" for line in header) + BANNER
+        if isinstance(value, dict):
+            yield from self.iter_mapping(value, 0, spaced=False)
+        elif isinstance(value, (list, tuple, Stream)):
+            yield from self.iter_sequence(value, 0, spaced=True)
+        else:
+            yield scalar(value) + "\n"
+
+    def iter_mapping(self, mapping: Dict[Any, Any], indent: int, spaced: bool = False,
+                     first_prefix: Optional[str] = None) -> Iterator[str]:
+        """Block mapping at indent; first_prefix replaces the first key's indentation
+        (e.g. '- ' for a sequence item); spaced puts a blank line before block values"""
+        pad = ' ' * indent
+        first = True
+        for name, value in mapping.items():
+            prefix = first_prefix if first and first_prefix is not None else pad
+            if spaced and not first and isinstance(value, (dict, list, tuple, Stream)) \
+                    and not _is_flow_list(value) and value:
+                yield "\n"
+            yield from self.iter_entry(prefix + scalar(name) + ':', value, indent, name in _SPACED_LISTS)
+            first = False
+        if first:
+            yield (first_prefix if first_prefix is not None else pad) + "{}\n"
+
+    def iter_entry(self, head: str, value: Any, indent: int, spaced: bool = False) -> Iterator[str]:
+        """head is 'key:' already indented; write value after it at indent"""
+        if isinstance(value, dict):
+            if not value:
+                yield head + " {}\n"
+                return
+            yield head + "\n"
+            yield from self.iter_mapping(value, indent + 2)
+        elif isinstance(value, Stream):
+            items = iter(value.items)
+            first = next(items, _END)
+            if first is _END:
+                yield head + " []\n"
+                return
+            yield head + "\n"
+            yield from self.iter_sequence(_chain(first, items), indent + 2, spaced)
+        elif isinstance(value, (list, tuple)):
+            if _is_flow_list(value):
+                yield head + " [" + ', '.join(map(scalar, value)) + "]\n"
+                return
+            yield head + "\n"
+            yield from self.iter_sequence(value, indent + 2, spaced)
+        elif isinstance(value, str) and '\n' in value:
+            yield head + " " + self.literal(value, indent + 2)
+        else:
+            yield head + " " + scalar(value) + "\n"
+
+    def iter_sequence(self, items: Any, indent: int, spaced: bool = False) -> Iterator[str]:
+        if isinstance(items, Stream):
+            items = items.items
+        pad = ' ' * indent
+        first = True
+        for item in items:
+            if spaced and not first:
+                yield "\n"
+            first = False
+            if isinstance(item, dict):
+                text = self.flat_mapping(item, indent + 2, pad + '- ') if indent else None
+                if text is not None:
+                    yield text
+                else:
+                    yield from self.iter_mapping(item, indent + 2, spaced=indent == 0, first_prefix=pad + '- ')
+            elif isinstance(item, (list, tuple, Stream)):
+                yield from self.iter_entry(pad + '-', item, indent)
+            elif isinstance(item, str) and '\n' in item:
+                yield pad + "- " + self.literal(item, indent + 2)
+            else:
+                yield pad + "- " + scalar(item) + "\n"
+
+    @staticmethod
+    def flat_mapping(mapping: Dict[Any, Any], indent: int, first_prefix: str) -> Optional[str]:
+        """Fast path for list items such as LDEV records: the whole mapping as one
+        string, or None when a value needs block layout"""
+        heads = _flat_heads(tuple(mapping), indent, first_prefix)
+        parts = []
+        for head, value in zip(heads, mapping.values()):
+            kind = type(value)
+            if kind is str:
+                if '\n' in value:
+                    return None
+                parts.append(head + _string(value) + '\n')
+            elif kind is int:
+                parts.append(f"{head}{value}\n")
+            elif kind is list or kind is tuple:
+                if not _is_flow_list(value):
+                    return None
+                parts.append(head + '[' + ', '.join(map(scalar, value)) + ']\n')
+            elif kind is dict:
+                if value:
+                    return None
+                parts.append(head + '{}\n')
+            else:
+                parts.append(head + scalar(value) + '\n')
+        return ''.join(parts) if parts else None
+
+    @staticmethod
+    def literal(text: str, indent: int) -> str:
+        """Literal block scalar (|) whose content lines sit at indent, or a
+        double-quoted scalar when a block would not load back unchanged"""
+        if not _literal_ok(text):
+            return quote(text) + "\n"
+        lines = text.split('\n')
+        if text.endswith('\n'):
+            lines.pop()
+            indicator = '|'
+        else:
+            indicator = '|-'
+        pad = ' ' * indent
+        return indicator + "\n" + ''.join(f"{pad}{line}\n" if line else "\n" for line in lines)
+
+
+class PyYamlEmitter(YamlEmitter):
+    """Same document structure, with values serialized by PyYAML's safe dumper"""
+
+    name = 'pyyaml'
+    # Stream items are dumped this many at a time
+    chunk_size = 1000
+
+    def __init__(self):
+        import yaml
+        base = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+        class Dumper(base):
+            # Items are dumped in separate chunks, so anchors would collide
+            def ignore_aliases(self, data):
+                return True
+
+        def represent_str(dumper, data):
+            style = '|' if '\n' in data and _literal_ok(data) else None
+            return dumper.represent_scalar('tag:yaml.org,2002:str', data, style=style)
+
+        Dumper.add_representer(str, represent_str)
+        self.yaml = yaml
+        self.dumper = Dumper
+
+    def _dump(self, value: Any) -> str:
+        return self.yaml.dump(value, Dumper=self.dumper, default_flow_style=False, sort_keys=False,
+                              allow_unicode=True, width=1 << 20, indent=2)
+
+    def _block(self, value: Any, indent: int) -> str:
+        pad = ' ' * indent
+        # Only truly empty lines stay unindented; a whitespace-only line inside a
+        # literal block is content
+        return ''.join(pad + line if line != '\n' else line
+                       for line in self._dump(value).splitlines(True))
+
+    def iter_entry(self, head: str, value: Any, indent: int, spaced: bool = False) -> Iterator[str]:
+        if isinstance(value, Stream):
+            items = iter(value.items)
+            first = next(items, _END)
+            if first is _END:
+                yield head + " []\n"
+                return
+            yield head + "\n"
+            chunk = [first]
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= self.chunk_size:
+                    yield self._block(chunk, indent + 2)
+                    chunk = []
+            if chunk:
+                yield self._block(chunk, indent + 2)
+        elif isinstance(value, (dict, list, tuple)) and value:
+            # Play skeletons (vars holding streams, task lists) keep the document layout
+            if spaced or (isinstance(value, dict) and any(isinstance(v, Stream) for v in value.values())):
+                yield from super().iter_entry(head, value, indent, spaced)
+            else:
+                yield head + "\n" + self._block(value, indent + 2)
+        else:
+            # Dump a one-key mapping so PyYAML lays out (and indents) the whole
+            # scalar itself, then put head in place of the placeholder key
+            text = self._block({'_': value}, indent)
+            if text.endswith('\n...\n'):
+                text = text[:-4]
+            yield head + text[indent + 2:]
+
+
+_END = object()
+
+
+def _chain(first: Any, rest: Iterator[Any]) -> Iterator[Any]:
+    yield first
+    yield from rest
+
+
+def make_emitter(backend: str = 'builtin') -> YamlEmitter:
+    if backend == 'pyyaml':
+        return PyYamlEmitter()
+    if backend != 'builtin':
+        raise ValueError(f"Unknown YAML backend '{backend}' (choose from {', '.join(YAML_BACKENDS)})")
+    return YamlEmitter()